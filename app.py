@@ -1,4 +1,9 @@
+import os
+import time
+
 import streamlit as st
+from utils.data_loader import load_snapshot, select_tenant, memory_report
+from utils.kpi_api import serve_in_thread
 
 st.set_page_config(
     page_title="FMCG Purchasing Dashboard",
@@ -16,3 +21,28 @@ Dashboard ini menampilkan **analisis end-to-end Purchasing FMCG** mulai dari:
 
 Gunakan menu di sebelah kiri untuk navigasi.
 """)
+
+snapshot = load_snapshot(select_tenant())
+
+
+@st.cache_resource
+def start_kpi_api(port):
+    # KPI API in the same process, sharing the loaded dataset
+    return serve_in_thread(load_snapshot, port=port)
+
+
+if os.environ.get("KPI_API_PORT"):
+    start_kpi_api(int(os.environ["KPI_API_PORT"]))
+
+st.caption(
+    f"Dataset versi {snapshot.version} – dimuat "
+    f"{time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(snapshot.loaded_at))}. "
+    "Data diperbarui otomatis di background saat file sumber berubah."
+)
+
+with st.expander("Memory Budget"):
+    st.dataframe(memory_report(*snapshot.tables))
+    st.caption(
+        "Ukuran data di memori sebelum (raw) dan sesudah downcast dtype "
+        "(int32/float32/category)."
+    )
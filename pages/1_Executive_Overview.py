@@ -1,7 +1,13 @@
 import streamlit as st
 import pandas as pd
-import plotly.express as px
-from utils.data_loader import load_data
+from utils.backends import get_backend
+from utils.data_loader import load_snapshot, select_tenant
+from utils.exports import download_section
+from utils.figures import ppv_trend_fig, spend_trend_fig
+from utils.metrics import filter_po, filter_by_material
+from utils.po_sketch import select_count_mode
+from utils.price_index import ANOMALY_PCT, ANOMALY_Z
+from utils.snapshots import delta, kpi_deltas, select_baseline
 
 # --------------------------------------------------
 # PAGE CONFIG
@@ -12,7 +18,9 @@ st.title("Executive Purchasing Overview")
 # --------------------------------------------------
 # LOAD DATA
 # --------------------------------------------------
-po, gr, inv, cons = load_data()
+tenant = select_tenant()
+snapshot = load_snapshot(tenant)
+po, gr, inv, cons = snapshot.tables
 
 # --------------------------------------------------
 # GLOBAL FILTER
@@ -31,35 +39,31 @@ material_filter = st.sidebar.multiselect(
     default=list(po["material_name"].unique())
 )
 
-po_f = po[
-    (po["supplier_name"].isin(supplier_filter)) &
-    (po["material_name"].isin(material_filter))
-].copy()
+po_f = filter_po(po, supplier_filter, material_filter)
 
-inv_f = inv[inv["material_name"].isin(material_filter)].copy()
+inv_f = filter_by_material(inv, material_filter)
 
 # --------------------------------------------------
 # KPI CALCULATION
 # --------------------------------------------------
-total_spend = (po_f["ordered_qty"] * po_f["unit_price"]).sum()
+# On-time delivery (PO + GR)
+po_gr = filter_po(snapshot.derived["po_gr"], supplier_filter, material_filter)
 
-open_po = po_f[po_f["po_status"] == "Open"].shape[0]
+# Derived-metric stages run on the configured backend (METRICS_BACKEND)
+backend = get_backend()
 
-materials_below_ss = (
-    inv_f["stock_on_hand"] < inv_f["safety_stock"]
-).sum()
+# Distinct PO count (OTD denominator) from the per-cell PO sketches
+n_po = snapshot.derived["po_sketches"].count(
+    supplier_filter, material_filter, select_count_mode()
+)
 
-# On-time delivery (PO + GR)
-po_gr = po_f.merge(gr, on="po_number", how="left")
+kpis = backend.executive_kpis(po_f, po_gr, inv_f, n_po)
+materials_below_ss = kpis["materials_below_ss"]
 
-on_time_po = po_gr[
-    po_gr["gr_date"].notna() &
-    (po_gr["gr_date"] <= po_gr["expected_delivery_date"])
-]
-
-otd_rate = (
-    len(on_time_po) / po_gr["po_number"].nunique()
-    if po_gr["po_number"].nunique() > 0 else 0
+# Change vs a stored snapshot, from per-version aggregates
+deltas = kpi_deltas(
+    snapshot.derived["kpi_aggregates"], select_baseline(snapshot, tenant),
+    supplier_filter, material_filter
 )
 
 # --------------------------------------------------
@@ -69,32 +73,65 @@ st.subheader("Key Performance Indicators")
 
 c1, c2, c3, c4 = st.columns(4)
 
-c1.metric("Total Spend", f"Rp {total_spend:,.0f}")
-c2.metric("Open PO", int(open_po))
-c3.metric("On-Time Delivery Rate", f"{otd_rate:.1%}")
-c4.metric("Materials Below Safety Stock", int(materials_below_ss))
+c1.metric("Total Spend", f"Rp {kpis['total_spend']:,.0f}",
+          delta=delta(deltas, "total_spend", "{:+,.0f}"))
+c2.metric("Open PO", kpis["open_po"],
+          delta=delta(deltas, "open_po", "{:+,d}"), delta_color="inverse")
+c3.metric("On-Time Delivery Rate", f"{kpis['otd_rate']:.1%}",
+          delta=delta(deltas, "otd_rate", "{:+.1%}"))
+c4.metric("Materials Below Safety Stock", materials_below_ss,
+          delta=delta(deltas, "materials_below_ss", "{:+,d}"), delta_color="inverse")
 
 # --------------------------------------------------
 # SPEND TREND
 # --------------------------------------------------
 st.subheader("Purchasing Spend Trend")
 
-po_f["month"] = po_f["po_date"].dt.to_period("M").astype(str)
+fig_trend = spend_trend_fig(backend.spend_trend(po_f))
 
-spend_trend = (
-    po_f.groupby("month")
-    .apply(lambda x: (x["ordered_qty"] * x["unit_price"]).sum())
-    .reset_index(name="total_spend")
-)
+st.plotly_chart(fig_trend, use_container_width=True)
+
+# --------------------------------------------------
+# PURCHASE PRICE VARIANCE
+# --------------------------------------------------
+st.subheader("Purchase Price Variance (vs Trailing Median Price)")
 
-fig_trend = px.line(
-    spend_trend,
-    x="month",
-    y="total_spend",
-    markers=True
+# Trailing price baselines per supplier x material, shared per dataset version
+price_index = snapshot.derived["price_index"]
+price_mask = price_index.select(supplier_filter, material_filter)
+
+p1, p2 = st.columns(2)
+anomaly_pct = p1.slider(
+    "Anomaly: harga di atas baseline (%)", 5, 100, int(ANOMALY_PCT * 100), step=5
+) / 100
+anomaly_z = p2.slider(
+    "Anomaly: minimal deviasi (std dev)", 0.0, 5.0, ANOMALY_Z, step=0.5
 )
 
-st.plotly_chart(fig_trend, use_container_width=True)
+ppv_kpis = price_index.ppv_kpis(price_mask, anomaly_pct, anomaly_z)
+
+k1, k2, k3 = st.columns(3)
+k1.metric("Purchase Price Variance", f"Rp {ppv_kpis['ppv']:,.0f}")
+k2.metric("PPV Rate", f"{ppv_kpis['ppv_rate']:.1%}")
+k3.metric("Price Anomalies (PO)", ppv_kpis["price_anomalies"])
+
+fig_ppv = ppv_trend_fig(price_index.ppv_by("month", price_mask, anomaly_pct, anomaly_z))
+
+st.plotly_chart(fig_ppv, use_container_width=True)
+
+ppv_supplier = price_index.ppv_by("supplier_name", price_mask, anomaly_pct, anomaly_z)
+price_anomalies = price_index.anomalies(price_mask, anomaly_pct, anomaly_z)
+
+t1, t2 = st.columns(2)
+t1.markdown("**PPV per Supplier**")
+t1.dataframe(ppv_supplier)
+t2.markdown("**Top Price Anomalies**")
+t2.dataframe(
+    price_anomalies[
+        ["po_number", "supplier_name", "material_name", "unit_price",
+         "baseline_price", "price_increase"]
+    ].head(10)
+)
 
 # --------------------------------------------------
 # EXECUTIVE INSIGHTS
@@ -125,8 +162,7 @@ if materials_below_ss > 0:
     )
 
 top_spend_supplier = (
-    po_f.assign(spend=lambda x: x["ordered_qty"] * x["unit_price"])
-    .groupby("supplier_name")["spend"]
+    po_f.groupby("supplier_name", observed=True)["spend"]
     .sum()
     .idxmax()
 )
@@ -135,6 +171,12 @@ insights.append(
     f"Nilai pembelian terbesar berasal dari {top_spend_supplier}."
 )
 
+if not ppv_supplier.empty and ppv_supplier["ppv"].iloc[0] > 0:
+    insights.append(
+        f"Kenaikan harga terbesar terhadap baseline berasal dari "
+        f"{ppv_supplier['supplier_name'].iloc[0]}."
+    )
+
 for i in insights:
     st.markdown(f"- {i}")
 
@@ -159,11 +201,27 @@ if not late_po.empty:
         "Recommended Action": "Conduct supplier review and SLA discussion"
     })
 
+if not price_anomalies.empty:
+    actions.append({
+        "Area": "Procurement Price",
+        "Issue": "PO Priced Above Baseline",
+        "Recommended Action": "Validate price against contract and renegotiate"
+    })
+
 if actions:
     st.dataframe(pd.DataFrame(actions))
 else:
     st.success("Tidak ada isu kritikal pada periode ini.")
 
+# --------------------------------------------------
+# DATA EXPORT
+# --------------------------------------------------
+download_section({
+    "Purchase Orders": (po_f, "purchase_orders"),
+    "PO + Goods Receipt": (po_gr, "po_goods_receipt"),
+    "Price Anomalies": (price_anomalies, "price_anomalies"),
+})
+
 # --------------------------------------------------
 # FOOTNOTE
 # --------------------------------------------------
@@ -1,8 +1,14 @@
 import streamlit as st
-import pandas as pd
-import numpy as np
-import plotly.express as px
-from utils.data_loader import load_data
+from utils.backends import get_backend
+from utils.data_loader import load_snapshot, select_tenant
+from utils.exports import download_section
+from utils.figures import supplier_segmentation_fig
+from utils.metrics import (
+    filter_po, classify_suppliers, supplier_ranking, supplier_actions
+)
+from utils.po_sketch import select_count_mode
+from utils.risk_scoring import risk_controls, score, selection_key
+from utils.snapshots import delta, kpi_deltas, movers, select_baseline, unfiltered
 
 st.set_page_config(layout="wide")
 st.title("🏭 Supplier Performance & Risk Analysis")
@@ -10,7 +16,9 @@ st.title("🏭 Supplier Performance & Risk Analysis")
 # --------------------------------------------------
 # LOAD DATA
 # --------------------------------------------------
-po, gr, inv, cons = load_data()
+tenant = select_tenant()
+snapshot = load_snapshot(tenant)
+po, gr, inv, cons = snapshot.tables
 
 # --------------------------------------------------
 # GLOBAL FILTER
@@ -20,54 +28,37 @@ st.sidebar.header("Global Filters")
 supplier_filter = st.sidebar.multiselect(
     "Supplier",
     options=po["supplier_name"].unique(),
-    default=po["supplier_name"].unique()
+    default=list(po["supplier_name"].unique())
 )
 
-po_f = po[po["supplier_name"].isin(supplier_filter)]
-
 # --------------------------------------------------
-# JOIN PO + GR
+# JOIN PO + GR (precomputed per dataset version)
 # --------------------------------------------------
-po_gr = po_f.merge(gr, on="po_number", how="left")
-
-po_gr["lead_time"] = (
-    po_gr["gr_date"] - po_gr["po_date"]
-).dt.days
+po_gr = filter_po(snapshot.derived["po_gr"], supplier_filter)
 
 # --------------------------------------------------
 # DERIVED SUPPLIER METRICS
 # --------------------------------------------------
-supplier_df = (
-    po_gr.groupby("supplier_name")
-    .agg(
-        total_po=("po_number", "nunique"),
-        total_spend=("ordered_qty", lambda x: (x * po_gr.loc[x.index, "unit_price"]).sum()),
-        avg_lead_time=("lead_time", "mean"),
-        late_delivery_rate=(
-            "po_number",
-            lambda x: (
-                po_gr.loc[x.index, "gr_date"] >
-                po_gr.loc[x.index, "expected_delivery_date"]
-            ).mean()
-        ),
-        rejection_rate=(
-            "rejected_qty",
-            lambda x: x.sum() / po_gr.loc[x.index, "received_qty"].sum()
-            if po_gr.loc[x.index, "received_qty"].sum() > 0 else 0
-        )
+count_mode = select_count_mode()
+backend = get_backend()
+
+# Distinct POs per supplier come from the per-cell PO sketches, and the
+# metrics run on the configured backend (METRICS_BACKEND). Both are cached
+# with their normalized risk components per filter selection; the sidebar
+# weights only re-score the cached component matrix
+risk = risk_controls("supplier")
+supplier_df, components = snapshot.derived["risk_components"].get(
+    "supplier", selection_key(supplier_filter, count_mode, backend.name),
+    lambda: backend.supplier_metrics(
+        po_gr,
+        snapshot.derived["po_sketches"].count_by("supplier_name", supplier_filter, mode=count_mode)
     )
-    .reset_index()
 )
+supplier_df = score(supplier_df, components, risk)
 
-# Dependency (% spend)
-supplier_df["dependency"] = supplier_df["total_spend"] / supplier_df["total_spend"].sum()
-
-# Composite risk score (realistic & explainable)
-supplier_df["risk_score"] = (
-    supplier_df["late_delivery_rate"] * 0.5 +
-    supplier_df["rejection_rate"] * 0.3 +
-    (supplier_df["avg_lead_time"] / supplier_df["avg_lead_time"].max()) * 0.2
-)
+# Change vs a stored snapshot, from per-version aggregates
+baseline = select_baseline(snapshot, tenant)
+deltas = kpi_deltas(snapshot.derived["kpi_aggregates"], baseline, supplier_filter)
 
 # --------------------------------------------------
 # KPI SECTION
@@ -76,38 +67,26 @@ st.subheader("Supplier Performance KPIs")
 
 c1, c2, c3, c4 = st.columns(4)
 
-c1.metric("Avg Lead Time", f"{supplier_df['avg_lead_time'].mean():.1f} days")
-c2.metric("Avg Late Delivery Rate", f"{supplier_df['late_delivery_rate'].mean():.1%}")
-c3.metric("Avg Rejection Rate", f"{supplier_df['rejection_rate'].mean():.1%}")
-c4.metric("Total Spend", f"Rp {supplier_df['total_spend'].sum():,.0f}")
+c1.metric("Avg Lead Time", f"{supplier_df['avg_lead_time'].mean():.1f} days",
+          delta=delta(deltas, "avg_lead_time", "{:+.1f} days"), delta_color="inverse")
+c2.metric("Avg Late Delivery Rate", f"{supplier_df['late_delivery_rate'].mean():.1%}",
+          delta=delta(deltas, "avg_late_delivery_rate", "{:+.1%}"), delta_color="inverse")
+c3.metric("Avg Rejection Rate", f"{supplier_df['rejection_rate'].mean():.1%}",
+          delta=delta(deltas, "avg_rejection_rate", "{:+.1%}"), delta_color="inverse")
+c4.metric("Total Spend", f"Rp {supplier_df['total_spend'].sum():,.0f}",
+          delta=delta(deltas, "total_spend", "{:+,.0f}"))
 
 # --------------------------------------------------
 # SUPPLIER SEGMENTATION
 # --------------------------------------------------
 st.subheader("Supplier Segmentation (Dependency vs Risk)")
 
-def classify_supplier(row):
-    if row["dependency"] > 0.15 and row["risk_score"] < 0.2:
-        return "Strategic"
-    elif row["dependency"] > 0.15 and row["risk_score"] >= 0.2:
-        return "Bottleneck"
-    elif row["dependency"] <= 0.15 and row["risk_score"] < 0.2:
-        return "Leverage"
-    else:
-        return "Routine"
-
-supplier_df["segment"] = supplier_df.apply(classify_supplier, axis=1)
-
-fig_seg = px.scatter(
-    supplier_df,
-    x="dependency",
-    y="risk_score",
-    size="total_spend",
-    color="segment",
-    hover_data=["supplier_name"],
-    title="Supplier Segmentation Matrix"
+supplier_df["segment"] = classify_suppliers(
+    supplier_df, risk.thresholds["strategic_dependency"], risk.thresholds["low_risk"]
 )
 
+fig_seg = supplier_segmentation_fig(supplier_df)
+
 st.plotly_chart(fig_seg, use_container_width=True)
 
 # --------------------------------------------------
@@ -115,20 +94,15 @@ st.plotly_chart(fig_seg, use_container_width=True)
 # --------------------------------------------------
 st.subheader("Top Supplier Risk Ranking")
 
-risk_table = supplier_df.sort_values("risk_score", ascending=False)[
-    [
-        "supplier_name",
-        "segment",
-        "risk_score",
-        "avg_lead_time",
-        "late_delivery_rate",
-        "rejection_rate",
-        "dependency"
-    ]
-]
+risk_table = supplier_ranking(supplier_df)
 
 st.dataframe(risk_table.head(10))
 
+# Stored scores are normalized over all suppliers: no movers under a filter
+if baseline is not None and unfiltered(supplier_filter, po["supplier_name"].unique()):
+    st.subheader("Risk Score Movers vs Snapshot")
+    st.dataframe(movers(snapshot.derived["kpi_aggregates"], baseline, "supplier_scores", "supplier_name"))
+
 # --------------------------------------------------
 # AUTOMATED INSIGHTS
 # --------------------------------------------------
@@ -136,7 +110,7 @@ st.subheader("📌 Key Insights")
 
 insights = []
 
-high_risk = supplier_df[supplier_df["risk_score"] > 0.4]
+high_risk = supplier_df[supplier_df["risk_score"] > risk.thresholds["high_risk"]]
 if not high_risk.empty:
     insights.append(
         f"🚨 {len(high_risk)} supplier memiliki risiko tinggi terhadap kontinuitas supply."
@@ -163,27 +137,21 @@ for i in insights:
 # --------------------------------------------------
 st.subheader("✅ Recommended Supplier Actions")
 
-actions = []
-
-for _, r in supplier_df.iterrows():
-    if r["segment"] == "Bottleneck":
-        actions.append({
-            "Supplier": r["supplier_name"],
-            "Risk Level": "High",
-            "Recommended Action": "Develop alternative supplier / renegotiate SLA"
-        })
-    elif r["segment"] == "Strategic":
-        actions.append({
-            "Supplier": r["supplier_name"],
-            "Risk Level": "Low",
-            "Recommended Action": "Long-term partnership & volume commitment"
-        })
-
-if actions:
-    st.dataframe(pd.DataFrame(actions))
+actions = supplier_actions(supplier_df)
+
+if not actions.empty:
+    st.dataframe(actions)
 else:
     st.success("Tidak ada rekomendasi aksi kritikal pada periode ini.")
 
+# --------------------------------------------------
+# DATA EXPORT
+# --------------------------------------------------
+download_section({
+    "Supplier Risk Ranking": (risk_table, "supplier_risk_ranking"),
+    "PO + Goods Receipt": (po_gr, "po_goods_receipt"),
+})
+
 # --------------------------------------------------
 # FOOTNOTE
 # --------------------------------------------------
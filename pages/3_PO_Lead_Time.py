@@ -1,7 +1,12 @@
 import streamlit as st
 import pandas as pd
-import plotly.express as px
-from utils.data_loader import load_data
+from utils.backends import get_backend
+from utils.data_loader import load_snapshot, select_tenant
+from utils.exports import download_section
+from utils.figures import aging_fig, supplier_lead_time_fig
+from utils.metrics import TARGET_LT, filter_po, lead_time_kpis
+from utils.po_sketch import select_count_mode
+from utils.snapshots import delta, kpi_deltas, select_baseline
 
 # --------------------------------------------------
 # PAGE CONFIG
@@ -12,7 +17,9 @@ st.title("PO Lead Time and Delivery Performance")
 # --------------------------------------------------
 # LOAD DATA
 # --------------------------------------------------
-po, gr, inv, cons = load_data()
+tenant = select_tenant()
+snapshot = load_snapshot(tenant)
+po, gr, inv, cons = snapshot.tables
 
 # --------------------------------------------------
 # GLOBAL FILTER
@@ -31,86 +38,80 @@ material_filter = st.sidebar.multiselect(
     default=list(po["material_name"].unique())
 )
 
-po_f = po[
-    (po["supplier_name"].isin(supplier_filter)) &
-    (po["material_name"].isin(material_filter))
-].copy()
-
 # --------------------------------------------------
-# JOIN PO + GR
+# JOIN PO + GR (precomputed per dataset version)
 # --------------------------------------------------
-po_gr = po_f.merge(gr, on="po_number", how="left")
+po_gr = filter_po(snapshot.derived["po_gr"], supplier_filter, material_filter)
+
+# Open PO aging index (sorted by po_date, shared per dataset version)
+open_po_index = snapshot.derived["open_po_index"]
+open_mask = open_po_index.select(supplier_filter, material_filter)
 
 # --------------------------------------------------
 # DERIVED METRICS
 # --------------------------------------------------
-today = pd.Timestamp.today().normalize()
+today = pd.Timestamp(
+    st.sidebar.date_input("Aging as of", value=pd.Timestamp.today().date())
+)
 
-po_gr["actual_lead_time"] = (
-    po_gr["gr_date"] - po_gr["po_date"]
-).dt.days
+# Derived-metric stages run on the configured backend (METRICS_BACKEND)
+backend = get_backend()
 
-po_gr["current_age"] = (
-    po_gr["gr_date"].fillna(today) - po_gr["po_date"]
-).dt.days
+po_gr = backend.po_lead_time(po_gr)
 
-po_gr["late_flag"] = (
-    po_gr["gr_date"].notna() &
-    (po_gr["gr_date"] > po_gr["expected_delivery_date"])
-)
+# Distinct PO counts per supplier / material from the per-cell PO sketches
+po_sketches = snapshot.derived["po_sketches"]
+count_mode = select_count_mode()
 
 # --------------------------------------------------
 # KPI SECTION
 # --------------------------------------------------
 st.subheader("PO Lead Time KPIs")
 
-TARGET_LT = 14
+kpis = lead_time_kpis(po_gr, open_po_index, open_mask, today)
+
+# Change vs a stored snapshot, from per-version aggregates
+deltas = kpi_deltas(
+    snapshot.derived["kpi_aggregates"], select_baseline(snapshot, tenant),
+    supplier_filter, material_filter
+)
 
 c1, c2, c3, c4 = st.columns(4)
 
 c1.metric(
     "Average Lead Time",
-    f"{po_gr['actual_lead_time'].mean():.1f} days"
+    f"{kpis['avg_lead_time']:.1f} days",
+    delta=delta(deltas, "po_avg_lead_time", "{:+.1f} days"),
+    delta_color="inverse"
 )
 
 c2.metric(
     "Late PO Count",
-    int(po_gr["late_flag"].sum())
+    kpis["late_po_count"],
+    delta=delta(deltas, "late_po_count", "{:+,d}"),
+    delta_color="inverse"
 )
 
 c3.metric(
     "Late PO Rate",
-    f"{po_gr['late_flag'].mean():.1%}"
+    f"{kpis['late_po_rate']:.1%}",
+    delta=delta(deltas, "late_po_rate", "{:+.1%}"),
+    delta_color="inverse"
 )
 
 c4.metric(
     "Open PO Aging (Avg)",
-    f"{po_gr[po_gr['gr_date'].isna()]['current_age'].mean():.1f} days"
+    f"{kpis['open_po_aging']:.1f} days"
 )
 
 # --------------------------------------------------
 # PO AGING DISTRIBUTION
 # --------------------------------------------------
-st.subheader("PO Aging Distribution")
-
-po_gr["aging_bucket"] = pd.cut(
-    po_gr["current_age"],
-    bins=[0,7,14,30,999],
-    labels=["0–7 days","8–14 days","15–30 days",">30 days"]
-)
+st.subheader("Open PO Aging Distribution")
 
-aging_dist = (
-    po_gr.groupby("aging_bucket")
-    .size()
-    .reset_index(name="po_count")
-)
+aging_dist = open_po_index.aging_buckets(today, open_mask)
 
-fig_aging = px.bar(
-    aging_dist,
-    x="aging_bucket",
-    y="po_count",
-    title="PO Aging Bucket"
-)
+fig_aging = aging_fig(aging_dist)
 
 st.plotly_chart(fig_aging, use_container_width=True)
 
@@ -119,24 +120,12 @@ st.plotly_chart(fig_aging, use_container_width=True)
 # --------------------------------------------------
 st.subheader("Supplier Bottleneck Analysis")
 
-supplier_lt = (
-    po_gr.groupby("supplier_name")
-    .agg(
-        avg_lead_time=("actual_lead_time","mean"),
-        late_rate=("late_flag","mean"),
-        po_count=("po_number","nunique")
-    )
-    .reset_index()
+supplier_lt = backend.lead_time_by(
+    po_gr, "supplier_name",
+    po_sketches.count_by("supplier_name", supplier_filter, material_filter, count_mode)
 )
 
-fig_supplier = px.scatter(
-    supplier_lt,
-    x="avg_lead_time",
-    y="late_rate",
-    size="po_count",
-    color="supplier_name",
-    title="Supplier Lead Time vs Late Rate"
-)
+fig_supplier = supplier_lead_time_fig(supplier_lt)
 
 st.plotly_chart(fig_supplier, use_container_width=True)
 
@@ -145,14 +134,9 @@ st.plotly_chart(fig_supplier, use_container_width=True)
 # --------------------------------------------------
 st.subheader("Material Bottleneck Analysis")
 
-material_lt = (
-    po_gr.groupby("material_name")
-    .agg(
-        avg_lead_time=("actual_lead_time","mean"),
-        late_rate=("late_flag","mean"),
-        po_count=("po_number","nunique")
-    )
-    .reset_index()
+material_lt = backend.lead_time_by(
+    po_gr, "material_name",
+    po_sketches.count_by("material_name", supplier_filter, material_filter, count_mode)
 )
 
 st.dataframe(
@@ -164,10 +148,7 @@ st.dataframe(
 # --------------------------------------------------
 st.subheader("Early Warning: Overdue Open PO")
 
-overdue_po = po_gr[
-    (po_gr["gr_date"].isna()) &
-    (po_gr["current_age"] > TARGET_LT)
-]
+overdue_po = open_po_index.overdue(today, TARGET_LT, open_mask)
 
 if not overdue_po.empty:
     st.warning(
@@ -176,7 +157,7 @@ if not overdue_po.empty:
     st.dataframe(
         overdue_po[
             ["po_number","supplier_name","material_name","current_age"]
-        ].sort_values("current_age", ascending=False).head(10)
+        ].head(10)
     )
 else:
     st.success("Tidak ada PO open yang melewati target lead time.")
@@ -232,6 +213,14 @@ if actions:
 else:
     st.success("Tidak ada tindakan kritikal terkait PO lead time.")
 
+# --------------------------------------------------
+# DATA EXPORT
+# --------------------------------------------------
+download_section({
+    "Overdue Open PO": (overdue_po, "overdue_open_po"),
+    "PO Lead Time Detail": (po_gr, "po_lead_time"),
+})
+
 # --------------------------------------------------
 # FOOTNOTE
 # --------------------------------------------------
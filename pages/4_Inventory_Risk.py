@@ -1,7 +1,15 @@
 import streamlit as st
-import pandas as pd
-import plotly.express as px
-from utils.data_loader import load_data
+from utils.backends import get_backend
+from utils.data_loader import load_snapshot, select_tenant
+from utils.exports import download_section
+from utils.figures import inventory_health_fig
+from utils.replenishment import DEFAULT_SERVICE_LEVEL, reorder_policy
+from utils.metrics import (
+    TARGET_DOI, filter_by_material,
+    inventory_ranking, inventory_actions
+)
+from utils.risk_scoring import risk_controls, score, selection_key
+from utils.snapshots import delta, kpi_deltas, movers, select_baseline, unfiltered
 
 # --------------------------------------------------
 # PAGE CONFIG
@@ -12,7 +20,9 @@ st.title("Inventory Risk & Coverage Analysis")
 # --------------------------------------------------
 # LOAD DATA (4 OBJECTS ONLY)
 # --------------------------------------------------
-po, gr, inv, cons = load_data()
+tenant = select_tenant()
+snapshot = load_snapshot(tenant)
+po, gr, inv, cons = snapshot.tables
 
 # --------------------------------------------------
 # GLOBAL FILTER
@@ -25,65 +35,64 @@ material_filter = st.sidebar.multiselect(
     default=list(inv["material_name"].unique())
 )
 
-inv_f = inv[inv["material_name"].isin(material_filter)].copy()
-cons_f = cons[cons["material_name"].isin(material_filter)].copy()
+inv_f = filter_by_material(inv, material_filter)
+cons_f = filter_by_material(cons, material_filter)
 
 # --------------------------------------------------
 # DERIVED METRICS
 # --------------------------------------------------
-# Days of Inventory
-inv_f["days_of_inventory"] = inv_f["stock_on_hand"] / inv_f["daily_consumption"]
-
-# Consumption volatility
-cons_var = (
-    cons_f.groupby("material_id")["consumed_qty"]
-    .std()
-    .reset_index(name="consumption_volatility")
+# Days of Inventory, consumption volatility & composite risk score;
+# days to stockout use the per-material demand forecast of this dataset version.
+# Cached per filter selection; the sidebar weights only re-score the
+# cached component matrix
+backend = get_backend()
+risk = risk_controls("inventory")
+inv_risk, components = snapshot.derived["risk_components"].get(
+    "inventory", selection_key(material_filter, backend.name),
+    lambda: backend.inventory_risk(inv_f, cons_f, snapshot.derived["demand_forecast"])
 )
+inv_risk = score(inv_risk, components, risk)
+high_risk_score = risk.thresholds["high_risk"]
 
-inv_risk = inv_f.merge(cons_var, on="material_id", how="left").fillna(0)
-
-# Normalization (safe guard)
-inv_risk["doi_norm"] = inv_risk["days_of_inventory"] / inv_risk["days_of_inventory"].max()
-inv_risk["vol_norm"] = (
-    inv_risk["consumption_volatility"] /
-    inv_risk["consumption_volatility"].max()
-    if inv_risk["consumption_volatility"].max() > 0 else 0
-)
-
-# Composite inventory risk score
-inv_risk["inventory_risk_score"] = (
-    (1 - inv_risk["doi_norm"]) * 0.6 +
-    inv_risk["vol_norm"] * 0.4
-)
+# Change vs a stored snapshot, from per-version aggregates
+baseline = select_baseline(snapshot, tenant)
+deltas = kpi_deltas(snapshot.derived["kpi_aggregates"], baseline, materials=material_filter)
+# Stored risk scores use the default weights, normalized over all materials
+all_materials = unfiltered(material_filter, inv["material_name"].unique())
+risk_comparable = risk.is_default and all_materials
 
 # --------------------------------------------------
 # KPI SECTION
 # --------------------------------------------------
 st.subheader("Inventory Risk KPIs")
 
-TARGET_DOI = 14
-
 c1, c2, c3, c4 = st.columns(4)
 
 c1.metric(
     "Avg Days of Inventory",
-    f"{inv_risk['days_of_inventory'].mean():.1f} days"
+    f"{inv_risk['days_of_inventory'].mean():.1f} days",
+    delta=delta(deltas, "avg_days_of_inventory", "{:+.1f} days")
 )
 
 c2.metric(
     "Materials Below Safety Stock",
-    int((inv_risk["stock_on_hand"] < inv_risk["safety_stock"]).sum())
+    int((inv_risk["stock_on_hand"] < inv_risk["safety_stock"]).sum()),
+    delta=delta(deltas, "materials_below_ss", "{:+,d}"),
+    delta_color="inverse"
 )
 
 c3.metric(
     "Avg Inventory Risk Score",
-    f"{inv_risk['inventory_risk_score'].mean():.2f}"
+    f"{inv_risk['inventory_risk_score'].mean():.2f}",
+    delta=delta(deltas, "avg_inventory_risk_score", "{:+.2f}") if risk_comparable else None,
+    delta_color="inverse"
 )
 
 c4.metric(
     "High Risk Materials",
-    int((inv_risk["inventory_risk_score"] > 0.6).sum())
+    int((inv_risk["inventory_risk_score"] > high_risk_score).sum()),
+    delta=delta(deltas, "high_risk_materials", "{:+,d}") if risk_comparable else None,
+    delta_color="inverse"
 )
 
 # --------------------------------------------------
@@ -91,15 +100,7 @@ c4.metric(
 # --------------------------------------------------
 st.subheader("Inventory Health Matrix")
 
-fig_matrix = px.scatter(
-    inv_risk,
-    x="days_of_inventory",
-    y="consumption_volatility",
-    size="stock_on_hand",
-    color="inventory_risk_score",
-    hover_data=["material_name"],
-    title="Inventory Health Matrix (Coverage vs Volatility)"
-)
+fig_matrix = inventory_health_fig(inv_risk)
 
 st.plotly_chart(fig_matrix, use_container_width=True)
 
@@ -108,10 +109,7 @@ st.plotly_chart(fig_matrix, use_container_width=True)
 # --------------------------------------------------
 st.subheader("Early Warning: Days to Stockout")
 
-inv_risk["days_to_stockout"] = (
-    inv_risk["stock_on_hand"] / inv_risk["daily_consumption"]
-)
-
+# Days to stockout at the forecast daily consumption
 early_warning = inv_risk[inv_risk["days_to_stockout"] < TARGET_DOI]
 
 if not early_warning.empty:
@@ -120,25 +118,55 @@ if not early_warning.empty:
     )
     st.dataframe(
         early_warning.sort_values("days_to_stockout")[
-            ["material_name","days_to_stockout","stock_on_hand","daily_consumption"]
+            ["material_name","days_to_stockout","stock_on_hand","daily_consumption","forecast_daily"]
         ].head(10)
     )
 else:
     st.success("Tidak ada material dengan risiko stockout dalam waktu dekat.")
 
+# --------------------------------------------------
+# REORDER POINT & SAFETY STOCK OPTIMIZATION
+# --------------------------------------------------
+st.subheader("Reorder Point & Safety Stock Recommendation")
+
+service_level = st.slider(
+    "Target Service Level (%)",
+    min_value=80.0,
+    max_value=99.9,
+    value=DEFAULT_SERVICE_LEVEL * 100,
+    step=0.5
+) / 100
+
+policy = reorder_policy(snapshot.derived["replenishment_inputs"], service_level)
+policy = policy[policy["material_name"].isin(material_filter)]
+
+c1, c2 = st.columns(2)
+c1.metric("Materials to Reorder Now", int(policy["reorder_now"].sum()))
+c2.metric(
+    "Safety Stock Gap (Units)",
+    f"{(policy['recommended_safety_stock'] - policy['current_safety_stock']).sum():,.0f}"
+)
+
+st.dataframe(policy.sort_values("reorder_now", ascending=False))
+
+st.caption(
+    "Safety stock = z × √(L·σd² + d²·σL²), reorder point = d·L + safety stock, "
+    "order quantity = EOQ. Demand dari Material_Consumption, lead time dari PO + GR."
+)
+
 # --------------------------------------------------
 # RISK RANKING
 # --------------------------------------------------
 st.subheader("Top Inventory Risk Ranking")
 
-risk_table = inv_risk.sort_values(
-    "inventory_risk_score", ascending=False
-)[
-    ["material_name","days_of_inventory","consumption_volatility","inventory_risk_score"]
-]
+risk_table = inventory_ranking(inv_risk)
 
 st.dataframe(risk_table.head(10))
 
+if baseline is not None and all_materials:
+    st.subheader("Risk Score Movers vs Snapshot")
+    st.dataframe(movers(snapshot.derived["kpi_aggregates"], baseline, "material_scores", "material_name"))
+
 # --------------------------------------------------
 # AUTOMATED INSIGHTS
 # --------------------------------------------------
@@ -146,7 +174,7 @@ st.subheader("Key Insights")
 
 insights = []
 
-high_risk_count = (inv_risk["inventory_risk_score"] > 0.6).sum()
+high_risk_count = (inv_risk["inventory_risk_score"] > high_risk_score).sum()
 if high_risk_count > 0:
     insights.append(
         f"{high_risk_count} material memiliki risiko inventory tinggi."
@@ -175,27 +203,21 @@ for i in insights:
 # --------------------------------------------------
 st.subheader("Recommended Inventory Actions")
 
-actions = []
-
-for _, r in inv_risk.iterrows():
-    if r["inventory_risk_score"] > 0.6:
-        actions.append({
-            "Material": r["material_name"],
-            "Risk Level": "High",
-            "Recommended Action": "Increase safety stock or expedite PO"
-        })
-    elif r["days_of_inventory"] < TARGET_DOI:
-        actions.append({
-            "Material": r["material_name"],
-            "Risk Level": "Medium",
-            "Recommended Action": "Review reorder point"
-        })
-
-if actions:
-    st.dataframe(pd.DataFrame(actions))
+actions = inventory_actions(inv_risk, high_risk=high_risk_score)
+
+if not actions.empty:
+    st.dataframe(actions)
 else:
     st.info("Tidak ada rekomendasi aksi inventory kritikal saat ini.")
 
+# --------------------------------------------------
+# DATA EXPORT
+# --------------------------------------------------
+download_section({
+    "Inventory Risk Ranking": (risk_table, "inventory_risk_ranking"),
+    "Material Consumption": (cons_f, "material_consumption"),
+})
+
 # --------------------------------------------------
 # FOOTNOTE
 # --------------------------------------------------
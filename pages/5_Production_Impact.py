@@ -1,8 +1,14 @@
 import streamlit as st
-import pandas as pd
-import numpy as np
-import plotly.express as px
-from utils.data_loader import load_data
+from utils.backends import get_backend
+from utils.data_loader import load_snapshot, select_tenant
+from utils.exports import download_section
+from utils.figures import production_exposure_fig
+from utils.metrics import (
+    STOCKOUT_DAYS, filter_by_material,
+    adjusted_revenue_loss, production_ranking, production_actions
+)
+from utils.risk_scoring import risk_controls, score, selection_key
+from utils.snapshots import delta, kpi_deltas, select_baseline
 
 # --------------------------------------------------
 # PAGE CONFIG
@@ -13,7 +19,10 @@ st.title("Production Impact Analysis")
 # --------------------------------------------------
 # LOAD DATA (4 OBJECTS ONLY)
 # --------------------------------------------------
-po, gr, inv, cons = load_data()
+tenant = select_tenant()
+snapshot = load_snapshot(tenant)
+po, gr, inv, cons = snapshot.tables
+graph = snapshot.derived["exposure_graph"]
 
 # --------------------------------------------------
 # GLOBAL FILTER
@@ -32,73 +41,30 @@ product_filter = st.sidebar.multiselect(
     default=list(cons["product_name"].unique())
 )
 
-cons_f = cons[
-    (cons["material_name"].isin(material_filter)) &
-    (cons["product_name"].isin(product_filter))
-].copy()
-
-inv_f = inv[inv["material_name"].isin(material_filter)].copy()
-
-# --------------------------------------------------
-# MATERIAL → PRODUCTION EXPOSURE
-# --------------------------------------------------
-prod_exposure = (
-    cons_f.groupby(
-        ["material_id", "material_name", "product_id", "product_name"]
-    )["consumed_qty"]
-    .sum()
-    .reset_index()
-)
-
-# Merge inventory
-impact_df = prod_exposure.merge(
-    inv_f[
-        ["material_id", "material_name", "stock_on_hand", "daily_consumption"]
-    ],
-    on=["material_id", "material_name"],
-    how="left"
-)
+inv_f = filter_by_material(inv, material_filter)
 
 # --------------------------------------------------
-# DERIVED METRICS
+# MATERIAL → PRODUCTION EXPOSURE & DERIVED METRICS
 # --------------------------------------------------
-# Days to stockout (safe)
-impact_df["days_to_stockout"] = np.where(
-    impact_df["daily_consumption"] > 0,
-    impact_df["stock_on_hand"] / impact_df["daily_consumption"],
-    np.nan
-)
-
-# Production loss proxy
-impact_df["production_loss_units"] = np.where(
-    impact_df["days_to_stockout"] < 7,
-    impact_df["consumed_qty"],
-    impact_df["consumed_qty"] * 0.3
-)
-
-# Revenue loss assumption
-ASSUMED_UNIT_REVENUE = 15000
-impact_df["estimated_revenue_loss"] = (
-    impact_df["production_loss_units"] * ASSUMED_UNIT_REVENUE
-)
-
-# Normalize safely
-impact_df["loss_norm"] = (
-    impact_df["production_loss_units"] /
-    impact_df["production_loss_units"].max()
-    if impact_df["production_loss_units"].max() > 0 else 0
-)
-
-impact_df["stockout_norm"] = np.where(
-    impact_df["days_to_stockout"] > 0,
-    1 / impact_df["days_to_stockout"],
-    0
+# Exposure edges come from the precomputed supplier → material → product graph.
+# Days to stockout, production loss proxy, revenue loss & impact risk score
+# are cached per filter selection; the sidebar weights only re-score the
+# cached component matrix
+backend = get_backend()
+risk = risk_controls("impact")
+impact_df, components = snapshot.derived["risk_components"].get(
+    "impact", selection_key(material_filter, product_filter, backend.name),
+    lambda: backend.production_impact(
+        graph.exposure(material_filter, product_filter), inv_f,
+        snapshot.derived["demand_forecast"]
+    )
 )
+impact_df = score(impact_df, components, risk)
 
-# Composite impact risk score
-impact_df["impact_risk_score"] = (
-    impact_df["stockout_norm"] * 0.6 +
-    impact_df["loss_norm"] * 0.4
+# Change vs a stored snapshot, from per-version aggregates
+deltas = kpi_deltas(
+    snapshot.derived["kpi_aggregates"], select_baseline(snapshot, tenant),
+    materials=material_filter, products=product_filter
 )
 
 # --------------------------------------------------
@@ -110,22 +76,29 @@ c1, c2, c3, c4 = st.columns(4)
 
 c1.metric(
     "Materials at Risk",
-    int(impact_df[impact_df["days_to_stockout"] < 7]["material_name"].nunique())
+    int(impact_df[impact_df["days_to_stockout"] < STOCKOUT_DAYS]["material_name"].nunique()),
+    delta=delta(deltas, "materials_at_risk", "{:+,d}"),
+    delta_color="inverse"
 )
 
 c2.metric(
     "Estimated Production Loss (Units)",
-    f"{int(impact_df['production_loss_units'].sum()):,}"
+    f"{int(impact_df['production_loss_units'].sum()):,}",
+    delta=delta(deltas, "production_loss_units", "{:+,.0f}"),
+    delta_color="inverse"
 )
 
 c3.metric(
     "Estimated Revenue Loss",
-    f"Rp {impact_df['estimated_revenue_loss'].sum():,.0f}"
+    f"Rp {impact_df['estimated_revenue_loss'].sum():,.0f}",
+    delta=delta(deltas, "estimated_revenue_loss", "{:+,.0f}"),
+    delta_color="inverse"
 )
 
 c4.metric(
     "Avg Days to Stockout",
-    f"{impact_df['days_to_stockout'].mean():.1f}"
+    f"{impact_df['days_to_stockout'].mean():.1f}",
+    delta=delta(deltas, "avg_days_to_stockout", "{:+.1f}")
 )
 
 # --------------------------------------------------
@@ -133,15 +106,7 @@ c4.metric(
 # --------------------------------------------------
 st.subheader("Material to Product Impact Mapping")
 
-fig_matrix = px.scatter(
-    impact_df,
-    x="days_to_stockout",
-    y="production_loss_units",
-    size="estimated_revenue_loss",
-    color="material_name",
-    hover_data=["product_name"],
-    title="Production Exposure Matrix"
-)
+fig_matrix = production_exposure_fig(impact_df)
 
 st.plotly_chart(fig_matrix, use_container_width=True)
 
@@ -150,21 +115,31 @@ st.plotly_chart(fig_matrix, use_container_width=True)
 # --------------------------------------------------
 st.subheader("Top Production Risk Ranking")
 
-risk_table = impact_df.sort_values(
-    "impact_risk_score", ascending=False
-)[
-    [
-        "material_name",
-        "product_name",
-        "days_to_stockout",
-        "production_loss_units",
-        "estimated_revenue_loss",
-        "impact_risk_score"
-    ]
-]
+risk_table = production_ranking(impact_df)
 
 st.dataframe(risk_table.head(10))
 
+# --------------------------------------------------
+# SUPPLIER DELAY PROPAGATION
+# --------------------------------------------------
+st.subheader("What-if Scenario: Supplier Delay Impact")
+
+delayed_supplier = st.selectbox(
+    "Supplier terlambat",
+    options=list(graph.suppliers)
+)
+
+delay_impact = graph.supplier_delay_impact(delayed_supplier)
+
+st.metric(
+    "Revenue at Risk (Products Affected)",
+    f"Rp {delay_impact['revenue_at_risk'].sum():,.0f}",
+    delta=f"{len(delay_impact)} produk",
+    delta_color="off"
+)
+
+st.dataframe(delay_impact)
+
 # --------------------------------------------------
 # WHAT-IF SCENARIO
 # --------------------------------------------------
@@ -178,30 +153,13 @@ coverage_improvement = st.slider(
     step=5
 )
 
-impact_df["adjusted_stock"] = impact_df["stock_on_hand"] * (
-    1 + coverage_improvement / 100
-)
+adjusted_loss = adjusted_revenue_loss(impact_df, coverage_improvement)
 
-impact_df["adjusted_days_to_stockout"] = np.where(
-    impact_df["daily_consumption"] > 0,
-    impact_df["adjusted_stock"] / impact_df["daily_consumption"],
-    np.nan
-)
-
-impact_df["adjusted_revenue_loss"] = np.where(
-    impact_df["adjusted_days_to_stockout"] < 7,
-    impact_df["estimated_revenue_loss"],
-    impact_df["estimated_revenue_loss"] * 0.4
-)
-
-saving = (
-    impact_df["estimated_revenue_loss"].sum() -
-    impact_df["adjusted_revenue_loss"].sum()
-)
+saving = impact_df["estimated_revenue_loss"].sum() - adjusted_loss.sum()
 
 st.metric(
     "Estimated Revenue Loss After Improvement",
-    f"Rp {impact_df['adjusted_revenue_loss'].sum():,.0f}",
+    f"Rp {adjusted_loss.sum():,.0f}",
     delta=f"-Rp {saving:,.0f}"
 )
 
@@ -212,7 +170,7 @@ st.subheader("Key Insights")
 
 insights = []
 
-high_risk = impact_df[impact_df["impact_risk_score"] > 0.6]
+high_risk = impact_df[impact_df["impact_risk_score"] > risk.thresholds["high_risk"]]
 if not high_risk.empty:
     insights.append(
         f"{len(high_risk)} kombinasi material–produk berisiko tinggi "
@@ -238,25 +196,27 @@ for i in insights:
 # --------------------------------------------------
 st.subheader("Recommended Actions")
 
-actions = []
-
-for _, r in impact_df.iterrows():
-    if r["days_to_stockout"] < 7:
-        actions.append({
-            "Material": r["material_name"],
-            "Product": r["product_name"],
-            "Risk Level": "High",
-            "Recommended Action": (
-                "Expedite PO, increase safety stock, "
-                "or activate alternative supplier"
-            )
-        })
-
-if actions:
-    st.dataframe(pd.DataFrame(actions))
+actions = production_actions(impact_df)
+
+if not actions.empty:
+    st.dataframe(actions)
 else:
     st.success("Tidak ada risiko produksi kritikal pada periode ini.")
 
+# --------------------------------------------------
+# DATA EXPORT
+# --------------------------------------------------
+download_section({
+    "Production Risk Ranking": (risk_table, "production_risk_ranking"),
+    "Material Consumption": (
+        cons[
+            cons["material_name"].isin(material_filter) &
+            cons["product_name"].isin(product_filter)
+        ],
+        "material_consumption"
+    ),
+})
+
 # --------------------------------------------------
 # FOOTNOTE
 # --------------------------------------------------
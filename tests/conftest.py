@@ -0,0 +1,7 @@
+import os
+import sys
+
+# Tests import the app's modules the way `streamlit run` / `python -m` does
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
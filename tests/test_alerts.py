@@ -0,0 +1,50 @@
+from types import SimpleNamespace
+
+import pandas as pd
+
+from utils.alerts import AlertEngine, load_rules
+from utils.po_aging import OpenPOIndex
+
+
+def _snapshot(version, first_gr_date):
+    po_gr = pd.DataFrame({
+        "po_number": ["PO-1", "PO-2"],
+        "supplier_name": ["A", "B"],
+        "material_name": ["Gula", "Tepung"],
+        "po_date": pd.to_datetime(["2024-01-01", "2024-02-25"]),
+        "expected_delivery_date": pd.to_datetime(["2024-01-15", "2024-03-10"]),
+        "first_gr_date": pd.to_datetime([first_gr_date, None]),
+    })
+    inv = pd.DataFrame({
+        "material_id": ["M1"],
+        "material_name": ["Gula"],
+        "date": pd.to_datetime(["2024-02-28"]),
+        "stock_on_hand": [1000.0],
+        "safety_stock": [100.0],
+        "daily_consumption": [1.0],
+    })
+    cons = pd.DataFrame({"material_id": ["M1"], "consumed_qty": [1.0]})
+    return SimpleNamespace(
+        version=version,
+        inv=inv,
+        cons=cons,
+        derived={"po_gr": po_gr, "open_po_index": OpenPOIndex(po_gr), "demand_forecast": None},
+    )
+
+
+def test_received_po_resolves_its_alert_on_incremental_pass():
+    engine = AlertEngine(load_rules(None))
+    now = pd.Timestamp("2024-03-01 08:00")
+    key = ("overdue_open_po", "po", "PO-1")
+
+    alerts = engine.run(_snapshot(1, None), now=now)
+    assert [a["entity_id"] for a in alerts] == ["PO-1"]
+    assert key in engine._active
+
+    # PO-1 received since: it has no open-PO metrics any more, but its alert resolves
+    engine.run(_snapshot(2, "2024-02-29"), now=now + pd.Timedelta(hours=1))
+    assert key not in engine._active
+
+    # Overdue again later (new version): the alert is sent again, not suppressed
+    alerts = engine.run(_snapshot(3, None), now=now + pd.Timedelta(hours=2))
+    assert [a["entity_id"] for a in alerts] == ["PO-1"]
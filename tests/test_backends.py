@@ -0,0 +1,69 @@
+import glob
+
+import pandas as pd
+import pytest
+
+from utils.backends import (
+    STAGES,
+    get_backend,
+    load_stage_data,
+    same_result,
+    stage_inputs,
+)
+from utils.data_loader import DATA_PATH
+
+pytest.importorskip("polars")
+
+
+WORKBOOKS = sorted(glob.glob("data/*.xlsx"))
+
+
+def _missing_columns(path):
+    """Columns of the dashboard's workbook schema that `path` lacks, per sheet."""
+    expected = pd.read_excel(DATA_PATH, sheet_name=None, nrows=0)
+    actual = pd.read_excel(path, sheet_name=None, nrows=0)
+    missing = {
+        sheet: sorted(set(df.columns) - set(actual.get(sheet, pd.DataFrame()).columns))
+        for sheet, df in expected.items()
+    }
+    return {sheet: cols for sheet, cols in missing.items() if cols}
+
+
+@pytest.fixture(scope="module", params=WORKBOOKS)
+def data(request):
+    missing = _missing_columns(request.param)
+    if missing:
+        pytest.skip(f"{request.param} lacks required columns: {missing}")
+    return load_stage_data(request.param)
+
+
+def _selections(data):
+    po = data[0]
+    suppliers = sorted(po["supplier_name"].astype(str).unique())
+    materials = sorted(po["material_name"].astype(str).unique())
+    return {
+        "full": (None, None),
+        "suppliers": (suppliers[:2], None),
+        "materials": (None, materials[::2]),
+        "suppliers_and_materials": (suppliers[1:4], materials[:3]),
+        "empty": ([], []),
+    }
+
+
+SELECTIONS = ["full", "suppliers", "materials", "suppliers_and_materials", "empty"]
+
+
+@pytest.mark.parametrize("selection", SELECTIONS)
+@pytest.mark.parametrize("stage", STAGES)
+def test_polars_matches_pandas(data, stage, selection):
+    supplier_filter, material_filter = _selections(data)[selection]
+    args = stage_inputs(data, supplier_filter, material_filter)[stage]
+
+    expected = getattr(get_backend("pandas"), stage)(*args)
+    actual = getattr(get_backend("polars"), stage)(*args)
+
+    assert same_result(expected, actual)
+
+
+def test_backends_are_distinct():
+    assert get_backend("polars").name == "polars"
@@ -0,0 +1,74 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.bom_graph import build_exposure_graph
+from utils.metrics import ASSUMED_UNIT_REVENUE
+
+
+def _tables(n_po=300, n_cons=400, seed=0):
+    rng = np.random.default_rng(seed)
+    materials = {f"MAT-{i:03d}": f"Bahan {i}" for i in range(8)}
+    products = {f"PRD-{i:03d}": f"Produk {i}" for i in range(6)}
+    po_mat = rng.choice(list(materials), n_po)
+    # MAT-007 is only ever bought, never consumed
+    cons_mat = rng.choice(list(materials)[:7], n_cons)
+    cons_prd = rng.choice(list(products), n_cons)
+    po = pd.DataFrame({
+        "supplier_name": rng.choice(["PT A", "PT B", "PT C"], n_po),
+        "material_id": po_mat,
+        "material_name": [materials[m] for m in po_mat],
+        "spend": rng.uniform(1e5, 1e7, n_po),
+    })
+    cons = pd.DataFrame({
+        "material_id": cons_mat,
+        "material_name": [materials[m] for m in cons_mat],
+        "product_id": cons_prd,
+        "product_name": [products[p] for p in cons_prd],
+        "consumed_qty": rng.integers(1, 500, n_cons).astype("float64"),
+    })
+    return po, cons
+
+
+def _naive_propagation(po, cons, supplier):
+    """Reference: supplier share of material spend x material -> product consumption."""
+    spend = po.groupby(["supplier_name", "material_id"])["spend"].sum().reset_index()
+    spend["share"] = spend["spend"] / spend.groupby("material_id")["spend"].transform("sum")
+    usage = cons.groupby(["material_id", "product_id"])["consumed_qty"].sum().reset_index()
+    hit = usage.merge(spend[spend["supplier_name"] == supplier], on="material_id")
+    hit["consumed"] = hit["consumed_qty"] * hit["share"]
+    return hit.groupby("product_id")["consumed"].sum()
+
+
+@pytest.mark.parametrize("supplier", ["PT A", "PT B", "PT C"])
+def test_propagate_supplier_matches_merge_reference(supplier):
+    po, cons = _tables()
+    graph = build_exposure_graph(po, cons)
+
+    consumed, revenue = graph.propagate_supplier(supplier)
+    expected = _naive_propagation(po, cons, supplier).reindex(graph.product_ids, fill_value=0.0)
+
+    np.testing.assert_allclose(consumed, expected.to_numpy(), rtol=1e-9)
+    np.testing.assert_allclose(revenue, consumed * ASSUMED_UNIT_REVENUE, rtol=1e-9)
+
+
+def test_products_for_material_matches_consumption():
+    po, cons = _tables()
+    graph = build_exposure_graph(po, cons)
+
+    for material_id in graph.material_ids:
+        got = graph.products_for_material(material_id).set_index("product_id")
+        expected = (
+            cons[cons["material_id"] == material_id]
+            .groupby("product_id")["consumed_qty"].sum()
+        )
+        assert sorted(got.index) == sorted(expected.index)
+        np.testing.assert_allclose(
+            got["consumed_qty"].reindex(expected.index), expected.to_numpy()
+        )
+        np.testing.assert_allclose(
+            got["revenue_exposure"], got["consumed_qty"] * ASSUMED_UNIT_REVENUE
+        )
+
+    # Bought but never consumed: an empty slice, not an error
+    assert graph.products_for_material("MAT-007").empty
@@ -0,0 +1,26 @@
+import numpy as np
+import pandas as pd
+
+from utils.data_loader import downcast, prepare_tables
+
+
+def test_downcast_keeps_floats_that_lose_precision():
+    df = pd.DataFrame({
+        "stock_on_hand": [1.5, 250.0, np.nan],
+        "lead_time_days": [1 / 3, 17.3, 2.0],
+        "unit_price": [12500.0, 8000.0, 4250.0],
+    })
+    downcast(df)
+
+    assert df["stock_on_hand"].dtype == "float32"
+    assert df["lead_time_days"].dtype == "float64"
+    assert df["unit_price"].dtype == "float64"
+
+
+def test_spend_uses_full_precision_price():
+    po = pd.DataFrame({"ordered_qty": [3, 1_000_000], "unit_price": [12345.67, 98765.4321]})
+    empty = pd.DataFrame({"a": [1]})
+    po, *_ = prepare_tables(po, empty.copy(), empty.copy(), empty.copy())
+
+    assert po["spend"].dtype == "float64"
+    assert po["spend"].tolist() == [3 * 12345.67, 1_000_000 * 98765.4321]
@@ -0,0 +1,33 @@
+import io
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.exports import export
+
+
+def _frame(n=1234):
+    return pd.DataFrame({
+        "material_name": pd.Categorical(np.where(np.arange(n) % 2, "Gula", "Tepung")),
+        "stock_on_hand": np.arange(n, dtype="float32"),
+        "date": pd.date_range("2024-01-01", periods=n, freq="h"),
+    })
+
+
+@pytest.mark.parametrize("fmt, read", [
+    ("CSV", lambda b: pd.read_csv(io.BytesIO(b), parse_dates=["date"])),
+    ("Parquet", lambda b: pd.read_parquet(io.BytesIO(b))),
+    ("XLSX", lambda b: pd.read_excel(io.BytesIO(b), sheet_name="data_1")),
+])
+def test_export_returns_open_handle_with_full_file(fmt, read):
+    df = _frame()
+    f = export(df, fmt)
+    # Streamlit's download button accepts raw binary handles
+    assert isinstance(f, io.RawIOBase) and f.tell() == 0
+    with f:
+        out = read(f.read())
+
+    assert len(out) == len(df)
+    assert out["stock_on_hand"].tolist() == df["stock_on_hand"].tolist()
+    assert out["material_name"].astype(str).tolist() == df["material_name"].astype(str).tolist()
@@ -0,0 +1,49 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.forecast import CROSTON_ALPHA, forecast_demand, ses
+
+
+def _cons():
+    days = pd.date_range("2024-01-01", periods=20, freq="D")
+    smooth = pd.DataFrame({"material_id": "MAT-SMOOTH", "production_date": days, "consumed_qty": 10.0})
+    # 12 units every fourth day: ADI = 20 days / 5 demands = 4
+    lumpy = pd.DataFrame({"material_id": "MAT-LUMPY", "production_date": days[::4], "consumed_qty": 12.0})
+    return pd.concat([smooth, lumpy], ignore_index=True)
+
+
+def test_method_follows_demand_pattern():
+    fc = forecast_demand(_cons())
+
+    assert fc.loc["MAT-SMOOTH", "method"] == "ses"
+    assert fc.loc["MAT-LUMPY", "method"] == "croston"
+    assert fc.loc["MAT-LUMPY", "alpha"] == CROSTON_ALPHA
+
+
+def test_croston_matches_hand_computation():
+    fc = forecast_demand(_cons())
+
+    # Size stays 12; the interval starts at 1 and moves 10% towards 4 at each
+    # of the four later demands: 1.3, 1.57, 1.813, 2.0317
+    interval = 1.0
+    for _ in range(4):
+        interval += 0.1 * (4 - interval)
+    assert interval == pytest.approx(2.0317)
+    # SBA: (1 - alpha / 2) * size / interval
+    assert fc.loc["MAT-LUMPY", "forecast_daily"] == pytest.approx(0.95 * 12 / interval)
+
+
+def test_ses_on_constant_demand_is_the_level():
+    fc = forecast_demand(_cons())
+    assert fc.loc["MAT-SMOOTH", "forecast_daily"] == pytest.approx(10)
+
+
+def test_ses_picks_alpha_with_lowest_error():
+    # A level shift from 0 to 10: the fastest alpha tracks it best
+    y = np.array([[0.0] * 5 + [10.0] * 10])
+    level, alpha = ses(y, np.array([0.1, 0.5]))
+
+    assert alpha[0] == 0.5
+    # Level after ten updates of 50% towards 10
+    assert level[0] == pytest.approx(10 * (1 - 0.5 ** 10))
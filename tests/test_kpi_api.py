@@ -0,0 +1,142 @@
+import asyncio
+import json
+import time
+from types import SimpleNamespace
+
+import pandas as pd
+import pytest
+
+from utils import kpi_api
+from utils.kpi_api import KPIServer
+
+
+@pytest.fixture
+def calls(monkeypatch):
+    """Stub endpoints; records (tenant, version) per computation."""
+    calls = []
+
+    def report(snapshot, f):
+        calls.append((snapshot.tenant, snapshot.version))
+        time.sleep(snapshot.delay)
+        return {"rows": 1}, {"ranking": pd.DataFrame({"a": [1]})}
+
+    def broken(snapshot, f):
+        return {}, {}["missing"]
+
+    monkeypatch.setitem(kpi_api.ENDPOINTS, "/report", report)
+    monkeypatch.setitem(kpi_api.ENDPOINTS, "/broken", broken)
+    return calls
+
+
+def _server(delay=0.0, load_delay=0.0):
+    def snapshot_fn(tenant):
+        time.sleep(load_delay)
+        return SimpleNamespace(tenant=tenant, version=1, delay=delay)
+
+    return KPIServer(snapshot_fn, tenants_fn=lambda: ["P1", "P2"])
+
+
+def test_cache_is_kept_per_tenant(calls):
+    server = _server()
+
+    async def run():
+        for _ in range(3):
+            for tenant in ("P1", "P2"):
+                assert (await server.get(f"/report?tenant={tenant}"))[0] == 200
+
+    asyncio.run(run())
+    assert calls == [("P1", 1), ("P2", 1)]
+
+
+def test_unknown_tenant_is_404(calls):
+    status, _, _ = asyncio.run(_server().get("/report?tenant=nope"))
+    assert status == 404
+    assert calls == []
+
+
+def test_compute_key_error_is_not_reported_as_unknown_table(calls):
+    with pytest.raises(KeyError):
+        asyncio.run(_server().get("/broken"))
+    status, _, _ = asyncio.run(_server().get("/report?format=arrow&table=nope"))
+    assert status == 400
+
+
+def test_cancelled_client_does_not_fail_other_waiters(calls):
+    server = _server(delay=0.2)
+
+    async def run():
+        first = asyncio.ensure_future(server.get("/report"))
+        second = asyncio.ensure_future(server.get("/report"))
+        await asyncio.sleep(0.05)
+        first.cancel()
+        return await second
+
+    assert asyncio.run(run())[0] == 200
+    assert len(calls) == 1
+
+
+async def _request(port, raw):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(raw)
+    await writer.drain()
+    status_line = await reader.readline()
+    writer.close()
+    return status_line.decode()
+
+
+def _serve(server):
+    async def run(raws):
+        srv = await asyncio.start_server(server.handle, "127.0.0.1", 0)
+        port = srv.sockets[0].getsockname()[1]
+        async with srv:
+            return await asyncio.gather(*[_request(port, raw) for raw in raws])
+    return run
+
+
+def test_malformed_request_line_is_400(calls):
+    (status,) = asyncio.run(_serve(_server())([b"GARBAGE\r\n\r\n"]))
+    assert status.startswith("HTTP/1.1 400")
+
+
+def test_dataset_loading_does_not_block_the_event_loop(calls):
+    server = _server(load_delay=1.0)
+    started = time.perf_counter()
+    health = []
+
+    async def run():
+        srv = await asyncio.start_server(server.handle, "127.0.0.1", 0)
+        port = srv.sockets[0].getsockname()[1]
+        async with srv:
+            slow = asyncio.ensure_future(_request(port, b"GET /report HTTP/1.1\r\n\r\n"))
+            await asyncio.sleep(0.1)
+            health.append(await _request(port, b"GET /health HTTP/1.1\r\n\r\n"))
+            health.append(time.perf_counter() - started)
+            await slow
+
+    asyncio.run(run())
+    assert health[0].startswith("HTTP/1.1 200")
+    assert health[1] < 0.9
+
+
+def test_json_maps_non_finite_values_to_null():
+    body = kpi_api.encode_json(
+        1,
+        {"doi": float("inf"), "loss": float("-inf"), "rate": float("nan"), "n": 3},
+        {"ranking": pd.DataFrame({"days_to_stockout": [float("inf"), 2.5]})},
+    )
+    assert json.loads(body) == {
+        "dataset_version": 1,
+        "kpis": {"doi": None, "loss": None, "rate": None, "n": 3},
+        "tables": {"ranking": [{"days_to_stockout": None}, {"days_to_stockout": 2.5}]},
+    }
+
+
+def test_table_param_does_not_split_json_cache(calls):
+    server = _server()
+
+    async def run():
+        for table in ("ranking", "actions", "ranking"):
+            assert (await server.get(f"/report?table={table}"))[0] == 200
+
+    asyncio.run(run())
+    assert len(calls) == 1
@@ -0,0 +1,41 @@
+import numpy as np
+import pandas as pd
+
+from utils.metrics import TARGET_DOI, inventory_actions, inventory_risk
+
+
+def _inventory(daily_consumption):
+    inv = pd.DataFrame({
+        "material_id": ["MAT-001", "MAT-002"],
+        "material_name": ["Gula", "Tepung"],
+        "stock_on_hand": [1000, 100],
+        "safety_stock": [50, 50],
+        "daily_consumption": daily_consumption,
+    })
+    cons = pd.DataFrame({
+        "material_id": ["MAT-001", "MAT-002"] * 2,
+        "consumed_qty": [10, 20, 12, 18],
+    })
+    return inv, cons
+
+
+def test_zero_consumption_has_unbounded_days_of_inventory():
+    inv_risk = inventory_risk(*_inventory([0, 10]))
+
+    assert np.isinf(inv_risk["days_of_inventory"].iloc[0])
+    assert inv_risk["days_of_inventory"].iloc[1] == 10
+
+    actions = inventory_actions(inv_risk, TARGET_DOI)
+    assert "Gula" not in set(actions["Material"])
+
+
+def test_zero_forecast_is_not_an_imminent_stockout():
+    inv, cons = _inventory([5, 10])
+    forecast = pd.DataFrame(
+        {"forecast_daily": [0.0, 20.0]}, index=pd.Index(["MAT-001", "MAT-002"], name="material_id")
+    )
+    inv_risk = inventory_risk(inv, cons, forecast)
+
+    assert np.isinf(inv_risk["days_to_stockout"].iloc[0])
+    assert inv_risk["days_to_stockout"].iloc[1] == 5
+    assert list(inv_risk.loc[inv_risk["days_to_stockout"] < TARGET_DOI, "material_name"]) == ["Tepung"]
@@ -0,0 +1,61 @@
+import os
+
+import pandas as pd
+
+from utils.partitions import catalog_path, partition_stamp, read_partitions, write_partitions
+
+
+def _tables(plant, months):
+    dates = pd.to_datetime([f"2024-{m:02d}-15" for m in months])
+    n = len(dates)
+    return {
+        "Purchase_Order": pd.DataFrame({
+            "po_number": [f"{plant}-{i}" for i in range(n)],
+            "po_date": dates,
+            "ordered_qty": range(n),
+        }),
+        "Goods_Receipt": pd.DataFrame({
+            "po_number": [f"{plant}-{i}" for i in range(n)],
+            "gr_date": dates,
+            "received_qty": [1.5] * n,
+        }),
+        "Inventory": pd.DataFrame({"material_id": ["M1"] * n, "date": dates}),
+        "Material_Consumption": pd.DataFrame({
+            "material_id": ["M1"] * n,
+            "production_date": dates,
+        }),
+    }
+
+
+def test_empty_selection_keeps_table_schema(tmp_path):
+    root = str(tmp_path)
+    write_partitions(_tables("P1", [1, 2]), "P1", "BU1", root=root)
+
+    po, gr, _, _ = read_partitions("P1", months=["2030-01"], root=root)
+    assert po.empty and gr.empty
+    assert list(po.columns) == ["po_number", "po_date", "ordered_qty"]
+    assert pd.api.types.is_datetime64_any_dtype(po["po_date"])
+    assert pd.api.types.is_float_dtype(gr["received_qty"])
+
+
+def test_partition_writes_leave_no_temp_files(tmp_path):
+    root = str(tmp_path)
+    write_partitions(_tables("P1", [1, 2]), "P1", "BU1", root=root)
+    leftovers = [
+        name for _, _, files in os.walk(root) for name in files if name.endswith(".tmp")
+    ]
+    assert leftovers == []
+
+
+def test_stamp_ignores_other_plants(tmp_path):
+    root = str(tmp_path)
+    write_partitions(_tables("P1", [1, 2]), "P1", "BU1", root=root)
+    write_partitions(_tables("P2", [1]), "P2", "BU2", root=root)
+    before = partition_stamp(catalog_path(root), "P1")
+
+    # Rewriting another plant touches the shared catalog only
+    write_partitions(_tables("P2", [1, 3]), "P2", "BU2", root=root)
+    assert partition_stamp(catalog_path(root), "P1") == before
+
+    write_partitions(_tables("P1", [1, 2, 3]), "P1", "BU1", root=root)
+    assert partition_stamp(catalog_path(root), "P1") != before
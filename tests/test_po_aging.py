@@ -0,0 +1,37 @@
+import pandas as pd
+import pytest
+
+from utils.po_aging import OpenPOIndex
+from utils.metrics import TARGET_LT
+
+
+def _po_gr():
+    return pd.DataFrame({
+        "po_number": ["PO-1", "PO-2", "PO-3", "PO-4"],
+        "supplier_name": ["A", "A", "B", "B"],
+        "material_name": ["Gula", "Gula", "Tepung", "Tepung"],
+        "po_date": pd.to_datetime(["2024-01-01", "2024-01-10", "2024-01-20", "2024-02-15"]),
+        "expected_delivery_date": pd.to_datetime(["2024-01-15"] * 4),
+        # PO-1 received on 2024-02-01, the others never
+        "first_gr_date": pd.to_datetime(["2024-02-01", None, None, None]),
+    })
+
+
+def test_past_as_of_includes_pos_received_later():
+    index = OpenPOIndex(_po_gr())
+    as_of = pd.Timestamp("2024-01-25")
+
+    # PO-1 was still open on the as-of date; PO-4 did not exist yet
+    assert list(index.rows.loc[index.open_at(as_of), "po_number"]) == ["PO-1", "PO-2", "PO-3"]
+    assert index.aging_buckets(as_of)["po_count"].tolist() == [1, 0, 2, 0]
+    assert index.mean_age(as_of) == pytest.approx((24 + 15 + 5) / 3)
+    assert list(index.overdue(as_of, TARGET_LT)["po_number"]) == ["PO-1", "PO-2"]
+
+
+def test_received_pos_are_closed_and_future_pos_excluded():
+    index = OpenPOIndex(_po_gr())
+    as_of = pd.Timestamp("2024-02-01")
+
+    assert list(index.rows.loc[index.open_at(as_of), "po_number"]) == ["PO-2", "PO-3"]
+    assert index.mean_age(as_of) > 0
+    assert index.mean_age(as_of, index.select(supplier_filter=["B"])) == 12
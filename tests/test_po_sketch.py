@@ -0,0 +1,75 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.po_sketch import HLL_PRECISION, POSketchIndex
+
+# 3 standard errors of HyperLogLog at the configured precision
+HLL_BOUND = 3 * 1.04 / np.sqrt(1 << HLL_PRECISION)
+
+
+def _po_gr(n, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "po_number": [f"PO-{i:07d}" for i in range(n)],
+        "supplier_name": pd.Categorical(rng.choice(["A", "B", "C", "D", "E"], n)),
+        "material_name": pd.Categorical(rng.choice(["Gula", "Tepung", "Minyak"], n)),
+    })
+
+
+def _nunique_by(po_gr, key, suppliers=None, materials=None):
+    sel = po_gr
+    if suppliers is not None:
+        sel = sel[sel["supplier_name"].isin(suppliers)]
+    if materials is not None:
+        sel = sel[sel["material_name"].isin(materials)]
+    return sel.groupby(sel[key].astype(str))["po_number"].nunique()
+
+
+@pytest.mark.parametrize("key", ["supplier_name", "material_name"])
+@pytest.mark.parametrize("suppliers, materials", [
+    (None, None), (["A", "C"], None), (None, ["Tepung"]), (["B", "E"], ["Gula", "Minyak"]),
+])
+def test_exact_matches_nunique(key, suppliers, materials):
+    po_gr = _po_gr(5000)
+    index = POSketchIndex(po_gr)
+
+    expected = _nunique_by(po_gr, key, suppliers, materials)
+    got = index.count_by(key, suppliers, materials, mode="exact")
+    pd.testing.assert_series_equal(
+        got.sort_index(), expected.sort_index(), check_names=False, check_index_type=False
+    )
+    assert index.count(suppliers, materials) == expected.sum()
+
+
+def test_exact_counts_po_in_several_cells_once():
+    po_gr = pd.DataFrame({
+        "po_number": ["PO-1", "PO-1", "PO-2", "PO-3"],
+        "supplier_name": ["A", "A", "A", "B"],
+        "material_name": ["Gula", "Tepung", "Gula", "Gula"],
+    })
+    index = POSketchIndex(po_gr)
+
+    assert index.count() == 3
+    assert index.count_by("supplier_name").to_dict() == {"A": 2, "B": 1}
+    assert index.count_by("material_name").to_dict() == {"Gula": 3, "Tepung": 1}
+
+
+@pytest.mark.parametrize("key", ["supplier_name", "material_name"])
+def test_approx_within_error_bound(key):
+    po_gr = _po_gr(60_000, seed=1)
+    index = POSketchIndex(po_gr)
+
+    expected = _nunique_by(po_gr, key)
+    approx = index.count_by(key, mode="approx").reindex(expected.index)
+    assert ((approx / expected - 1).abs() < HLL_BOUND).all()
+    assert abs(index.count(mode="approx") / len(po_gr) - 1) < HLL_BOUND
+
+
+def test_approx_small_counts_nearly_exact():
+    po_gr = _po_gr(40, seed=2)
+    index = POSketchIndex(po_gr)
+
+    expected = _nunique_by(po_gr, "supplier_name")
+    approx = index.count_by("supplier_name", mode="approx").reindex(expected.index)
+    assert (approx - expected).abs().max() <= 1
@@ -0,0 +1,53 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.price_index import PriceHistoryIndex
+
+
+def _po():
+    dates = pd.date_range("2024-01-01", periods=6, freq="7D")
+    spiked = pd.DataFrame({
+        "supplier_name": "PT A", "material_name": "Gula", "po_date": dates,
+        # One injected spike (+50%) at the fifth PO
+        "unit_price": [1000.0, 1010.0, 990.0, 1000.0, 1500.0, 1000.0],
+    })
+    steady = pd.DataFrame({
+        "supplier_name": "PT B", "material_name": "Gula", "po_date": dates,
+        # +10% drift: above baseline but not an anomaly
+        "unit_price": [2000.0, 2000.0, 2000.0, 2200.0, 2200.0, 2200.0],
+    })
+    po = pd.concat([spiked, steady], ignore_index=True)
+    po["po_number"] = [f"PO-{i:02d}" for i in range(len(po))]
+    po["ordered_qty"] = 10.0
+    # Shuffled: the index sorts by (supplier, material, po_date) itself
+    return po.sample(frac=1, random_state=0)
+
+
+def test_injected_spike_is_the_only_anomaly():
+    index = PriceHistoryIndex(_po())
+
+    flagged = index.anomalies()
+    assert flagged["po_number"].tolist() == ["PO-04"]
+    # Trailing median of 1000, 1010, 990, 1000
+    assert flagged["baseline_price"].iloc[0] == 1000
+    assert flagged["price_increase"].iloc[0] == pytest.approx(0.5)
+
+
+def test_ppv_matches_hand_computation():
+    index = PriceHistoryIndex(_po())
+
+    # The first three POs of a cell have no baseline (PRICE_MIN_PERIODS)
+    assert np.isnan(index.baseline).sum() == 6
+
+    # PT A: 0 + 500 * 10 + 0 on a baseline spend of 3 * 1000 * 10
+    # PT B: 200 * 10 three times; the trailing median stays 2000
+    by_supplier = index.ppv_by("supplier_name").set_index("supplier_name")
+    assert by_supplier.loc["PT A", "ppv"] == 5000
+    assert by_supplier.loc["PT A", "ppv_rate"] == pytest.approx(5000 / 30000)
+    assert by_supplier.loc["PT B", "ppv"] == 6000
+    assert by_supplier.loc["PT B", "ppv_rate"] == pytest.approx(0.1)
+    assert by_supplier["price_anomalies"].to_dict() == {"PT A": 1, "PT B": 0}
+
+    kpis = index.ppv_kpis(index.select(supplier_filter=["PT A"]))
+    assert kpis == {"ppv": 5000, "ppv_rate": pytest.approx(1 / 6), "price_anomalies": 1}
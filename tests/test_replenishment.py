@@ -0,0 +1,69 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.replenishment import reorder_policy, replenishment_inputs
+
+
+def _inputs(**overrides):
+    row = {
+        "material_id": "MAT-001", "material_name": "Gula",
+        "avg_daily_demand": 10.0, "demand_std": 3.0,
+        "avg_lead_time": 16.0, "lead_time_std": 2.0,
+        "unit_price": 4000.0,
+        "stock_on_hand": 150.0, "stock_in_transit": 40.0, "safety_stock": 20.0,
+    }
+    row.update(overrides)
+    return pd.DataFrame([row])
+
+
+def test_policy_matches_hand_computation():
+    policy = reorder_policy(_inputs(), service_level=0.95, order_cost=500_000, holding_rate=0.25).iloc[0]
+
+    # z(95%) = 1.6449; SS = z * sqrt(16 * 3^2 + 10^2 * 2^2) = 1.6449 * sqrt(544) = 38.36
+    assert policy["recommended_safety_stock"] == 39
+    # ROP = 10 * 16 + 38.36 = 198.36
+    assert policy["reorder_point"] == 199
+    # EOQ = sqrt(2 * 3650 * 500000 / (0.25 * 4000)) = 1910.5
+    assert policy["order_qty"] == 1911
+    # Position 150 + 40 = 190 is below the ROP
+    assert policy["inventory_position"] == 190
+    assert policy["reorder_now"]
+
+
+def test_no_demand_variability_means_no_safety_stock():
+    policy = reorder_policy(_inputs(demand_std=0.0, lead_time_std=0.0, stock_on_hand=500.0)).iloc[0]
+
+    assert policy["recommended_safety_stock"] == 0
+    assert policy["reorder_point"] == 160
+    assert not policy["reorder_now"]
+
+
+def test_inputs_count_zero_demand_days():
+    cons = pd.DataFrame({
+        "material_id": ["MAT-001"] * 3,
+        "production_date": pd.to_datetime(["2024-01-01", "2024-01-03", "2024-01-04"]),
+        "consumed_qty": [10.0, 20.0, 10.0],
+    })
+    po_date = pd.to_datetime(["2024-01-01", "2024-01-05"])
+    po_gr = pd.DataFrame({
+        "material_id": ["MAT-001"] * 2,
+        "po_date": po_date,
+        "gr_date": po_date + pd.to_timedelta([10, 14], unit="D"),
+        "unit_price": [4000.0, 5000.0],
+    })
+    inv = pd.DataFrame({
+        "material_id": ["MAT-001"] * 2, "material_name": ["Gula"] * 2,
+        "date": pd.to_datetime(["2024-01-01", "2024-01-04"]),
+        "stock_on_hand": [80.0, 60.0], "stock_in_transit": [0.0, 5.0], "safety_stock": [20.0, 20.0],
+    })
+    row = replenishment_inputs(cons, po_gr, inv).iloc[0]
+
+    # Daily demand 10, 0, 20, 10 over the four-day span
+    assert row["avg_daily_demand"] == 10
+    assert row["demand_std"] == pytest.approx(np.sqrt(200 / 3))
+    assert row["avg_lead_time"] == 12
+    assert row["lead_time_std"] == pytest.approx(np.sqrt(8))
+    assert row["unit_price"] == 4500
+    # Latest inventory row
+    assert (row["stock_on_hand"], row["stock_in_transit"]) == (60, 5)
@@ -0,0 +1,57 @@
+import numpy as np
+import pandas as pd
+
+from utils.metrics import supplier_metrics
+from utils.risk_scoring import RiskComponentCache, RiskSettings, score
+
+
+def _po_gr(n=200, seed=0):
+    rng = np.random.default_rng(seed)
+    po_date = pd.Timestamp("2024-01-01") + pd.to_timedelta(rng.integers(0, 60, n), unit="D")
+    return pd.DataFrame({
+        "po_number": [f"PO-{i}" for i in range(n)],
+        "supplier_name": rng.choice(["A", "B", "C", "D"], n),
+        "po_date": po_date,
+        "gr_date": po_date + pd.to_timedelta(rng.integers(5, 30, n), unit="D"),
+        "expected_delivery_date": po_date + pd.Timedelta(days=14),
+        "spend": rng.uniform(1e5, 1e6, n),
+        "ordered_qty": rng.integers(10, 100, n).astype("float64"),
+        "received_qty": rng.integers(5, 100, n).astype("float64"),
+        "rejected_qty": rng.integers(0, 5, n).astype("float64"),
+    })
+
+
+def test_weight_change_only_rescores_cached_components():
+    cache = RiskComponentCache()
+    po_gr = _po_gr()
+    calls = []
+
+    def stage():
+        calls.append(1)
+        return supplier_metrics(po_gr)
+
+    for weights in [(0.5, 0.3, 0.2), (1.0, 0.0, 0.0), (0.0, 0.0, 1.0)]:
+        frame, components = cache.get("supplier", ("all",), stage)
+        scored = score(frame, components, RiskSettings("supplier", weights, {}))
+        np.testing.assert_allclose(
+            scored["risk_score"], components @ np.asarray(weights), rtol=1e-6
+        )
+    # The metric stage ran once; the two weight changes were re-scores only
+    assert len(calls) == 1
+
+    # Default weights reproduce the stage's own score
+    frame, components = cache.get("supplier", ("all",), stage)
+    default = score(frame, components, RiskSettings("supplier", (0.5, 0.3, 0.2), {}))
+    np.testing.assert_allclose(default["risk_score"], frame["risk_score"], rtol=1e-6)
+
+
+def test_cache_is_bounded_by_bytes():
+    frame = supplier_metrics(_po_gr())
+    probe = RiskComponentCache()
+    probe.get("supplier", ("probe",), lambda: frame)
+    entry_bytes = probe.nbytes
+
+    cache = RiskComponentCache(max_bytes=int(entry_bytes * 2.5))
+    for i in range(5):
+        cache.get("supplier", (i,), lambda: frame)
+    assert cache.nbytes == 2 * entry_bytes
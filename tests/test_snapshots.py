@@ -0,0 +1,41 @@
+from types import SimpleNamespace
+
+import pandas as pd
+
+from utils.snapshots import list_snapshots, record_snapshot_async, save_snapshot, unfiltered
+
+
+def test_unfiltered_requires_every_option():
+    options = pd.Series(["Gula", "Tepung"], dtype="category").unique()
+    assert unfiltered(["Tepung", "Gula"], options)
+    assert not unfiltered(["Gula"], options)
+
+
+def test_snapshot_is_written_off_the_calling_thread(tmp_path):
+    frame = pd.DataFrame({"a": [1, 2]})
+    dataset = SimpleNamespace(
+        version=1,
+        tables=(frame, frame, frame, frame),
+        derived={"content_hash": "abcdef0123456789", "kpi_aggregates": {"po": frame}},
+    )
+
+    snapshot_id = record_snapshot_async(dataset, "P1", str(tmp_path)).result(timeout=30)
+    assert [e["snapshot_id"] for e in list_snapshots("P1", str(tmp_path))] == [snapshot_id]
+
+    # Same content again: no second snapshot
+    assert record_snapshot_async(dataset, "P1", str(tmp_path)).result(timeout=30) == snapshot_id
+
+
+def test_only_newest_snapshots_are_kept(tmp_path):
+    frame = pd.DataFrame({"a": [1, 2]})
+    ids = []
+    for i in range(4):
+        dataset = SimpleNamespace(
+            version=i,
+            tables=(frame, frame, frame, frame),
+            derived={"content_hash": f"{i}" * 16, "kpi_aggregates": {"po": frame}},
+        )
+        ids.append(save_snapshot(dataset, "P1", str(tmp_path), keep=2))
+
+    assert [e["snapshot_id"] for e in list_snapshots("P1", str(tmp_path))] == ids[:1:-1]
+    assert sorted(p.name for p in (tmp_path / "P1").iterdir() if p.is_dir()) == sorted(ids[2:])
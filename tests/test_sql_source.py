@@ -0,0 +1,120 @@
+import json
+import sqlite3
+
+import pandas as pd
+import pyarrow as pa
+import pytest
+
+from utils.sql_source import STATE_FILE, TABLES, SQLSource, seed_sqlite
+
+
+def _tables(start="2024-01-01", days=10):
+    dates = pd.date_range(start, periods=days, freq="D")
+    n = len(dates)
+    po = pd.DataFrame({
+        "po_number": [f"PO-{d:%m%d}" for d in dates],
+        "po_date": dates,
+        "expected_delivery_date": dates + pd.Timedelta(days=14),
+        "ordered_qty": range(n),
+        "unit_price": [1000.5] * n,
+        "po_status": ["Open"] * n,
+    })
+    gr = pd.DataFrame({"po_number": po["po_number"], "gr_date": dates, "received_qty": range(n)})
+    inv = pd.DataFrame({"material_id": ["M1"] * n, "date": dates, "stock_on_hand": [5.0] * n})
+    cons = pd.DataFrame({"material_id": ["M1"] * n, "production_date": dates, "consumed_qty": [1.0] * n})
+    return dict(zip(TABLES, (po, gr, inv, cons)))
+
+
+def _insert(path, tables):
+    with sqlite3.connect(path) as conn:
+        for table, df in tables.items():
+            df.to_sql(table, conn, if_exists="append", index=False)
+
+
+@pytest.fixture
+def db(tmp_path):
+    path = tmp_path / "erp.db"
+    _insert(path, _tables())
+    return path
+
+
+@pytest.fixture
+def source(db, tmp_path):
+    # sqlite:////absolute/path.db
+    return SQLSource(f"sqlite:///{db}", cache_dir=str(tmp_path / "cache"), fetch_rows=3)
+
+
+def _spy(source):
+    fetched = []
+    fetch = source.fetch_arrow
+
+    def spy(sql, params=(), types=None):
+        out = fetch(sql, params, types)
+        fetched.append(out.num_rows)
+        return out
+
+    source.fetch_arrow = spy
+    return fetched
+
+
+def test_seed_copies_workbook(tmp_path):
+    workbook = tmp_path / "erp.xlsx"
+    with pd.ExcelWriter(workbook) as writer:
+        for table, df in _tables(days=4).items():
+            df.to_excel(writer, sheet_name=table, index=False)
+    path = tmp_path / "seeded.db"
+
+    seed_sqlite(str(workbook), f"sqlite:///{path}")
+    with sqlite3.connect(path) as conn:
+        counts = [conn.execute(f'SELECT COUNT(*) FROM "{t}"').fetchone()[0] for t in TABLES]
+    assert counts == [4, 4, 4, 4]
+
+
+def test_first_pull_reads_everything(source):
+    fetched = _spy(source)
+    po, gr, inv, cons = source.pull()
+
+    assert fetched == [10, 10, 10, 10]
+    assert po["po_date"].dtype.kind == "M"
+    assert po["ordered_qty"].tolist() == list(range(10))
+
+    with open(f"{source.cache_dir}/{STATE_FILE}") as f:
+        assert json.load(f)["Purchase_Order"] == "2024-01-10 00:00:00"
+
+
+def test_incremental_pull_fetches_only_new_rows(db, source):
+    source.pull()
+    _insert(db, _tables(start="2024-01-11", days=5))
+
+    fetched = _spy(source)
+    po, gr, inv, cons = source.pull()
+
+    # 5 new rows plus the re-read watermark day
+    assert fetched == [6, 6, 6, 6]
+    with open(f"{source.cache_dir}/{STATE_FILE}") as f:
+        assert json.load(f)["Goods_Receipt"] == "2024-01-15 00:00:00"
+
+    # Cached rows + new rows: the whole table, once
+    expected = pd.concat([_tables()["Purchase_Order"], _tables("2024-01-11", 5)["Purchase_Order"]])
+    assert po["po_number"].tolist() == expected["po_number"].tolist()
+    assert not po["po_number"].duplicated().any()
+    assert len(cons) == 15
+
+
+def test_empty_and_null_only_results_keep_declared_types(db, source):
+    _insert(db, {"Purchase_Order": pd.DataFrame({
+        "po_number": ["PO-NULL"], "po_date": [pd.Timestamp("2025-01-01")],
+        "expected_delivery_date": [None], "ordered_qty": [None], "unit_price": [None],
+        "po_status": [None],
+    })})
+    types = source.column_types("Purchase_Order")
+
+    empty = source.fetch_arrow(*source._query("Purchase_Order", "2030-01-01"), types=types)
+    nulls = source.fetch_arrow(*source._query("Purchase_Order", "2025-01-01"), types=types)
+
+    for table in (empty, nulls):
+        assert table.schema.field("ordered_qty").type == pa.int64()
+        assert table.schema.field("unit_price").type == pa.float64()
+        assert table.schema.field("expected_delivery_date").type == pa.timestamp("us")
+        assert table.schema.field("po_status").type == pa.string()
+    assert empty.num_rows == 0 and nulls.num_rows == 1
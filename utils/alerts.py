@@ -0,0 +1,355 @@
+import argparse
+import json
+import logging
+import os
+import threading
+import time
+import urllib.request
+
+import numpy as np
+import pandas as pd
+
+from utils.metrics import STOCKOUT_DAYS, TARGET_DOI, TARGET_LT, consumption_rate, safe_ratio
+
+logger = logging.getLogger(__name__)
+
+ALERT_RULES_PATH = "data/alert_rules.json"
+ALERT_LOG_PATH = "reports/alerts.jsonl"
+SUPPRESS_SECONDS = 24 * 3600   # repeat an active alert at most once per window
+CHECK_INTERVAL = 60            # seconds between checks without a new version
+
+# --------------------------------------------------
+# RULES
+# One row per rule. Rules are joined onto a long (entity, metric, value)
+# frame and compared in a single vectorized pass, so adding thousands of
+# user thresholds costs one merge, not one loop iteration each.
+#   entity: None = applies to every entity of the metric
+# --------------------------------------------------
+DEFAULT_RULES = [
+    {"rule_id": "overdue_open_po", "metric": "open_po_age_days", "op": ">",
+     "threshold": TARGET_LT, "severity": "medium", "entity": None},
+    {"rule_id": "stockout_risk", "metric": "days_to_stockout", "op": "<",
+     "threshold": TARGET_DOI, "severity": "medium", "entity": None},
+    {"rule_id": "imminent_stockout", "metric": "days_to_stockout", "op": "<",
+     "threshold": STOCKOUT_DAYS, "severity": "high", "entity": None},
+]
+
+OPS = {
+    ">": np.greater,
+    ">=": np.greater_equal,
+    "<": np.less,
+    "<=": np.less_equal,
+    "==": np.equal,
+}
+
+RULE_COLUMNS = ["rule_id", "metric", "op", "threshold", "severity", "entity"]
+
+
+def load_rules(path=ALERT_RULES_PATH):
+    """Built-in rules plus user thresholds from a JSON list (same keys)."""
+    rules = list(DEFAULT_RULES)
+    if path and os.path.exists(path):
+        with open(path, encoding="utf-8") as f:
+            rules += json.load(f)
+
+    df = pd.DataFrame(rules).reindex(columns=RULE_COLUMNS)
+    unknown = ~df["op"].isin(list(OPS))
+    if unknown.any():
+        raise ValueError(f"Unknown rule operator(s): {sorted(df.loc[unknown, 'op'].unique())}")
+    return df.astype({"threshold": "float64", "entity": "object"})
+
+
+# --------------------------------------------------
+# ENTITY METRICS (long format)
+# --------------------------------------------------
+def _long(entity_type, entity_id, name, metrics):
+    return pd.concat(
+        [
+            pd.DataFrame({
+                "entity_type": entity_type,
+                "entity_id": entity_id,
+                "name": name,
+                "metric": metric,
+                "value": np.asarray(values, dtype="float64"),
+            })
+            for metric, values in metrics.items()
+        ],
+        ignore_index=True,
+    )
+
+
+def po_metrics(snapshot, as_of, po_numbers=None):
+    """Age of the POs open as of `as_of`."""
+    index = snapshot.derived["open_po_index"]
+    keep = index.open_at(as_of)
+    if po_numbers is not None:
+        keep &= index.rows["po_number"].astype(str).isin(po_numbers).to_numpy()
+    rows = index.rows[keep]
+    age = pd.Timestamp(as_of).to_datetime64().astype("datetime64[D]").astype(np.int64) - index.po_day[keep]
+    return _long(
+        "po",
+        rows["po_number"].astype(str).to_numpy(),
+        (rows["supplier_name"].astype(str) + " / " + rows["material_name"].astype(str)).to_numpy(),
+        {"open_po_age_days": age},
+    )
+
+
+def material_metrics(snapshot, material_ids=None):
+    inv = snapshot.inv
+    if material_ids is not None:
+        inv = inv[inv["material_id"].astype(str).isin(material_ids)]
+    latest = inv.sort_values("date").drop_duplicates("material_id", keep="last")
+
+    soh = latest["stock_on_hand"].to_numpy(dtype="float64")
+    rate = consumption_rate(latest, snapshot.derived["demand_forecast"])
+    return _long(
+        "material",
+        latest["material_id"].astype(str).to_numpy(),
+        latest["material_name"].astype(str).to_numpy(),
+        {
+            "days_to_stockout": np.nan_to_num(safe_ratio(soh, rate), nan=np.inf),
+            "stock_on_hand": soh,
+            "safety_stock_gap": latest["safety_stock"].to_numpy(dtype="float64") - soh,
+        },
+    )
+
+
+def evaluate(metrics, rules):
+    """All (rule, entity) pairs that fire, in one vectorized pass."""
+    pairs = metrics.merge(rules, on="metric")
+    pairs = pairs[pairs["entity"].isna() | (pairs["entity"] == pairs["entity_id"])]
+
+    fired = np.zeros(len(pairs), dtype=bool)
+    value = pairs["value"].to_numpy()
+    threshold = pairs["threshold"].to_numpy()
+    op = pairs["op"].to_numpy()
+    for sym, fn in OPS.items():
+        sel = op == sym
+        if sel.any():
+            fired[sel] = fn(value[sel], threshold[sel])
+
+    return pairs.loc[fired, ["rule_id", "severity", "entity_type", "entity_id", "name",
+                             "metric", "value", "threshold"]].reset_index(drop=True)
+
+
+# --------------------------------------------------
+# CHANGE DETECTION
+# --------------------------------------------------
+def fingerprints(df, key):
+    """Order-independent hash of all rows per entity key."""
+    if df.empty:
+        return pd.Series(dtype="uint64")
+    h = pd.util.hash_pandas_object(df, index=False).to_numpy()
+    keys = df[key].astype(str).to_numpy()
+    uniq, codes = np.unique(keys, return_inverse=True)
+    out = np.zeros(len(uniq), dtype="uint64")
+    np.add.at(out, codes, h)  # wraps modulo 2**64
+    return pd.Series(out, index=uniq)
+
+
+def entity_prints(snapshot):
+    inv = fingerprints(snapshot.inv, "material_id")
+    cons = fingerprints(snapshot.cons, "material_id")
+    return {
+        "po": fingerprints(snapshot.derived["po_gr"], "po_number"),
+        "material": inv.add(cons, fill_value=0).astype("uint64"),
+    }
+
+
+def changed(old, new):
+    both = old.index.intersection(new.index)
+    diff = both[old[both].to_numpy() != new[both].to_numpy()]
+    return set(diff) | set(new.index.difference(old.index)) | set(old.index.difference(new.index))
+
+
+# --------------------------------------------------
+# SINKS
+# --------------------------------------------------
+class FileSink:
+    """Appends alerts as JSON lines."""
+
+    def __init__(self, path=ALERT_LOG_PATH):
+        self.path = path
+
+    def send(self, alerts):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as f:
+            for alert in alerts:
+                f.write(json.dumps(alert) + "\n")
+
+
+class WebhookSink:
+    """POSTs one JSON array per batch (e.g. a local webhook receiver)."""
+
+    def __init__(self, url, timeout=5):
+        self.url = url
+        self.timeout = timeout
+
+    def send(self, alerts):
+        req = urllib.request.Request(
+            self.url,
+            data=json.dumps(alerts).encode("utf-8"),
+            headers={"Content-Type": "application/json"},
+            method="POST",
+        )
+        with urllib.request.urlopen(req, timeout=self.timeout):
+            pass
+
+
+class LogSink:
+    def send(self, alerts):
+        for alert in alerts:
+            logger.warning("[%s] %s %s: %s=%.1f (threshold %s)", alert["severity"],
+                           alert["rule_id"], alert["name"], alert["metric"],
+                           alert["value"], alert["threshold"])
+
+
+# --------------------------------------------------
+# ENGINE
+# --------------------------------------------------
+class AlertEngine:
+    """
+    Evaluates the rules against a dataset version. After the first full
+    pass only entities whose rows changed since the previous version are
+    re-evaluated (plus a full pass when the calendar day changes, since PO
+    age moves with time). Active alerts are repeated at most once per
+    suppression window and are cleared when their condition resolves.
+    """
+
+    def __init__(self, rules=None, sinks=(), suppress_seconds=SUPPRESS_SECONDS):
+        self.rules = load_rules() if rules is None else rules
+        self.sinks = list(sinks)
+        self.suppress_seconds = suppress_seconds
+        self._prints = None
+        self._as_of = None
+        self._version = None
+        self._active = {}  # (rule_id, entity_type, entity_id) -> last sent (epoch s)
+
+    def scope(self, snapshot, as_of):
+        """Entity ids to re-evaluate per type; None = everything."""
+        prints = entity_prints(snapshot)
+        previous, self._prints = self._prints, prints
+        if previous is None or as_of != self._as_of:
+            return None
+        return {k: changed(previous[k], prints[k]) for k in prints}
+
+    def run(self, snapshot, now=None):
+        now = pd.Timestamp.now() if now is None else pd.Timestamp(now)
+        as_of = now.normalize()
+
+        if snapshot.version == self._version and as_of == self._as_of:
+            return []
+        scope = self.scope(snapshot, as_of)
+        self._version, self._as_of = snapshot.version, as_of
+
+        metrics = pd.concat([
+            po_metrics(snapshot, as_of, None if scope is None else scope["po"]),
+            material_metrics(snapshot, None if scope is None else scope["material"]),
+        ], ignore_index=True)
+
+        fired = evaluate(metrics, self.rules)
+        alerts = self._dedup(fired, metrics, scope, now.timestamp())
+
+        if alerts:
+            for sink in self.sinks:
+                try:
+                    sink.send(alerts)
+                except Exception:
+                    logger.exception("Alert sink %s failed", type(sink).__name__)
+        return alerts
+
+    def _dedup(self, fired, metrics, scope, now_s):
+        keys = list(zip(fired["rule_id"], fired["entity_type"], fired["entity_id"]))
+
+        # Resolve: re-evaluated entities whose alert no longer fires. That
+        # includes changed entities without metrics any more (e.g. a PO
+        # received since the last version is no longer open).
+        evaluated = set(zip(metrics["entity_type"], metrics["entity_id"]))
+        firing = set(keys)
+        for key in list(self._active):
+            in_scope = scope is None or key[1:] in evaluated or key[2] in scope.get(key[1], ())
+            if key not in firing and in_scope:
+                del self._active[key]
+
+        send = np.array([
+            now_s - self._active.get(key, -np.inf) >= self.suppress_seconds for key in keys
+        ], dtype=bool)
+        for key in np.array(keys, dtype=object)[send] if len(keys) else []:
+            self._active[tuple(key)] = now_s
+
+        out = fired[send].assign(
+            version=self._version,
+            as_of=self._as_of.strftime("%Y-%m-%d"),
+        )
+        return out.to_dict("records")
+
+
+class AlertDaemon:
+    """Runs the engine after each published dataset version (and daily)."""
+
+    def __init__(self, store, engine, interval=CHECK_INTERVAL):
+        self.store = store
+        self.engine = engine
+        self.interval = interval
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        store.subscribe(lambda previous, current: self._wake.set())
+
+    def _run(self):
+        while not self._stop.is_set():
+            # Clear before evaluating: a version published meanwhile wakes the next pass
+            self._wake.clear()
+            try:
+                self.engine.run(self.store.current())
+            except Exception:
+                logger.exception("Alert evaluation failed")
+            self._wake.wait(self.interval)
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="alert-daemon", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+
+
+def main():
+    from utils.data_loader import new_store
+
+    parser = argparse.ArgumentParser(description="Evaluate early-warning alerts after each data refresh.")
+    parser.add_argument("--tenant", default=None)
+    parser.add_argument("--rules", default=ALERT_RULES_PATH)
+    parser.add_argument("--out", default=ALERT_LOG_PATH)
+    parser.add_argument("--webhook", default=None)
+    parser.add_argument("--suppress-hours", type=float, default=SUPPRESS_SECONDS / 3600)
+    parser.add_argument("--once", action="store_true", help="evaluate once and exit")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+
+    sinks = [FileSink(args.out), LogSink()]
+    if args.webhook:
+        sinks.append(WebhookSink(args.webhook))
+    engine = AlertEngine(load_rules(args.rules), sinks, args.suppress_hours * 3600)
+
+    store = new_store(args.tenant)
+    if args.once:
+        alerts = engine.run(store.current())
+        print(f"{len(alerts)} alerts written to {args.out}")
+        return
+
+    AlertDaemon(store, engine).start()
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,419 @@
+import argparse
+import glob
+import logging
+import os
+
+import numpy as np
+import pandas as pd
+
+from utils import metrics
+from utils.metrics import (
+    ASSUMED_UNIT_REVENUE, IMPACT_RISK_WEIGHTS, INVENTORY_RISK_WEIGHTS,
+    STOCKOUT_DAYS, SUPPLIER_RISK_WEIGHTS,
+)
+
+logger = logging.getLogger(__name__)
+
+# --------------------------------------------------
+# Execution backends for the derived-metric stages of pages 1–5.
+# Both take and return pandas objects, so pages, figures and exports are
+# unchanged. The Polars backend builds each stage as one LazyFrame query
+# (optimized, multi-threaded) and converts the result back at the end.
+# Select with METRICS_BACKEND=pandas|polars; Polars is optional.
+# --------------------------------------------------
+BACKEND_ENV = "METRICS_BACKEND"
+DEFAULT_BACKEND = "pandas"
+
+STAGES = [
+    "spend_trend",
+    "executive_kpis",
+    "supplier_metrics",
+    "po_lead_time",
+    "lead_time_by",
+    "inventory_risk",
+    "production_impact",
+]
+
+
+class PandasBackend:
+    """Reference implementation: the eager functions in utils.metrics."""
+
+    name = "pandas"
+
+    def spend_trend(self, po_f):
+        return metrics.spend_trend(po_f)
+
+    def executive_kpis(self, po_f, po_gr, inv_f, n_po=None):
+        return metrics.executive_kpis(po_f, po_gr, inv_f, n_po)
+
+    def supplier_metrics(self, po_gr, po_counts=None):
+        return metrics.supplier_metrics(po_gr, po_counts)
+
+    def po_lead_time(self, po_gr):
+        return metrics.po_lead_time(po_gr)
+
+    def lead_time_by(self, po_gr, key, po_counts=None):
+        return metrics.lead_time_by(po_gr, key, po_counts)
+
+    def inventory_risk(self, inv_f, cons_f, forecast=None):
+        return metrics.inventory_risk(inv_f, cons_f, forecast)
+
+    def production_impact(self, prod_exposure, inv_f, forecast=None):
+        return metrics.production_impact(prod_exposure, inv_f, forecast)
+
+
+class PolarsBackend:
+    """Same stages as LazyFrame queries."""
+
+    name = "polars"
+
+    def __init__(self):
+        import polars as pl
+        self.pl = pl
+
+    # ---------- conversion ----------
+
+    def _lazy(self, df, columns=None):
+        pl = self.pl
+        df = df if columns is None else df[columns]
+        lf = pl.from_pandas(df.reset_index(drop=True)).lazy()
+        # Join keys as plain strings; categoricals of different frames do not mix
+        cats = [c for c in df.columns if isinstance(df[c].dtype, pd.CategoricalDtype)]
+        return lf.with_columns(pl.col(cats).cast(pl.String)) if cats else lf
+
+    def _forecast(self, forecast):
+        pl = self.pl
+        if forecast is None:
+            return pl.LazyFrame(schema={"material_id": pl.String, "forecast_daily": pl.Float64})
+        return pl.LazyFrame({
+            "material_id": forecast.index.astype(str).to_list(),
+            "forecast_daily": forecast["forecast_daily"].to_numpy(dtype="float64"),
+        })
+
+    def _rate(self, lf, forecast):
+        pl = self.pl
+        return (
+            lf.join(self._forecast(forecast), on="material_id", how="left", maintain_order="left")
+            .with_columns(
+                pl.col("forecast_daily").fill_null(pl.col("daily_consumption").cast(pl.Float64))
+            )
+        )
+
+    def _safe_ratio(self, num, den):
+        pl = self.pl
+        return pl.when(den > 0).then(num.cast(pl.Float64) / den).otherwise(None)
+
+    # ---------- stages ----------
+
+    def spend_trend(self, po_f):
+        pl = self.pl
+        return (
+            self._lazy(po_f, ["po_date", "spend"])
+            .group_by(month=pl.col("po_date").dt.strftime("%Y-%m"))
+            .agg(total_spend=pl.col("spend").sum())
+            .sort("month")
+            .collect()
+            .to_pandas()
+        )
+
+    def _with_counts(self, df, key, column, po_counts):
+        if po_counts is not None:
+            df[column] = df[key].astype(str).map(po_counts).fillna(0).astype("int64")
+        return df
+
+    def executive_kpis(self, po_f, po_gr, inv_f, n_po=None):
+        pl = self.pl
+        po = self._lazy(po_f, ["spend", "po_status"]).select(
+            total_spend=pl.col("spend").sum(),
+            open_po=(pl.col("po_status") == "Open").sum(),
+        )
+        on_time = pl.col("gr_date").is_not_null() & (
+            pl.col("gr_date") <= pl.col("expected_delivery_date")
+        ).fill_null(False)
+        otd = self._lazy(po_gr, ["po_number", "gr_date", "expected_delivery_date"]).select(
+            on_time=on_time.sum(),
+            n_po=pl.col("po_number").n_unique(),
+        )
+        inv = self._lazy(inv_f, ["stock_on_hand", "safety_stock"]).select(
+            materials_below_ss=(pl.col("stock_on_hand") < pl.col("safety_stock")).sum()
+        )
+
+        p, o, i = pl.collect_all([po, otd, inv])
+        if n_po is None:
+            n_po = o["n_po"][0]
+        return {
+            "total_spend": float(p["total_spend"][0] or 0),
+            "open_po": int(p["open_po"][0]),
+            "otd_rate": float(o["on_time"][0] / n_po) if n_po > 0 else 0.0,
+            "materials_below_ss": int(i["materials_below_ss"][0]),
+        }
+
+    def supplier_metrics(self, po_gr, po_counts=None):
+        pl = self.pl
+        w_late, w_rejection, w_lead_time = SUPPLIER_RISK_WEIGHTS
+        cols = ["supplier_name", "po_number", "spend", "po_date", "gr_date",
+                "expected_delivery_date", "rejected_qty", "received_qty", "ordered_qty"]
+        grouped = (
+            self._lazy(po_gr, cols)
+            .group_by("supplier_name")
+            .agg(
+                total_po=pl.col("po_number").n_unique(),
+                total_spend=pl.col("spend").sum(),
+                avg_lead_time=(pl.col("gr_date") - pl.col("po_date")).dt.total_days().mean(),
+                late_delivery_rate=(
+                    pl.col("gr_date") > pl.col("expected_delivery_date")
+                ).fill_null(False).mean(),
+                rejected=pl.col("rejected_qty").cast(pl.Float64).sum(),
+                received=pl.col("received_qty").cast(pl.Float64).sum(),
+                ordered=pl.col("ordered_qty").cast(pl.Float64).sum(),
+            )
+        )
+        out = (
+            grouped.with_columns(
+                rejection_rate=pl.when(pl.col("received") > 0)
+                .then(pl.col("rejected") / pl.col("received")).otherwise(0.0),
+                fill_rate=self._safe_ratio(pl.col("received"), pl.col("ordered")),
+                dependency=pl.col("total_spend") / pl.col("total_spend").sum(),
+            )
+            .with_columns(
+                risk_score=pl.col("late_delivery_rate") * w_late
+                + pl.col("rejection_rate") * w_rejection
+                + (pl.col("avg_lead_time") / pl.col("avg_lead_time").max()) * w_lead_time
+            )
+            .select(
+                "supplier_name", "total_po", "total_spend", "avg_lead_time",
+                "late_delivery_rate", "rejection_rate", "fill_rate", "dependency", "risk_score",
+            )
+            .sort("supplier_name")
+            .collect()
+            .to_pandas()
+        )
+        return self._with_counts(out, "supplier_name", "total_po", po_counts)
+
+    def po_lead_time(self, po_gr):
+        pl = self.pl
+        out = (
+            self._lazy(po_gr)
+            .with_columns(
+                actual_lead_time=(pl.col("gr_date") - pl.col("po_date")).dt.total_days(),
+                late_flag=pl.col("gr_date").is_not_null()
+                & (pl.col("gr_date") > pl.col("expected_delivery_date")).fill_null(False),
+            )
+            .collect()
+            .to_pandas()
+        )
+        return out.astype({c: po_gr[c].dtype for c in po_gr.columns})
+
+    def lead_time_by(self, po_gr, key, po_counts=None):
+        pl = self.pl
+        out = (
+            self._lazy(po_gr, [key, "actual_lead_time", "late_flag", "po_number"])
+            .group_by(key)
+            .agg(
+                avg_lead_time=pl.col("actual_lead_time").mean(),
+                late_rate=pl.col("late_flag").mean(),
+                po_count=pl.col("po_number").n_unique(),
+            )
+            .sort(key)
+            .collect()
+            .to_pandas()
+        )
+        return self._with_counts(out, key, "po_count", po_counts)
+
+    def inventory_risk(self, inv_f, cons_f, forecast=None):
+        pl = self.pl
+        volatility = (
+            self._lazy(cons_f, ["material_id", "consumed_qty"])
+            .group_by("material_id")
+            .agg(consumption_volatility=pl.col("consumed_qty").cast(pl.Float64).std())
+        )
+        doi = self._safe_ratio(pl.col("stock_on_hand"), pl.col("daily_consumption"))
+        vol_max = pl.col("consumption_volatility").max()
+        w_coverage, w_volatility = INVENTORY_RISK_WEIGHTS
+
+        out = (
+            self._rate(self._lazy(inv_f), forecast)
+            .join(volatility, on="material_id", how="left", maintain_order="left")
+            .with_columns(
+                pl.col("consumption_volatility").fill_null(0.0).fill_nan(0.0),
+                days_of_inventory=doi,
+                days_to_stockout=self._safe_ratio(pl.col("stock_on_hand"), pl.col("forecast_daily")),
+            )
+            .with_columns(
+                inventory_risk_score=(
+                    (1 - pl.col("days_of_inventory") / pl.col("days_of_inventory").max()) * w_coverage
+                    + pl.when(vol_max > 0)
+                    .then(pl.col("consumption_volatility") / vol_max).otherwise(0.0) * w_volatility
+                ).fill_null(0.0),
+            )
+            .with_columns(
+                pl.col("days_of_inventory", "days_to_stockout").fill_null(float("inf")),
+            )
+            .with_columns(
+                pl.col(
+                    "days_of_inventory", "consumption_volatility", "forecast_daily",
+                    "days_to_stockout", "inventory_risk_score",
+                ).cast(pl.Float32)
+            )
+            .select(
+                *inv_f.columns,
+                "days_of_inventory", "forecast_daily", "days_to_stockout",
+                "consumption_volatility", "inventory_risk_score",
+            )
+            .collect()
+            .to_pandas()
+        )
+        return out.astype({c: inv_f[c].dtype for c in inv_f.columns})
+
+    def production_impact(self, prod_exposure, inv_f, forecast=None):
+        pl = self.pl
+        inv = self._lazy(inv_f, ["material_id", "material_name", "stock_on_hand", "daily_consumption"])
+        dts = pl.col("days_to_stockout")
+        consumed = pl.col("consumed_qty").cast(pl.Float64)
+        loss = pl.col("production_loss_units")
+        w_stockout, w_loss = IMPACT_RISK_WEIGHTS
+
+        out = (
+            self._lazy(prod_exposure)
+            .join(inv, on=["material_id", "material_name"], how="left", maintain_order="left")
+            .pipe(self._rate, forecast)
+            .with_columns(days_to_stockout=self._safe_ratio(pl.col("stock_on_hand"), pl.col("forecast_daily")))
+            .with_columns(
+                production_loss_units=pl.when(dts < STOCKOUT_DAYS).then(consumed).otherwise(consumed * 0.3)
+            )
+            .with_columns(
+                estimated_revenue_loss=loss * ASSUMED_UNIT_REVENUE,
+                impact_risk_score=pl.when(dts > 0).then(1 / dts).otherwise(0.0) * w_stockout
+                + pl.when(loss.max() > 0).then(loss / loss.max()).otherwise(0.0) * w_loss,
+            )
+            .select(
+                *prod_exposure.columns, "stock_on_hand", "daily_consumption", "forecast_daily",
+                "days_to_stockout", "production_loss_units", "estimated_revenue_loss",
+                "impact_risk_score",
+            )
+            .collect()
+            .to_pandas()
+        )
+        return out.astype({c: prod_exposure[c].dtype for c in prod_exposure.columns})
+
+
+BACKENDS = {"pandas": PandasBackend, "polars": PolarsBackend}
+_instances = {}
+
+
+class BackendUnavailable(ImportError):
+    """The requested backend's library is not installed."""
+
+
+def get_backend(name=None):
+    """Backend by name or METRICS_BACKEND; never substitutes another backend."""
+    name = (name or os.environ.get(BACKEND_ENV) or DEFAULT_BACKEND).lower()
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown metrics backend {name!r}; expected one of {sorted(BACKENDS)}")
+    if name not in _instances:
+        try:
+            _instances[name] = BACKENDS[name]()
+        except ImportError as exc:
+            raise BackendUnavailable(f"Metrics backend {name!r} is not installed: {exc}") from exc
+    return _instances[name]
+
+
+# --------------------------------------------------
+# PARITY CHECK
+# --------------------------------------------------
+def _canonical(df):
+    df = df.reset_index(drop=True)
+    df = df.astype({c: str for c in df.columns if isinstance(df[c].dtype, pd.CategoricalDtype)})
+    return df.sort_values(list(df.columns)).reset_index(drop=True)
+
+
+def same_result(a, b, rtol=1e-5):
+    """Stage outputs equal up to row order, dtype and `rtol`."""
+    if isinstance(a, dict):
+        return a.keys() == b.keys() and all(
+            np.isclose(a[k], b[k], rtol=rtol, equal_nan=True) for k in a
+        )
+    try:
+        pd.testing.assert_frame_equal(
+            _canonical(a), _canonical(b), check_dtype=False, rtol=rtol
+        )
+        return True
+    except AssertionError as exc:
+        logger.info("%s", exc)
+        return False
+
+
+def load_stage_data(path):
+    """(po, inv, cons, derived) of one workbook, as the pages see them."""
+    from utils.data_loader import build_derived, prepare_tables, read_workbook
+
+    po, gr, inv, cons = prepare_tables(*read_workbook(path))
+    return po, inv, cons, build_derived(po, gr, inv, cons)
+
+
+def stage_inputs(data, supplier_filter=None, material_filter=None):
+    """Inputs of every stage for `load_stage_data` output, optionally filtered like the pages."""
+    po, inv, cons, derived = data
+    po = metrics.filter_po(po, supplier_filter, material_filter)
+    po_gr = metrics.filter_po(derived["po_gr"], supplier_filter, material_filter)
+    if material_filter is not None:
+        inv = metrics.filter_by_material(inv, material_filter)
+        cons = metrics.filter_by_material(cons, material_filter)
+    lt = metrics.po_lead_time(po_gr)
+    forecast = derived["demand_forecast"]
+    exposure = derived["exposure_graph"].exposure(material_filter)
+    return {
+        "spend_trend": (po,),
+        "executive_kpis": (po, po_gr, inv),
+        "supplier_metrics": (po_gr,),
+        "po_lead_time": (po_gr,),
+        "lead_time_by": (lt, "supplier_name"),
+        "inventory_risk": (inv, cons, forecast),
+        "production_impact": (exposure, inv, forecast),
+    }
+
+
+def parity_check(paths=None, other="polars", rtol=1e-5):
+    """
+    Run every stage on pandas and `other`; returns (workbook, stage, ok) rows.
+    Raises BackendUnavailable when `other` is not installed.
+    """
+    paths = paths or sorted(glob.glob("data/*.xlsx"))
+    reference, candidate = get_backend("pandas"), get_backend(other)
+    if candidate is reference:
+        raise ValueError("Parity check needs a backend other than pandas")
+    rows = []
+    for path in paths:
+        try:
+            inputs = stage_inputs(load_stage_data(path))
+        except KeyError as exc:
+            # Older workbook layouts (ids only, no names) are not loadable by the pages
+            logger.info("Skipping %s: missing column %s", path, exc)
+            continue
+        for stage in STAGES:
+            args = inputs[stage]
+            ok = same_result(getattr(reference, stage)(*args), getattr(candidate, stage)(*args), rtol)
+            rows.append({"workbook": os.path.basename(path), "stage": stage, "ok": ok})
+    return pd.DataFrame(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check metric backend parity on the bundled workbooks.")
+    parser.add_argument("paths", nargs="*")
+    parser.add_argument("--backend", default="polars")
+    parser.add_argument("--rtol", type=float, default=1e-5)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+
+    try:
+        result = parity_check(args.paths or None, args.backend, args.rtol)
+    except BackendUnavailable as exc:
+        print(f"SKIPPED: {exc}")
+        raise SystemExit(2)
+    print(result.to_string(index=False))
+    raise SystemExit(0 if result["ok"].all() else 1)
+
+
+if __name__ == "__main__":
+    main()
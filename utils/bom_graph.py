@@ -0,0 +1,186 @@
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from utils.metrics import ASSUMED_UNIT_REVENUE
+
+# --------------------------------------------------
+# Supplier -> material -> product exposure graph.
+# Two CSR adjacency blocks built once per dataset version:
+#   supplier -> material  (weights: spend)
+#   material -> product   (weights: consumed qty, revenue)
+# Propagation queries are array slices + bincount, no joins.
+# --------------------------------------------------
+
+
+def _csr(rows, cols, n_rows, *weights):
+    order = np.lexsort((cols, rows))
+    rows, cols = rows[order], cols[order]
+    indptr = np.searchsorted(rows, np.arange(n_rows + 1)).astype(np.int32)
+    return (indptr, cols.astype(np.int32)) + tuple(w[order] for w in weights)
+
+
+def _gather(indptr, rows):
+    """Edge positions of all `rows` plus the position of their owning row."""
+    starts = indptr[rows]
+    counts = indptr[rows + 1] - starts
+    owner = np.repeat(np.arange(len(rows)), counts)
+    offset = np.repeat(starts - np.cumsum(counts) + counts, counts)
+    return offset + np.arange(counts.sum()), owner
+
+
+@dataclass(frozen=True)
+class ExposureGraph:
+    suppliers: pd.Index
+    material_ids: pd.Index
+    material_names: np.ndarray
+    product_ids: pd.Index
+    product_names: np.ndarray
+
+    # supplier -> material
+    sm_indptr: np.ndarray
+    sm_indices: np.ndarray
+    sm_spend: np.ndarray
+
+    # material -> product
+    mp_indptr: np.ndarray
+    mp_indices: np.ndarray
+    mp_consumed: np.ndarray
+    mp_revenue: np.ndarray
+
+    # total spend per material, used to turn supplier spend into a share
+    material_spend: np.ndarray
+
+    def products_for_material(self, material_id):
+        """Products consuming `material_id`: one CSR row slice."""
+        m = self.material_ids.get_loc(material_id)
+        lo, hi = self.mp_indptr[m], self.mp_indptr[m + 1]
+        p = self.mp_indices[lo:hi]
+        return pd.DataFrame({
+            "product_id": self.product_ids[p],
+            "product_name": self.product_names[p],
+            "consumed_qty": self.mp_consumed[lo:hi],
+            "revenue_exposure": self.mp_revenue[lo:hi],
+        })
+
+    def propagate_supplier(self, supplier):
+        """
+        Per-product (consumed qty, revenue) hit if `supplier` is late. Each
+        material's exposure is weighted by the supplier's share of its spend.
+        """
+        s = self.suppliers.get_loc(supplier)
+        lo, hi = self.sm_indptr[s], self.sm_indptr[s + 1]
+        mats = self.sm_indices[lo:hi]
+        share = np.divide(
+            self.sm_spend[lo:hi], self.material_spend[mats],
+            out=np.zeros(hi - lo), where=self.material_spend[mats] > 0
+        )
+
+        pos, owner = _gather(self.mp_indptr, mats)
+        n = len(self.product_ids)
+        products = self.mp_indices[pos]
+        consumed = np.bincount(products, self.mp_consumed[pos] * share[owner], minlength=n)
+        revenue = np.bincount(products, self.mp_revenue[pos] * share[owner], minlength=n)
+        return consumed, revenue
+
+    def supplier_delay_impact(self, supplier):
+        consumed, revenue = self.propagate_supplier(supplier)
+        hit = np.flatnonzero(revenue > 0)
+        return pd.DataFrame({
+            "product_id": self.product_ids[hit],
+            "product_name": self.product_names[hit],
+            "consumed_qty_at_risk": consumed[hit],
+            "revenue_at_risk": revenue[hit],
+        }).sort_values("revenue_at_risk", ascending=False, ignore_index=True)
+
+    def exposure(self, material_filter=None, product_filter=None):
+        """Material x product edge list (feeds the impact matrix)."""
+        owner = np.repeat(
+            np.arange(len(self.material_ids)), np.diff(self.mp_indptr)
+        )
+        products = self.mp_indices
+
+        mask = np.ones(len(products), dtype=bool)
+        if material_filter is not None:
+            mask &= np.isin(self.material_names, list(material_filter))[owner]
+        if product_filter is not None:
+            mask &= np.isin(self.product_names, list(product_filter))[products]
+
+        return pd.DataFrame({
+            "material_id": self.material_ids[owner[mask]],
+            "material_name": self.material_names[owner[mask]],
+            "product_id": self.product_ids[products[mask]],
+            "product_name": self.product_names[products[mask]],
+            "consumed_qty": self.mp_consumed[mask],
+        })
+
+
+def build_exposure_graph(po, cons):
+    material_ids = pd.Index(
+        np.union1d(po["material_id"].astype(str), cons["material_id"].astype(str))
+    )
+    names = pd.concat([
+        cons[["material_id", "material_name"]],
+        po[["material_id", "material_name"]],
+    ]).astype(str).drop_duplicates("material_id").set_index("material_id")["material_name"]
+    material_names = names.reindex(material_ids).to_numpy(dtype=object)
+
+    suppliers = pd.Index(np.unique(po["supplier_name"].astype(str)))
+
+    products = (
+        cons[["product_id", "product_name"]].astype(str)
+        .drop_duplicates("product_id")
+        .sort_values("product_id")
+    )
+    product_ids = pd.Index(products["product_id"])
+    product_names = products["product_name"].to_numpy(dtype=object)
+
+    # supplier -> material (spend)
+    sm = (
+        pd.DataFrame({
+            "s": suppliers.get_indexer(po["supplier_name"].astype(str)),
+            "m": material_ids.get_indexer(po["material_id"].astype(str)),
+            "spend": po["spend"].to_numpy(dtype="float64"),
+        })
+        .groupby(["s", "m"], sort=False)["spend"].sum()
+        .reset_index()
+    )
+    sm_indptr, sm_indices, sm_spend = _csr(
+        sm["s"].to_numpy(), sm["m"].to_numpy(), len(suppliers),
+        sm["spend"].to_numpy()
+    )
+    material_spend = np.bincount(
+        sm["m"].to_numpy(), sm["spend"].to_numpy(), minlength=len(material_ids)
+    )
+
+    # material -> product (consumption, revenue)
+    mp = (
+        pd.DataFrame({
+            "m": material_ids.get_indexer(cons["material_id"].astype(str)),
+            "p": product_ids.get_indexer(cons["product_id"].astype(str)),
+            "qty": cons["consumed_qty"].to_numpy(dtype="float64"),
+        })
+        .groupby(["m", "p"], sort=False)["qty"].sum()
+        .reset_index()
+    )
+    mp_indptr, mp_indices, mp_consumed = _csr(
+        mp["m"].to_numpy(), mp["p"].to_numpy(), len(material_ids),
+        mp["qty"].to_numpy()
+    )
+
+    return ExposureGraph(
+        suppliers=suppliers,
+        material_ids=material_ids,
+        material_names=material_names,
+        product_ids=product_ids,
+        product_names=product_names,
+        sm_indptr=sm_indptr,
+        sm_indices=sm_indices,
+        sm_spend=sm_spend,
+        mp_indptr=mp_indptr,
+        mp_indices=mp_indices,
+        mp_consumed=mp_consumed,
+        mp_revenue=mp_consumed * ASSUMED_UNIT_REVENUE,
+        material_spend=material_spend,
+    )
@@ -1,13 +1,205 @@
+import functools
+import os
+
+import numpy as np
 import pandas as pd
 import streamlit as st
 
-@st.cache_data
-def load_data():
-    file_path = "data/FMCG_Purchasing_Dataset.xlsx"
+from utils.bom_graph import build_exposure_graph
+from utils.forecast import forecast_demand
+from utils.metrics import consolidate_gr, inventory_risk, join_po_gr, production_impact
+from utils.partitions import catalog_path, list_tenants, partition_stamp, read_partitions
+from utils.po_aging import OpenPOIndex
+from utils.po_sketch import POSketchIndex
+from utils.price_index import PriceHistoryIndex
+from utils.refresh import DatasetStore
+from utils.replenishment import replenishment_inputs
+from utils.risk_scoring import RiskComponentCache
+from utils.snapshots import content_hash, kpi_aggregates, record_snapshot_async
+from utils.sql_source import DATABASE_URL_ENV, source_for, sql_stamp
+
+DATA_PATH = "data/FMCG_Purchasing_Dataset.xlsx"
+
+# Text columns with fewer distinct values than this share of rows
+# are stored as category (supplier, material, product, status, ...)
+CATEGORY_RATIO = 0.5
+
+# Money stays float64: totals over many rows would drift in float32
+MONEY_COLUMNS = ("unit_price", "spend")
+
 
+def downcast(df):
+    """
+    Shrink dtypes in place: int -> int32, float -> float32 when every value
+    round-trips exactly (money columns never), low-cardinality text -> category.
+    """
+    df.attrs["raw_bytes"] = int(df.memory_usage(deep=True).sum())
+
+    for col in df.columns:
+        s = df[col]
+        if pd.api.types.is_bool_dtype(s) or pd.api.types.is_datetime64_any_dtype(s):
+            continue
+        if pd.api.types.is_integer_dtype(s):
+            info = np.iinfo(np.int32)
+            if s.empty or (s.min() >= info.min and s.max() <= info.max):
+                df[col] = s.astype("int32")
+        elif pd.api.types.is_float_dtype(s):
+            if col in MONEY_COLUMNS:
+                continue
+            s32 = s.astype("float32")
+            if np.array_equal(s32.to_numpy("float64"), s.to_numpy("float64"), equal_nan=True):
+                df[col] = s32
+        elif len(s) and s.nunique() / len(s) < CATEGORY_RATIO:
+            df[col] = s.astype("category")
+
+    return df
+
+
+def read_workbook(file_path=DATA_PATH):
     po = pd.read_excel(file_path, sheet_name="Purchase_Order", parse_dates=["po_date","expected_delivery_date"])
     gr = pd.read_excel(file_path, sheet_name="Goods_Receipt", parse_dates=["gr_date"])
     inv = pd.read_excel(file_path, sheet_name="Inventory", parse_dates=["date"])
     cons = pd.read_excel(file_path, sheet_name="Material_Consumption", parse_dates=["production_date"])
 
     return po, gr, inv, cons
+
+
+def prepare_tables(po, gr, inv, cons):
+    # Spend from the source precision, before any downcast
+    po["spend"] = po["ordered_qty"].astype("float64") * po["unit_price"].astype("float64")
+
+    po, gr, inv, cons = (downcast(df) for df in (po, gr, inv, cons))
+
+    return po, gr, inv, cons
+
+
+def build_derived(po, gr, inv, cons):
+    """Filter-independent tables shared by all sessions of one dataset version."""
+    gr_po = consolidate_gr(gr)
+    po_gr = join_po_gr(po, gr_po)
+    graph = build_exposure_graph(po, cons)
+    forecast = forecast_demand(cons)
+    # Unfiltered page frames, built once for the version's KPI aggregates
+    inv_risk = inventory_risk(inv, cons, forecast)
+    impact = production_impact(graph.exposure(), inv, forecast)
+    return {
+        "gr_po": gr_po,
+        "po_gr": po_gr,
+        "open_po_index": OpenPOIndex(po_gr),
+        "po_sketches": POSketchIndex(po_gr),
+        "price_index": PriceHistoryIndex(po),
+        "exposure_graph": graph,
+        "replenishment_inputs": replenishment_inputs(cons, po_gr, inv),
+        "demand_forecast": forecast,
+        "inventory_risk": inv_risk,
+        "production_impact": impact,
+        "risk_components": RiskComponentCache(),
+        "kpi_aggregates": kpi_aggregates(po_gr, inv_risk, impact),
+        "content_hash": content_hash(po, gr, inv, cons),
+    }
+
+
+def build_dataset(file_path=DATA_PATH):
+    po, gr, inv, cons = prepare_tables(*read_workbook(file_path))
+    return po, gr, inv, cons, build_derived(po, gr, inv, cons)
+
+
+def build_tenant_dataset(catalog_file, plant):
+    root = os.path.dirname(catalog_file)
+    po, gr, inv, cons = prepare_tables(*read_partitions(plant, root=root))
+    return po, gr, inv, cons, build_derived(po, gr, inv, cons)
+
+
+def build_sql_dataset(url):
+    # Incremental pull: only rows since the stored watermarks hit the database
+    po, gr, inv, cons = prepare_tables(*source_for(url).pull())
+    return po, gr, inv, cons, build_derived(po, gr, inv, cons)
+
+
+def new_store(tenant=None):
+    # One store (and refresher) per tenant, so plants never load each other's data
+    if tenant is None and os.environ.get(DATABASE_URL_ENV):
+        store = DatasetStore(
+            build_sql_dataset, os.environ[DATABASE_URL_ENV], stamp=sql_stamp
+        )
+    elif tenant is None:
+        store = DatasetStore(build_dataset, DATA_PATH)
+    else:
+        store = DatasetStore(
+            functools.partial(build_tenant_dataset, plant=tenant),
+            catalog_path(),
+            # Only this plant's partitions: other plants' writes touch the
+            # shared catalog but must not rebuild this tenant
+            stamp=functools.partial(partition_stamp, plant=tenant),
+        )
+
+    # Every published version is kept as a snapshot for period comparisons,
+    # written in the background so the first page load does not wait for it
+    record_snapshot_async(store.current(), tenant)
+    store.subscribe(lambda previous, current: record_snapshot_async(current, tenant))
+    return store.start()
+
+
+@st.cache_resource
+def get_store(tenant=None):
+    return new_store(tenant)
+
+
+def select_tenant():
+    """Sidebar plant selector; None when no partitioned dataset exists."""
+    tenants = list_tenants()
+    if not tenants:
+        return None
+
+    plants = [t["plant"] for t in tenants]
+    labels = {t["plant"]: f"{t['plant']} ({t['business_unit']})" for t in tenants}
+    current = st.session_state.get("tenant")
+
+    tenant = st.sidebar.selectbox(
+        "Plant / Business Unit",
+        options=plants,
+        index=plants.index(current) if current in plants else 0,
+        format_func=labels.get
+    )
+    st.session_state["tenant"] = tenant
+    return tenant
+
+
+def load_snapshot(tenant=None):
+    """Current dataset version; read it once per rerun for a consistent view."""
+    return get_store(tenant).current()
+
+
+def load_data(tenant=None):
+    return load_snapshot(tenant).tables
+
+
+def memory_report(po, gr, inv, cons):
+    """Per-table memory footprint before and after downcasting (MB)."""
+    rows = []
+    for name, df in [
+        ("Purchase_Order", po),
+        ("Goods_Receipt", gr),
+        ("Inventory", inv),
+        ("Material_Consumption", cons),
+    ]:
+        current = int(df.memory_usage(deep=True).sum())
+        raw = df.attrs.get("raw_bytes", current)
+        rows.append({
+            "table": name,
+            "rows": len(df),
+            "raw_mb": raw / 1e6,
+            "current_mb": current / 1e6,
+            "reduction": raw / current if current else 1.0,
+        })
+
+    report = pd.DataFrame(rows)
+    total = {
+        "table": "Total",
+        "rows": report["rows"].sum(),
+        "raw_mb": report["raw_mb"].sum(),
+        "current_mb": report["current_mb"].sum(),
+    }
+    total["reduction"] = total["raw_mb"] / total["current_mb"] if total["current_mb"] else 1.0
+
+    return pd.concat([report, pd.DataFrame([total])], ignore_index=True)
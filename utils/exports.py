@@ -0,0 +1,107 @@
+import io
+import tempfile
+
+import streamlit as st
+
+# --------------------------------------------------
+# Chunked export of filtered frames / ranked tables.
+# Output is only built when the button is clicked, on Streamlit's
+# download thread, and is written chunk by chunk into an unnamed temp
+# file on disk. The download button gets the open file handle and reads
+# it once into its media store; besides that copy, peak memory is one
+# chunk plus the write buffer.
+# --------------------------------------------------
+CHUNK_ROWS = 50_000
+WRITE_BUFFER_BYTES = 1024 * 1024
+XLSX_MAX_ROWS = 1_048_575  # per sheet, excluding header
+
+FORMATS = {
+    "CSV": ("csv", "text/csv"),
+    "Parquet": ("parquet", "application/vnd.apache.parquet"),
+    "XLSX": ("xlsx", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"),
+}
+
+
+def iter_chunks(df, chunk_rows=CHUNK_ROWS):
+    for start in range(0, len(df), chunk_rows):
+        yield df.iloc[start:start + chunk_rows]
+
+
+def write_csv(df, f, chunk_rows=CHUNK_ROWS):
+    f.write(",".join(map(str, df.columns)).encode("utf-8") + b"\n")
+    for chunk in iter_chunks(df, chunk_rows):
+        f.write(chunk.to_csv(index=False, header=False).encode("utf-8"))
+
+
+def write_parquet(df, f, chunk_rows=CHUNK_ROWS):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.Schema.from_pandas(df.iloc[:0], preserve_index=False)
+    with pq.ParquetWriter(f, schema) as writer:
+        for chunk in iter_chunks(df, chunk_rows):
+            writer.write_table(pa.Table.from_pandas(chunk, schema=schema, preserve_index=False))
+
+
+def write_xlsx(df, f, chunk_rows=CHUNK_ROWS):
+    from openpyxl import Workbook
+
+    # write_only mode streams rows to disk instead of keeping a cell tree
+    wb = Workbook(write_only=True)
+    header = [str(c) for c in df.columns]
+    ws, rows_in_sheet, sheet_no = None, XLSX_MAX_ROWS, 0
+
+    for chunk in iter_chunks(df, chunk_rows):
+        values = chunk.astype(object).where(chunk.notna(), None)
+        for row in values.itertuples(index=False, name=None):
+            if rows_in_sheet >= XLSX_MAX_ROWS:
+                sheet_no += 1
+                ws = wb.create_sheet(f"data_{sheet_no}")
+                ws.append(header)
+                rows_in_sheet = 0
+            ws.append(row)
+            rows_in_sheet += 1
+
+    if ws is None:
+        wb.create_sheet("data_1").append(header)
+    wb.save(f)
+
+
+WRITERS = {"CSV": write_csv, "Parquet": write_parquet, "XLSX": write_xlsx}
+
+
+def export(df, fmt):
+    """Encoded file as an open binary handle (unbuffered, at position 0)."""
+    raw = tempfile.TemporaryFile(buffering=0)
+    f = io.BufferedWriter(raw, WRITE_BUFFER_BYTES)
+    try:
+        WRITERS[fmt](df, f)
+        f.flush()
+    except BaseException:
+        raw.close()
+        raise
+    # Keep the file open: detach the buffer so closing it does not close `raw`
+    f.detach()
+    raw.seek(0)
+    return raw
+
+
+def download_section(tables):
+    """Download buttons for {label: (frame, file stem)}; files are built on click."""
+    st.subheader("Download Data")
+
+    fmt = st.radio(
+        "Format", list(FORMATS), horizontal=True, key="export_format"
+    )
+    ext, mime = FORMATS[fmt]
+
+    cols = st.columns(len(tables))
+    for col, (label, (df, stem)) in zip(cols, tables.items()):
+        col.download_button(
+            f"{label} ({len(df):,} rows)",
+            data=lambda df=df: export(df, fmt),
+            file_name=f"{stem}.{ext}",
+            mime=mime,
+            on_click="ignore",
+            key=f"export_{stem}",
+        )
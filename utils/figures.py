@@ -0,0 +1,80 @@
+import plotly.express as px
+
+# --------------------------------------------------
+# Plotly figures shared by the pages and the batch report export
+# --------------------------------------------------
+
+
+def spend_trend_fig(trend):
+    return px.line(
+        trend,
+        x="month",
+        y="total_spend",
+        markers=True
+    )
+
+
+def ppv_trend_fig(ppv_month):
+    return px.bar(
+        ppv_month,
+        x="month",
+        y="ppv",
+        hover_data=["ppv_rate", "price_anomalies"],
+        title="Purchase Price Variance per Month"
+    )
+
+
+def supplier_segmentation_fig(supplier_df):
+    return px.scatter(
+        supplier_df,
+        x="dependency",
+        y="risk_score",
+        size="total_spend",
+        color="segment",
+        hover_data=["supplier_name"],
+        title="Supplier Segmentation Matrix"
+    )
+
+
+def aging_fig(aging_dist):
+    return px.bar(
+        aging_dist,
+        x="aging_bucket",
+        y="po_count",
+        title="Open PO Aging Bucket"
+    )
+
+
+def supplier_lead_time_fig(supplier_lt):
+    return px.scatter(
+        supplier_lt,
+        x="avg_lead_time",
+        y="late_rate",
+        size="po_count",
+        color="supplier_name",
+        title="Supplier Lead Time vs Late Rate"
+    )
+
+
+def inventory_health_fig(inv_risk):
+    return px.scatter(
+        inv_risk,
+        x="days_of_inventory",
+        y="consumption_volatility",
+        size="stock_on_hand",
+        color="inventory_risk_score",
+        hover_data=["material_name"],
+        title="Inventory Health Matrix (Coverage vs Volatility)"
+    )
+
+
+def production_exposure_fig(impact_df):
+    return px.scatter(
+        impact_df,
+        x="days_to_stockout",
+        y="production_loss_units",
+        size="estimated_revenue_loss",
+        color="material_name",
+        hover_data=["product_name"],
+        title="Production Exposure Matrix"
+    )
@@ -0,0 +1,309 @@
+import argparse
+import asyncio
+import json
+import logging
+import math
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs, urlsplit
+
+from utils.metrics import (
+    classify_suppliers,
+    filter_by_material,
+    filter_po,
+    inventory_actions,
+    inventory_kpis,
+    inventory_ranking,
+    inventory_risk,
+    production_actions,
+    production_impact,
+    production_kpis,
+    production_ranking,
+    supplier_actions,
+    supplier_kpis,
+    supplier_metrics,
+    supplier_ranking,
+)
+from utils.partitions import list_tenants
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PORT = 8765
+CACHE_SIZE = 512
+
+# --------------------------------------------------
+# PAYLOAD BUILDERS (same computation layer as the pages)
+# --------------------------------------------------
+
+
+def supplier_performance(snapshot, f):
+    po_gr = filter_po(snapshot.derived["po_gr"], f.get("supplier"), f.get("material"))
+    supplier_df = supplier_metrics(po_gr)
+    supplier_df["segment"] = classify_suppliers(supplier_df)
+    return supplier_kpis(supplier_df), {
+        "ranking": supplier_ranking(supplier_df),
+        "actions": supplier_actions(supplier_df),
+    }
+
+
+def inventory_risk_report(snapshot, f):
+    inv, cons = snapshot.inv, snapshot.cons
+    if f.get("material") is not None:
+        inv = filter_by_material(inv, f["material"])
+        cons = filter_by_material(cons, f["material"])
+    inv_risk = inventory_risk(inv, cons, snapshot.derived["demand_forecast"])
+    return inventory_kpis(inv_risk), {
+        "ranking": inventory_ranking(inv_risk),
+        "actions": inventory_actions(inv_risk),
+    }
+
+
+def production_impact_report(snapshot, f):
+    graph = snapshot.derived["exposure_graph"]
+    inv = snapshot.inv
+    if f.get("material") is not None:
+        inv = filter_by_material(inv, f["material"])
+    impact_df = production_impact(
+        graph.exposure(f.get("material"), f.get("product")), inv, snapshot.derived["demand_forecast"]
+    )
+    return production_kpis(impact_df), {
+        "ranking": production_ranking(impact_df),
+        "actions": production_actions(impact_df),
+    }
+
+
+ENDPOINTS = {
+    "/supplier-performance": supplier_performance,
+    "/inventory-risk": inventory_risk_report,
+    "/production-impact": production_impact_report,
+}
+
+FILTER_PARAMS = ("supplier", "material", "product")
+
+# --------------------------------------------------
+# ENCODING
+# --------------------------------------------------
+
+
+def _clean(value):
+    # NaN and +-inf are not valid JSON (to_json already nulls them in tables)
+    return None if isinstance(value, float) and not math.isfinite(value) else value
+
+
+def encode_json(version, kpis, tables):
+    parts = ",".join(
+        f'"{name}":{df.to_json(orient="records", date_format="iso")}'
+        for name, df in tables.items()
+    )
+    head = json.dumps({
+        "dataset_version": version,
+        "kpis": {k: _clean(v) for k, v in kpis.items()},
+    })
+    return (head[:-1] + f',"tables":{{{parts}}}}}').encode("utf-8")
+
+
+def encode_arrow(df):
+    import pyarrow as pa
+
+    table = pa.Table.from_pandas(df.reset_index(drop=True), preserve_index=False)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+# --------------------------------------------------
+# SERVER
+# --------------------------------------------------
+class UnknownTable(Exception):
+    """?table= names a table the endpoint does not return."""
+
+
+class KPIServer:
+    """
+    Minimal asyncio HTTP/1.1 server for the page KPIs.
+    Responses are cached per (tenant, dataset version) and identical
+    concurrent requests share a single computation. Dataset loading and
+    computation run on worker threads, never on the event loop.
+    """
+
+    def __init__(self, snapshot_fn, cache_size=CACHE_SIZE, workers=4, tenants_fn=None):
+        self._snapshot_fn = snapshot_fn
+        self._tenants_fn = tenants_fn or (lambda: [t["plant"] for t in list_tenants()])
+        self._cache = OrderedDict()
+        self._cache_size = cache_size
+        self._versions = {}  # tenant -> dataset version of its cached responses
+        self._inflight = {}
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="kpi-api")
+
+    # ---------- request handling ----------
+
+    def _request_key(self, target):
+        url = urlsplit(target)
+        query = parse_qs(url.query)
+        filters = tuple(
+            (p, tuple(sorted(query[p]))) for p in FILTER_PARAMS if p in query
+        )
+        fmt = query.get("format", ["json"])[0]
+        # JSON returns every table: ?table= must not split its cache entries
+        table = query.get("table", ["ranking"])[0] if fmt == "arrow" else None
+        tenant = query.get("tenant", [None])[0]
+        return url.path, tenant, filters, fmt, table
+
+    def _compute(self, snapshot, key):
+        path, _, filters, fmt, table = key
+        kpis, tables = ENDPOINTS[path](snapshot, {p: list(v) for p, v in filters})
+        if fmt == "arrow":
+            if table not in tables:
+                raise UnknownTable(table)
+            return "application/vnd.apache.arrow.stream", encode_arrow(tables[table])
+        return "application/json", encode_json(snapshot.version, kpis, tables)
+
+    def _snapshot(self, tenant):
+        """Dataset version for a known tenant, else None (runs on a worker thread)."""
+        if tenant is not None and tenant not in self._tenants_fn():
+            return None
+        return self._snapshot_fn(tenant)
+
+    def _store_result(self, cache_key, future):
+        # Done callback: fills the cache even if every waiting client went away
+        self._inflight.pop(cache_key, None)
+        if future.cancelled() or future.exception() is not None:
+            return
+        self._cache[cache_key] = future.result()
+        if len(self._cache) > self._cache_size:
+            self._cache.popitem(last=False)
+
+    def _expire(self, tenant, version):
+        """Drop a tenant's responses once it publishes a new dataset version."""
+        if self._versions.get(tenant, version) != version:
+            for key in [k for k in self._cache if k[0] == tenant]:
+                del self._cache[key]
+        self._versions[tenant] = version
+
+    async def get(self, target):
+        key = self._request_key(target)
+        if key[0] not in ENDPOINTS:
+            return 404, "application/json", b'{"error":"not found"}'
+
+        loop = asyncio.get_running_loop()
+        tenant = key[1]
+        snapshot = await loop.run_in_executor(self._executor, self._snapshot, tenant)
+        if snapshot is None:
+            return 404, "application/json", b'{"error":"unknown tenant"}'
+
+        self._expire(tenant, snapshot.version)
+        cache_key = (tenant, snapshot.version) + key
+        if cache_key in self._cache:
+            self._cache.move_to_end(cache_key)
+            return (200,) + self._cache[cache_key]
+
+        # Deduplicate identical requests already being computed; shielded so
+        # one client disconnecting does not cancel the others' result
+        future = self._inflight.get(cache_key)
+        if future is None:
+            future = loop.run_in_executor(self._executor, self._compute, snapshot, key)
+            self._inflight[cache_key] = future
+            future.add_done_callback(lambda f: self._store_result(cache_key, f))
+        try:
+            result = await asyncio.shield(future)
+        except UnknownTable:
+            return 400, "application/json", b'{"error":"unknown table"}'
+
+        return (200,) + result
+
+    async def _respond(self, writer, status, ctype, body, keep_alive):
+        writer.write(
+            (
+                f"HTTP/1.1 {status} {'OK' if status == 200 else 'Error'}\r\n"
+                f"Content-Type: {ctype}\r\n"
+                f"Content-Length: {len(body)}\r\n"
+                f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+            ).encode("latin-1") + body
+        )
+        await writer.drain()
+
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b"\r\n\r\n")
+                except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+                    break
+
+                lines = head.decode("latin-1").split("\r\n")
+                try:
+                    method, target, version = lines[0].split(" ", 2)
+                except ValueError:
+                    await self._respond(
+                        writer, 400, "application/json", b'{"error":"bad request"}', False
+                    )
+                    break
+                headers = {
+                    k.strip().lower(): v.strip()
+                    for k, v in (l.split(":", 1) for l in lines[1:] if ":" in l)
+                }
+
+                if method != "GET":
+                    status, ctype, body = 405, "application/json", b'{"error":"method not allowed"}'
+                elif target == "/health":
+                    status, ctype, body = 200, "application/json", b'{"status":"ok"}'
+                else:
+                    try:
+                        status, ctype, body = await self.get(target)
+                    except Exception:
+                        logger.exception("KPI request failed: %s", target)
+                        status, ctype, body = 500, "application/json", b'{"error":"internal error"}'
+
+                keep_alive = (
+                    version == "HTTP/1.1" and headers.get("connection", "").lower() != "close"
+                )
+                await self._respond(writer, status, ctype, body, keep_alive)
+                if not keep_alive:
+                    break
+        finally:
+            writer.close()
+
+    async def serve(self, host="127.0.0.1", port=DEFAULT_PORT):
+        server = await asyncio.start_server(self.handle, host, port)
+        async with server:
+            await server.serve_forever()
+
+
+def serve_in_thread(snapshot_fn, host="127.0.0.1", port=DEFAULT_PORT):
+    """Run the API next to the Streamlit app so both share the loaded dataset."""
+    server = KPIServer(snapshot_fn)
+    thread = threading.Thread(
+        target=asyncio.run, args=(server.serve(host, port),),
+        name="kpi-api", daemon=True
+    )
+    thread.start()
+    return server
+
+
+def main():
+    from utils.data_loader import new_store
+
+    parser = argparse.ArgumentParser(description="Serve dashboard KPIs over HTTP.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+
+    stores = {None: new_store()}
+    lock = threading.Lock()
+
+    def snapshot_fn(tenant):
+        # Worker threads: build each tenant's store once
+        with lock:
+            if tenant not in stores:
+                stores[tenant] = new_store(tenant)
+        return stores[tenant].current()
+
+    asyncio.run(KPIServer(snapshot_fn).serve(args.host, args.port))
+
+
+if __name__ == "__main__":
+    main()
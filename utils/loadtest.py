@@ -0,0 +1,295 @@
+import argparse
+import asyncio
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+import numpy as np
+import pandas as pd
+
+from utils.snapshots import SNAPSHOT_ROOT_ENV
+
+# --------------------------------------------------
+# Multi-session load test for the dashboard pages.
+# One `streamlit run` server is started and every simulated planner is a
+# headless websocket client of it, speaking the same protobuf messages as
+# the browser. All sessions therefore share the server's cache_resource
+# dataset store, script threads and GIL, exactly as real users do. Each
+# session opens a page once (untimed warm-up), then all of them open
+# random pages and change random filters until the deadline; every rerun
+# is timed. CPU and memory are those of the server process.
+# --------------------------------------------------
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP = "app.py"
+PAGES = [
+    "Executive_Overview",
+    "Supplier_Performance",
+    "PO_Lead_Time",
+    "Inventory_Risk",
+    "Production_Impact",
+]
+RERUN_TIMEOUT = 120
+STARTUP_TIMEOUT = 120
+PERCENTILES = [50, 90, 95, 99]
+
+
+# --------------------------------------------------
+# SERVER
+# --------------------------------------------------
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(port, snapshot_root):
+    """`streamlit run app.py` in a subprocess; snapshots go to `snapshot_root`."""
+    env = dict(os.environ, **{SNAPSHOT_ROOT_ENV: snapshot_root})
+    env.pop("KPI_API_PORT", None)
+    server = subprocess.Popen(
+        [
+            sys.executable, "-m", "streamlit", "run", APP,
+            "--server.headless", "true",
+            "--server.port", str(port),
+            "--server.fileWatcherType", "none",
+            "--browser.gatherUsageStats", "false",
+        ],
+        cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+
+    deadline = time.monotonic() + STARTUP_TIMEOUT
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError(f"Streamlit server exited with code {server.returncode}")
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{port}/_stcore/health", timeout=1):
+                return server
+        except OSError:
+            time.sleep(0.5)
+    server.terminate()
+    raise RuntimeError("Streamlit server did not become healthy")
+
+
+def server_usage(pid):
+    """(CPU seconds, RSS MB, peak RSS MB) of the server process (Linux /proc)."""
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            fields = f.read().rsplit(")", 1)[1].split()
+        cpu_s = (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+        with open(f"/proc/{pid}/status") as f:
+            status = dict(line.split(":", 1) for line in f)
+        rss = int(status["VmRSS"].split()[0]) * 1024 / 1e6
+        peak = int(status["VmHWM"].split()[0]) * 1024 / 1e6
+        return cpu_s, rss, peak
+    except (OSError, KeyError, IndexError, ValueError):
+        return np.nan, np.nan, np.nan
+
+
+# --------------------------------------------------
+# HEADLESS SESSION
+# --------------------------------------------------
+class HeadlessSession:
+    """One browser tab: a websocket session that reruns pages with widget states."""
+
+    def __init__(self, url):
+        self.url = url
+        self.pages = {}    # url pathname -> page_script_hash
+        self.widgets = []  # multiselect / slider protos of the last run
+        self.states = {}   # widget id -> WidgetState sent with the next rerun
+        self._ws = None
+
+    async def connect(self):
+        import websockets
+
+        self._ws = await websockets.connect(self.url, subprotocols=["streamlit"], max_size=None)
+        return self
+
+    async def close(self):
+        await self._ws.close()
+
+    async def rerun(self, page=None):
+        """Run `page` (url pathname, None = app) with the current widget states; True on success."""
+        from streamlit.proto.BackMsg_pb2 import BackMsg
+        from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+
+        msg = BackMsg()
+        if page is not None:
+            msg.rerun_script.page_script_hash = self.pages[page]
+        msg.rerun_script.widget_states.widgets.extend(self.states.values())
+        await self._ws.send(msg.SerializeToString())
+
+        self.widgets, ok = [], True
+        while True:
+            fwd = ForwardMsg()
+            fwd.ParseFromString(await self._ws.recv())
+            kind = fwd.WhichOneof("type")
+            if kind == "navigation":
+                self.pages = {p.url_pathname: p.page_script_hash for p in fwd.navigation.app_pages}
+            elif kind == "delta" and fwd.delta.WhichOneof("type") == "new_element":
+                element = fwd.delta.new_element
+                name = element.WhichOneof("type")
+                if name in ("multiselect", "slider"):
+                    self.widgets.append(getattr(element, name))
+                elif name == "exception":
+                    ok = False
+            elif kind == "page_not_found":
+                ok = False
+            elif kind == "script_finished":
+                return ok and fwd.script_finished != fwd.FINISHED_WITH_COMPILE_ERROR
+
+    def random_change(self, rng):
+        """Set one random filter / slider for the next rerun; False if the page has none."""
+        from streamlit.proto.WidgetStates_pb2 import WidgetState
+
+        candidates = [
+            w for w in self.widgets
+            if (len(w.options) > 1 if w.DESCRIPTOR.name == "MultiSelect" else w.max > w.min)
+        ]
+        if not candidates:
+            return False
+        widget = rng.choice(candidates)
+        state = WidgetState(id=widget.id)
+        if widget.DESCRIPTOR.name == "MultiSelect":
+            k = rng.randint(1, len(widget.options))
+            state.string_array_value.data[:] = rng.sample(list(widget.options), k)
+        else:
+            # Values on the slider's step grid; range sliders get a sorted pair
+            steps = round((widget.max - widget.min) / widget.step)
+            state.double_array_value.data[:] = sorted(
+                widget.min + rng.randint(0, steps) * widget.step
+                for _ in range(max(len(widget.default), 1))
+            )
+        self.states[widget.id] = state
+        return True
+
+
+async def run_session(session, session_id, deadline, changes_per_page, rng):
+    """Random page visits with filter changes until `deadline`; timed reruns."""
+    results = []
+    while time.perf_counter() < deadline:
+        page = rng.choice(PAGES)
+        session.states = {}
+
+        for step in range(changes_per_page + 1):
+            if step and not session.random_change(rng):
+                break
+            start = time.perf_counter()
+            try:
+                ok = await asyncio.wait_for(session.rerun(page), RERUN_TIMEOUT)
+            except asyncio.TimeoutError:
+                # Late messages of the abandoned run must not count towards the next one
+                await session.close()
+                await session.connect()
+                ok = False
+            results.append({
+                "session": session_id,
+                "page": page,
+                "action": "open" if step == 0 else "filter",
+                "latency_ms": (time.perf_counter() - start) * 1000,
+                "error": not ok,
+            })
+            if not ok or time.perf_counter() >= deadline:
+                break
+    return results
+
+
+async def _run_level(url, sessions, duration, changes_per_page, seed):
+    clients = [await HeadlessSession(url).connect() for _ in range(sessions)]
+    try:
+        # Warm-up, untimed: every session opens the app before the clock starts
+        await asyncio.gather(*(c.rerun() for c in clients))
+        deadline = time.perf_counter() + duration
+        done = await asyncio.gather(*(
+            run_session(c, i, deadline, changes_per_page, random.Random(seed + i))
+            for i, c in enumerate(clients)
+        ))
+    finally:
+        await asyncio.gather(*(c.close() for c in clients), return_exceptions=True)
+    return [r for results in done for r in results]
+
+
+def run_level(server, port, sessions, duration, changes_per_page=3, seed=0):
+    """Run `sessions` concurrent sessions for `duration` seconds; returns (runs, stats)."""
+    url = f"ws://127.0.0.1:{port}/_stcore/stream"
+    cpu_start, rss_start, _ = server_usage(server.pid)
+    started = time.perf_counter()
+    runs = pd.DataFrame(asyncio.run(_run_level(url, sessions, duration, changes_per_page, seed)))
+    elapsed = time.perf_counter() - started
+    cpu_end, rss, peak = server_usage(server.pid)
+
+    stats = {
+        "sessions": sessions,
+        "reruns": len(runs),
+        "errors": int(runs["error"].sum()) if len(runs) else 0,
+        "throughput_rps": len(runs) / duration,
+        # share of the machine's cores kept busy by the server (warm-up included)
+        "cpu_util": (cpu_end - cpu_start) / elapsed / (os.cpu_count() or 1),
+        "rss_mb": rss,
+        "peak_rss_mb": peak,
+        "rss_growth_mb": rss - rss_start,
+    }
+    if len(runs):
+        for p in PERCENTILES:
+            stats[f"p{p}_ms"] = float(np.percentile(runs["latency_ms"], p))
+    return runs.assign(sessions=sessions), stats
+
+
+def page_percentiles(runs):
+    return (
+        runs.groupby(["sessions", "page"])["latency_ms"]
+        .quantile([p / 100 for p in PERCENTILES])
+        .unstack()
+        .rename(columns=lambda q: f"p{round(q * 100)}_ms")
+        .reset_index()
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test the dashboard with N concurrent sessions.")
+    parser.add_argument("--sessions", type=int, nargs="+", default=[1, 5, 10, 30])
+    parser.add_argument("--duration", type=float, default=30, help="seconds per concurrency level")
+    parser.add_argument("--changes", type=int, default=3, help="filter changes per page visit")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--port", type=int, default=None, help="server port (default: any free port)")
+    parser.add_argument("--out", default=None, help="CSV prefix for raw runs and summaries")
+    args = parser.parse_args()
+
+    port = args.port or free_port()
+    all_runs, summary = [], []
+    # Snapshots recorded by the server under test never touch data/snapshots
+    with tempfile.TemporaryDirectory(prefix="loadtest-snapshots-") as snapshot_root:
+        server = start_server(port, snapshot_root)
+        try:
+            for n in args.sessions:
+                runs, stats = run_level(server, port, n, args.duration, args.changes, args.seed)
+                all_runs.append(runs)
+                summary.append(stats)
+                print(
+                    f"{n:>4} sessions: {stats['reruns']} reruns, "
+                    f"{stats['throughput_rps']:.1f}/s, p95 {stats.get('p95_ms', float('nan')):.0f} ms, "
+                    f"server CPU {stats['cpu_util']:.0%}, RSS {stats['rss_mb']:.0f} MB"
+                )
+        finally:
+            server.terminate()
+            server.wait()
+
+    summary = pd.DataFrame(summary)
+    per_page = page_percentiles(pd.concat(all_runs, ignore_index=True))
+    print()
+    print(summary.round(1).to_string(index=False))
+    print()
+    print(per_page.round(0).to_string(index=False))
+
+    if args.out:
+        pd.concat(all_runs, ignore_index=True).to_csv(f"{args.out}_runs.csv", index=False)
+        summary.to_csv(f"{args.out}_summary.csv", index=False)
+        per_page.to_csv(f"{args.out}_pages.csv", index=False)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,443 @@
+import numpy as np
+import pandas as pd
+
+# --------------------------------------------------
+# Shared computation layer for the pages.
+# Filters return boolean-mask views (no .copy()); derived values
+# are returned as new frames/Series instead of being written back
+# into the cached source tables.
+# --------------------------------------------------
+TARGET_LT = 14          # target PO lead time (days)
+TARGET_DOI = 14         # target days of inventory
+STOCKOUT_DAYS = 7       # production stockout horizon (days)
+HIGH_RISK_SCORE = 0.6   # inventory / impact high-risk cutoff
+
+# Composite risk scores are normalized component matrices (one column per
+# component, see *_risk_components) times these default weights
+SUPPLIER_RISK_WEIGHTS = (0.5, 0.3, 0.2)   # late rate, rejection rate, relative lead time
+INVENTORY_RISK_WEIGHTS = (0.6, 0.4)       # coverage gap, relative volatility
+IMPACT_RISK_WEIGHTS = (0.6, 0.4)          # 1 / days to stockout, relative loss
+STRATEGIC_DEPENDENCY = 0.15               # supplier segmentation: share of spend
+LOW_RISK_SCORE = 0.2                      # supplier segmentation: risk score
+HIGH_RISK_SUPPLIER = 0.4                  # supplier high-risk cutoff
+
+
+def safe_ratio(num, den):
+    num = np.asarray(num, dtype="float64")
+    den = np.asarray(den, dtype="float64")
+    out = np.full(num.shape, np.nan)
+    np.divide(num, den, out=out, where=den > 0)
+    return out
+
+
+def filter_po(po, supplier_filter=None, material_filter=None):
+    mask = np.ones(len(po), dtype=bool)
+    if supplier_filter is not None:
+        mask &= po["supplier_name"].isin(supplier_filter).to_numpy()
+    if material_filter is not None:
+        mask &= po["material_name"].isin(material_filter).to_numpy()
+    return po[mask]
+
+
+def filter_by_material(df, material_filter):
+    return df[df["material_name"].isin(material_filter)]
+
+
+def consolidate_gr(gr):
+    """
+    Collapse goods receipts to one row per PO so the PO join is one-to-one.
+    gr_date is the last (completing) receipt; first_gr_date the first one.
+    """
+    return (
+        gr.groupby("po_number", observed=True, sort=False)
+        .agg(
+            first_gr_date=("gr_date", "min"),
+            gr_date=("gr_date", "max"),
+            received_qty=("received_qty", "sum"),
+            accepted_qty=("accepted_qty", "sum"),
+            rejected_qty=("rejected_qty", "sum"),
+            delivery_count=("gr_date", "size"),
+        )
+        .reset_index()
+    )
+
+
+def join_po_gr(po_f, gr_po):
+    """PO + consolidated GR (see consolidate_gr), one row per PO."""
+    po_gr = po_f.merge(gr_po, on="po_number", how="left", validate="many_to_one")
+    po_gr["fill_rate"] = safe_ratio(po_gr["received_qty"], po_gr["ordered_qty"])
+    return po_gr
+
+
+def _relative(values):
+    """values / max(values); zeros when there is nothing positive to scale by."""
+    top = values.max() if len(values) else 0
+    return values / top if top > 0 else np.zeros_like(values)
+
+
+def supplier_risk_components(late_rate, rejection_rate, avg_lead_time):
+    avg_lead_time = np.asarray(avg_lead_time, dtype="float64")
+    return np.column_stack([
+        np.asarray(late_rate, dtype="float64"),
+        np.asarray(rejection_rate, dtype="float64"),
+        avg_lead_time / np.nanmax(avg_lead_time) if len(avg_lead_time) else avg_lead_time,
+    ])
+
+
+def inventory_risk_components(doi, volatility):
+    doi = np.asarray(doi, dtype="float64")
+    doi_max = np.nanmax(doi) if len(doi) else 0
+    with np.errstate(divide="ignore", invalid="ignore"):
+        coverage_gap = 1 - doi / doi_max
+    return np.column_stack([coverage_gap, _relative(np.asarray(volatility, dtype="float64"))])
+
+
+def impact_risk_components(days_to_stockout, loss_units):
+    days_to_stockout = np.asarray(days_to_stockout, dtype="float64")
+    stockout_norm = np.where(
+        days_to_stockout > 0,
+        1 / np.where(days_to_stockout > 0, days_to_stockout, 1),
+        0
+    )
+    return np.column_stack([stockout_norm, _relative(np.asarray(loss_units, dtype="float64"))])
+
+
+def late_flag(po_gr):
+    return (
+        po_gr["gr_date"].notna() &
+        (po_gr["gr_date"] > po_gr["expected_delivery_date"])
+    )
+
+
+# --------------------------------------------------
+# PAGE 1 – EXECUTIVE OVERVIEW
+# --------------------------------------------------
+def spend_trend(po_f):
+    month = po_f["po_date"].dt.to_period("M").astype(str).rename("month")
+    return (
+        po_f["spend"].groupby(month)
+        .sum()
+        .reset_index(name="total_spend")
+    )
+
+
+def executive_kpis(po_f, po_gr, inv_f, n_po=None):
+    """`n_po` (distinct POs) may come from the PO sketch index instead of a rescan."""
+    delivered = po_gr["gr_date"].notna()
+    on_time = delivered & (po_gr["gr_date"] <= po_gr["expected_delivery_date"])
+    if n_po is None:
+        n_po = po_gr["po_number"].nunique()
+    return {
+        "total_spend": float(po_f["spend"].sum()),
+        "open_po": int((po_f["po_status"] == "Open").sum()),
+        "otd_rate": float(on_time.sum() / n_po) if n_po > 0 else 0.0,
+        "materials_below_ss": int((inv_f["stock_on_hand"] < inv_f["safety_stock"]).sum()),
+    }
+
+
+# --------------------------------------------------
+# PAGE 2 – SUPPLIER PERFORMANCE
+# --------------------------------------------------
+def supplier_metrics(po_gr, po_counts=None):
+    """`po_counts` (distinct POs per supplier) may come from the PO sketch index."""
+    lead_time = (po_gr["gr_date"] - po_gr["po_date"]).dt.days
+
+    aggs = dict(
+        total_spend=("spend", "sum"),
+        avg_lead_time=("lead_time", "mean"),
+        late_delivery_rate=("late", "mean"),
+        rejected=("rejected_qty", "sum"),
+        received=("received_qty", "sum"),
+        ordered=("ordered_qty", "sum"),
+    )
+    if po_counts is None:
+        aggs = {"total_po": ("po_number", "nunique"), **aggs}
+
+    grouped = (
+        pd.DataFrame({
+            "supplier_name": po_gr["supplier_name"],
+            "po_number": po_gr["po_number"],
+            "spend": po_gr["spend"],
+            "lead_time": lead_time,
+            "late": po_gr["gr_date"] > po_gr["expected_delivery_date"],
+            "rejected_qty": po_gr["rejected_qty"].astype("float64"),
+            "received_qty": po_gr["received_qty"].astype("float64"),
+            "ordered_qty": po_gr["ordered_qty"].astype("float64"),
+        })
+        .groupby("supplier_name", observed=True)
+        .agg(**aggs)
+    )
+    if po_counts is not None:
+        grouped.insert(
+            0, "total_po",
+            grouped.index.astype(str).map(po_counts).fillna(0).astype("int64")
+        )
+
+    rejection_rate = np.where(
+        grouped["received"] > 0,
+        grouped["rejected"] / grouped["received"].where(grouped["received"] > 0, 1),
+        0
+    )
+
+    supplier_df = grouped[
+        ["total_po", "total_spend", "avg_lead_time", "late_delivery_rate"]
+    ].assign(
+        rejection_rate=rejection_rate,
+        fill_rate=safe_ratio(grouped["received"], grouped["ordered"]),
+    ).reset_index()
+
+    # Dependency (% spend)
+    supplier_df["dependency"] = supplier_df["total_spend"] / supplier_df["total_spend"].sum()
+
+    # Composite risk score (realistic & explainable)
+    supplier_df["risk_score"] = supplier_risk_components(
+        supplier_df["late_delivery_rate"], supplier_df["rejection_rate"], supplier_df["avg_lead_time"]
+    ) @ np.asarray(SUPPLIER_RISK_WEIGHTS)
+
+    return supplier_df
+
+
+def classify_suppliers(supplier_df, dependency_cutoff=STRATEGIC_DEPENDENCY,
+                       low_risk_cutoff=LOW_RISK_SCORE):
+    strategic = supplier_df["dependency"] > dependency_cutoff
+    low_risk = supplier_df["risk_score"] < low_risk_cutoff
+    return pd.Series(
+        np.select(
+            [strategic & low_risk, strategic, low_risk],
+            ["Strategic", "Bottleneck", "Leverage"],
+            default="Routine"
+        ),
+        index=supplier_df.index
+    )
+
+
+def supplier_kpis(supplier_df):
+    return {
+        "avg_lead_time": float(supplier_df["avg_lead_time"].mean()),
+        "avg_late_delivery_rate": float(supplier_df["late_delivery_rate"].mean()),
+        "avg_rejection_rate": float(supplier_df["rejection_rate"].mean()),
+        "total_spend": float(supplier_df["total_spend"].sum()),
+    }
+
+
+def supplier_ranking(supplier_df):
+    return supplier_df.sort_values("risk_score", ascending=False)[
+        [
+            "supplier_name",
+            "segment",
+            "risk_score",
+            "avg_lead_time",
+            "late_delivery_rate",
+            "rejection_rate",
+            "fill_rate",
+            "dependency"
+        ]
+    ]
+
+
+SUPPLIER_ACTIONS = {
+    "Bottleneck": ("High", "Develop alternative supplier / renegotiate SLA"),
+    "Strategic": ("Low", "Long-term partnership & volume commitment"),
+}
+
+
+def supplier_actions(supplier_df):
+    sel = supplier_df[supplier_df["segment"].isin(list(SUPPLIER_ACTIONS))]
+    return pd.DataFrame({
+        "Supplier": sel["supplier_name"].to_numpy(),
+        "Risk Level": [SUPPLIER_ACTIONS[s][0] for s in sel["segment"]],
+        "Recommended Action": [SUPPLIER_ACTIONS[s][1] for s in sel["segment"]],
+    })
+
+
+# --------------------------------------------------
+# PAGE 3 – PO LEAD TIME
+# --------------------------------------------------
+def po_lead_time(po_gr):
+    return po_gr.assign(
+        actual_lead_time=(po_gr["gr_date"] - po_gr["po_date"]).dt.days,
+        late_flag=late_flag(po_gr),
+    )
+
+
+def lead_time_kpis(po_gr, open_po_index, open_mask, as_of):
+    return {
+        "avg_lead_time": float(po_gr["actual_lead_time"].mean()),
+        "late_po_count": int(po_gr["late_flag"].sum()),
+        "late_po_rate": float(po_gr["late_flag"].mean()),
+        "open_po_aging": open_po_index.mean_age(as_of, open_mask),
+    }
+
+
+def lead_time_by(po_gr, key, po_counts=None):
+    """`po_counts` (distinct POs per key value) may come from the PO sketch index."""
+    aggs = dict(
+        avg_lead_time=("actual_lead_time","mean"),
+        late_rate=("late_flag","mean"),
+    )
+    if po_counts is None:
+        aggs["po_count"] = ("po_number","nunique")
+
+    out = po_gr.groupby(key, observed=True).agg(**aggs).reset_index()
+    if po_counts is not None:
+        out["po_count"] = out[key].astype(str).map(po_counts).fillna(0).astype("int64")
+    return out
+
+
+# --------------------------------------------------
+# PAGE 4 – INVENTORY RISK
+# --------------------------------------------------
+def consumption_rate(df, forecast=None):
+    """Daily consumption rate: demand forecast where available, else the sheet value."""
+    rate = df["daily_consumption"].astype("float64")
+    if forecast is not None:
+        rate = (
+            df["material_id"].astype(str).map(forecast["forecast_daily"])
+            .astype("float64").fillna(rate)
+        )
+    return rate.to_numpy()
+
+
+def inventory_risk(inv_f, cons_f, forecast=None):
+    # Consumption volatility
+    cons_var = (
+        cons_f.groupby("material_id", observed=True)["consumed_qty"]
+        .std()
+        .rename("consumption_volatility")
+    )
+
+    volatility = (
+        inv_f["material_id"].map(cons_var).astype("float64").fillna(0).to_numpy()
+    )
+
+    # Days of Inventory at the recorded consumption rate
+    doi = safe_ratio(inv_f["stock_on_hand"], inv_f["daily_consumption"])
+
+    # Days to stockout at the forecast consumption rate
+    rate = consumption_rate(inv_f, forecast)
+    days_to_stockout = safe_ratio(inv_f["stock_on_hand"].to_numpy(dtype="float64"), rate)
+
+    # Composite inventory risk score
+    score = inventory_risk_components(doi, volatility) @ np.asarray(INVENTORY_RISK_WEIGHTS)
+
+    return inv_f.assign(
+        # No consumption: coverage is unbounded, not zero days
+        days_of_inventory=np.nan_to_num(doi, nan=np.inf, posinf=np.inf).astype("float32"),
+        forecast_daily=rate.astype("float32"),
+        days_to_stockout=np.nan_to_num(days_to_stockout, nan=np.inf, posinf=np.inf).astype("float32"),
+        consumption_volatility=volatility.astype("float32"),
+        inventory_risk_score=np.nan_to_num(score).astype("float32"),
+    )
+
+
+def inventory_kpis(inv_risk, high_risk=HIGH_RISK_SCORE):
+    return {
+        "avg_days_of_inventory": float(inv_risk["days_of_inventory"].mean()),
+        "materials_below_safety_stock": int((inv_risk["stock_on_hand"] < inv_risk["safety_stock"]).sum()),
+        "avg_inventory_risk_score": float(inv_risk["inventory_risk_score"].mean()),
+        "high_risk_materials": int((inv_risk["inventory_risk_score"] > high_risk).sum()),
+    }
+
+
+def inventory_ranking(inv_risk):
+    return inv_risk.sort_values(
+        "inventory_risk_score", ascending=False
+    )[
+        ["material_name","days_of_inventory","consumption_volatility","inventory_risk_score"]
+    ]
+
+
+def inventory_actions(inv_risk, target_doi=TARGET_DOI, high_risk=HIGH_RISK_SCORE):
+    high = (inv_risk["inventory_risk_score"] > high_risk).to_numpy()
+    low_doi = (inv_risk["days_of_inventory"] < target_doi).to_numpy()
+    sel = high | low_doi
+    return pd.DataFrame({
+        "Material": inv_risk["material_name"].to_numpy()[sel],
+        "Risk Level": np.where(high[sel], "High", "Medium"),
+        "Recommended Action": np.where(
+            high[sel], "Increase safety stock or expedite PO", "Review reorder point"
+        ),
+    })
+
+
+# --------------------------------------------------
+# PAGE 5 – PRODUCTION IMPACT
+# --------------------------------------------------
+ASSUMED_UNIT_REVENUE = 15000
+
+
+def production_impact(prod_exposure, inv_f, forecast=None):
+    impact_df = prod_exposure.merge(
+        inv_f[
+            ["material_id", "material_name", "stock_on_hand", "daily_consumption"]
+        ],
+        on=["material_id", "material_name"],
+        how="left"
+    )
+
+    rate = consumption_rate(impact_df, forecast)
+    days_to_stockout = safe_ratio(impact_df["stock_on_hand"].to_numpy(dtype="float64"), rate)
+
+    consumed = impact_df["consumed_qty"].to_numpy(dtype="float64")
+
+    # Production loss proxy
+    loss_units = np.where(days_to_stockout < STOCKOUT_DAYS, consumed, consumed * 0.3)
+
+    # Composite impact risk score
+    score = impact_risk_components(days_to_stockout, loss_units) @ np.asarray(IMPACT_RISK_WEIGHTS)
+
+    return impact_df.assign(
+        forecast_daily=rate,
+        days_to_stockout=days_to_stockout,
+        production_loss_units=loss_units,
+        estimated_revenue_loss=loss_units * ASSUMED_UNIT_REVENUE,
+        impact_risk_score=score,
+    )
+
+
+def adjusted_revenue_loss(impact_df, coverage_improvement):
+    adjusted_days = safe_ratio(
+        impact_df["stock_on_hand"] * (1 + coverage_improvement / 100),
+        impact_df["forecast_daily"]
+    )
+    loss = impact_df["estimated_revenue_loss"].to_numpy()
+    return np.where(adjusted_days < STOCKOUT_DAYS, loss, loss * 0.4)
+
+
+def production_kpis(impact_df):
+    return {
+        "materials_at_risk": int(
+            impact_df.loc[impact_df["days_to_stockout"] < STOCKOUT_DAYS, "material_name"].nunique()
+        ),
+        "production_loss_units": float(impact_df["production_loss_units"].sum()),
+        "estimated_revenue_loss": float(impact_df["estimated_revenue_loss"].sum()),
+        "avg_days_to_stockout": float(impact_df["days_to_stockout"].mean()),
+    }
+
+
+def production_ranking(impact_df):
+    return impact_df.sort_values(
+        "impact_risk_score", ascending=False
+    )[
+        [
+            "material_name",
+            "product_name",
+            "days_to_stockout",
+            "production_loss_units",
+            "estimated_revenue_loss",
+            "impact_risk_score"
+        ]
+    ]
+
+
+def production_actions(impact_df):
+    sel = impact_df[impact_df["days_to_stockout"] < STOCKOUT_DAYS]
+    return pd.DataFrame({
+        "Material": sel["material_name"].to_numpy(),
+        "Product": sel["product_name"].to_numpy(),
+        "Risk Level": "High",
+        "Recommended Action": (
+            "Expedite PO, increase safety stock, "
+            "or activate alternative supplier"
+        ),
+    })
@@ -0,0 +1,181 @@
+import argparse
+import json
+import os
+
+import pandas as pd
+
+# --------------------------------------------------
+# Partitioned dataset layout:
+#   <root>/catalog.json
+#   <root>/plant=<plant>/<table>/month=<YYYY-MM>.parquet
+#   <root>/plant=<plant>/<table>/_schema.parquet   (zero rows)
+# The catalog lists every partition so a tenant (plant) and month range
+# can be pruned before any parquet file is opened. The schema file keeps
+# the table's columns and dtypes when a selection has no partitions.
+# --------------------------------------------------
+PARTITION_ROOT = "data/partitions"
+CATALOG_FILE = "catalog.json"
+SCHEMA_FILE = "_schema.parquet"
+
+PARTITION_COLUMNS = {
+    "Purchase_Order": "po_date",
+    "Goods_Receipt": "gr_date",
+    "Inventory": "date",
+    "Material_Consumption": "production_date",
+}
+
+
+def catalog_path(root=PARTITION_ROOT):
+    return os.path.join(root, CATALOG_FILE)
+
+
+def read_catalog(root=PARTITION_ROOT):
+    path = catalog_path(root)
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as f:
+        return pd.DataFrame(json.load(f)["partitions"])
+
+
+def _write_catalog(catalog, root):
+    path = catalog_path(root)
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({"partitions": catalog.to_dict("records")}, f, indent=1)
+    # Atomic replace: readers never see a half-written catalog
+    os.replace(tmp, path)
+
+
+def _write_parquet(df, path):
+    tmp = path + ".tmp"
+    df.to_parquet(tmp, index=False)
+    # Same as the catalog: a refresher never reads a half-written partition
+    os.replace(tmp, path)
+
+
+def partition_stamp(catalog_file, plant):
+    """Change stamp of one plant: its catalog entries and their file versions."""
+    root = os.path.dirname(catalog_file)
+    catalog = read_catalog(root)
+    if catalog is None:
+        return ()
+    stamp = []
+    for rel in sorted(prune(catalog, plant=plant)["path"]):
+        info = os.stat(os.path.join(root, rel))
+        stamp.append((rel, info.st_mtime_ns, info.st_size))
+    return tuple(stamp)
+
+
+def list_tenants(root=PARTITION_ROOT):
+    catalog = read_catalog(root)
+    if catalog is None or catalog.empty:
+        return []
+    return (
+        catalog[["plant", "business_unit"]]
+        .drop_duplicates()
+        .sort_values("plant")
+        .to_dict("records")
+    )
+
+
+def prune(catalog, plant=None, months=None, tables=None):
+    mask = pd.Series(True, index=catalog.index)
+    if plant is not None:
+        mask &= catalog["plant"] == plant
+    if months is not None:
+        mask &= catalog["month"].isin(months)
+    if tables is not None:
+        mask &= catalog["table"].isin(tables)
+    return catalog[mask]
+
+
+def write_partitions(tables, plant, business_unit, root=PARTITION_ROOT):
+    """Split {sheet name: frame} into per-month parquet files for one plant."""
+    catalog = read_catalog(root)
+    if catalog is not None:
+        catalog = catalog[catalog["plant"] != plant]
+
+    entries = []
+    for table, df in tables.items():
+        month = (
+            df[PARTITION_COLUMNS[table]].dt.to_period("M").astype(str)
+            .fillna("unknown")
+        )
+        table_dir = os.path.join(root, f"plant={plant}", table)
+        os.makedirs(table_dir, exist_ok=True)
+        _write_parquet(df.iloc[:0], os.path.join(table_dir, SCHEMA_FILE))
+
+        for m, part in df.groupby(month, sort=True):
+            rel = os.path.join(f"plant={plant}", table, f"month={m}.parquet")
+            _write_parquet(part, os.path.join(root, rel))
+            entries.append({
+                "plant": plant,
+                "business_unit": business_unit,
+                "table": table,
+                "month": m,
+                "path": rel,
+                "rows": len(part),
+            })
+
+    new = pd.DataFrame(entries)
+    catalog = new if catalog is None else pd.concat([catalog, new], ignore_index=True)
+    _write_catalog(catalog, root)
+    return new
+
+
+def _empty_table(root, plant, table):
+    """Zero-row frame with the table's columns and dtypes."""
+    path = os.path.join(root, f"plant={plant}", table, SCHEMA_FILE)
+    return pd.read_parquet(path) if os.path.exists(path) else pd.DataFrame()
+
+
+def read_partitions(plant, months=None, root=PARTITION_ROOT):
+    """Load only the partitions of one plant (and optional months)."""
+    catalog = prune(read_catalog(root), plant=plant, months=months)
+
+    frames = {}
+    for table in PARTITION_COLUMNS:
+        paths = catalog.loc[catalog["table"] == table, "path"]
+        parts = [pd.read_parquet(os.path.join(root, p)) for p in paths]
+        frames[table] = (
+            pd.concat(parts, ignore_index=True) if parts
+            else _empty_table(root, plant, table)
+        )
+
+    return (
+        frames["Purchase_Order"],
+        frames["Goods_Receipt"],
+        frames["Inventory"],
+        frames["Material_Consumption"],
+    )
+
+
+def main():
+    from utils.data_loader import read_workbook
+
+    parser = argparse.ArgumentParser(
+        description="Add a plant workbook to the partitioned dataset."
+    )
+    parser.add_argument("workbook")
+    parser.add_argument("--plant", required=True)
+    parser.add_argument("--business-unit", required=True)
+    parser.add_argument("--root", default=PARTITION_ROOT)
+    args = parser.parse_args()
+
+    po, gr, inv, cons = read_workbook(args.workbook)
+    new = write_partitions(
+        {
+            "Purchase_Order": po,
+            "Goods_Receipt": gr,
+            "Inventory": inv,
+            "Material_Consumption": cons,
+        },
+        args.plant,
+        args.business_unit,
+        root=args.root,
+    )
+    print(f"{len(new)} partitions written for plant {args.plant}")
+
+
+if __name__ == "__main__":
+    main()
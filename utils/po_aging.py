@@ -0,0 +1,97 @@
+import numpy as np
+import pandas as pd
+
+# Same buckets as pd.cut(bins=[0,7,14,30,999]) – right-closed intervals
+AGING_BINS = [0, 7, 14, 30, 999]
+AGING_LABELS = ["0–7 days", "8–14 days", "15–30 days", ">30 days"]
+
+
+NEVER = np.iinfo(np.int64).max  # receipt day of POs not received yet
+
+
+def _day(ts):
+    return pd.Timestamp(ts).to_datetime64().astype("datetime64[D]").astype(np.int64)
+
+
+def _days(values):
+    days = values.to_numpy().astype("datetime64[D]")
+    return np.where(np.isnat(days), NEVER, days.astype(np.int64))
+
+
+class OpenPOIndex:
+    """
+    PO lines sorted by po_date, with the day of their first goods receipt.
+    A PO is open as of a date when po_date <= as_of < first receipt (or it
+    was never received), so past "as of" dates see POs received later.
+    POs created by `as_of` are a prefix of the sorted array; age buckets are
+    contiguous po_date ranges found by binary search within that prefix,
+    and overdue POs are a shorter prefix (oldest first).
+    """
+
+    def __init__(self, po_gr):
+        lines = po_gr[po_gr["po_date"].notna()]
+        days = _days(lines["po_date"])
+        order = np.argsort(days, kind="stable")
+
+        self.po_day = days[order]
+        self.receipt_day = _days(lines["first_gr_date"])[order]
+        self.rows = lines[
+            ["po_number", "supplier_name", "material_name", "po_date", "expected_delivery_date"]
+        ].iloc[order].reset_index(drop=True)
+
+        self._supplier_codes, self._suppliers = pd.factorize(self.rows["supplier_name"])
+        self._material_codes, self._materials = pd.factorize(self.rows["material_name"])
+
+    def __len__(self):
+        return len(self.po_day)
+
+    def select(self, supplier_filter=None, material_filter=None):
+        """Boolean mask over the sorted PO lines (None = no filter)."""
+        if supplier_filter is None and material_filter is None:
+            return None
+        mask = np.ones(len(self), dtype=bool)
+        if supplier_filter is not None:
+            mask &= np.isin(self._supplier_codes, self._suppliers.get_indexer(list(supplier_filter)))
+        if material_filter is not None:
+            mask &= np.isin(self._material_codes, self._materials.get_indexer(list(material_filter)))
+        return mask
+
+    def _open(self, today, mask):
+        """Open flags of the POs created by `today` (a prefix of the sorted lines)."""
+        end = np.searchsorted(self.po_day, today, side="right")
+        is_open = self.receipt_day[:end] > today
+        return is_open if mask is None else is_open & mask[:end]
+
+    def open_at(self, as_of, mask=None):
+        """Boolean mask over all sorted lines: open as of `as_of`."""
+        out = np.zeros(len(self), dtype=bool)
+        is_open = self._open(_day(as_of), mask)
+        out[:len(is_open)] = is_open
+        return out
+
+    def aging_buckets(self, as_of, mask=None):
+        today = _day(as_of)
+        is_open = self._open(today, mask)
+        counts = []
+        for low, high in zip(AGING_BINS[:-1], AGING_BINS[1:]):
+            # age in (low, high]  <=>  po_day in [today - high, today - low)
+            lo = np.searchsorted(self.po_day, today - high, side="left")
+            hi = np.searchsorted(self.po_day, today - low, side="left")
+            counts.append(int(is_open[lo:hi].sum()))
+        return pd.DataFrame({
+            "aging_bucket": pd.Categorical(AGING_LABELS, categories=AGING_LABELS, ordered=True),
+            "po_count": counts,
+        })
+
+    def mean_age(self, as_of, mask=None):
+        today = _day(as_of)
+        is_open = self._open(today, mask)
+        days = self.po_day[:len(is_open)][is_open]
+        return float(today - days.mean()) if len(days) else float("nan")
+
+    def overdue(self, as_of, target_days, mask=None):
+        """POs open as of `as_of` and older than `target_days`, oldest first."""
+        today = _day(as_of)
+        end = np.searchsorted(self.po_day, today - target_days, side="left")
+        idx = np.flatnonzero(self._open(today, mask)[:end])
+        return self.rows.iloc[idx].assign(current_age=today - self.po_day[idx])
@@ -0,0 +1,199 @@
+import numpy as np
+import pandas as pd
+
+# --------------------------------------------------
+# Distinct PO counts under supplier / material selections.
+# PO numbers are factorized once at ingest and kept per
+# (supplier, material) cell:
+#   exact  - PO counts per cell. po_gr has one row per PO, so cells are
+#            disjoint and a selection's count is a sum of cell sizes (a
+#            PO spread over several cells falls back to a vectorized
+#            distinct count over the selected (cell, PO) pairs)
+#   approx - sparse HyperLogLog registers: only the non-zero (cell,
+#            register, rank) triples, at most one per PO. A selection is
+#            a max over the selected triples per register
+# Neither path touches PO number strings on a filter change, and memory
+# grows with the number of POs, not cells x registers.
+# --------------------------------------------------
+HLL_PRECISION = 12  # 4096 registers, ~1.6% standard error
+COUNT_MODES = {"exact": "Exact", "approx": "Approximate (HyperLogLog)"}
+
+
+def _rank(hashes, p):
+    """Position of the first 1-bit after the p index bits (1-based)."""
+    w = hashes << np.uint64(p)
+    hi = (w >> np.uint64(32)).astype(np.float64)
+    lo = (w & np.uint64(0xFFFFFFFF)).astype(np.float64)
+    with np.errstate(divide="ignore"):
+        rank = np.where(
+            hi > 0,
+            32 - np.floor(np.log2(hi)),
+            64 - np.floor(np.log2(np.where(lo > 0, lo, 1))),
+        )
+    return np.minimum(rank, 64 - p + 1).astype(np.uint8)
+
+
+def _sigma(x):
+    if x == 1:
+        return np.inf
+    y, z = 1.0, x
+    while True:
+        x *= x
+        z_old, z = z, z + x * y
+        y += y
+        if z == z_old:
+            return z
+
+
+def _tau(x):
+    if x in (0, 1):
+        return 0.0
+    y, z = 1.0, 1 - x
+    while True:
+        x = np.sqrt(x)
+        y *= 0.5
+        z_old, z = z, z - (1 - x) ** 2 * y
+        if z == z_old:
+            return z / 3
+
+
+def hll_estimate(registers, precision=HLL_PRECISION):
+    """Ertl's improved estimator; unbiased over the full range without empirical tables."""
+    m = 1 << precision
+    q = 64 - precision
+    hist = np.bincount(registers, minlength=q + 2).astype(np.float64)
+
+    z = m * _tau(1 - hist[q + 1] / m)
+    for k in range(q, 0, -1):
+        z = 0.5 * (z + hist[k])
+    z += m * _sigma(hist[0] / m)
+    return m * m / (2 * np.log(2) * z)
+
+
+class POSketchIndex:
+    """Per (supplier, material) sketches of PO numbers, built once per dataset version."""
+
+    def __init__(self, po_gr, precision=HLL_PRECISION):
+        po_ids, _ = pd.factorize(po_gr["po_number"])
+        sup_codes, suppliers = pd.factorize(po_gr["supplier_name"], sort=True)
+        mat_codes, materials = pd.factorize(po_gr["material_name"], sort=True)
+        self.supplier_names = np.asarray(suppliers.astype(str), dtype=object)
+        self.material_names = np.asarray(materials.astype(str), dtype=object)
+        self.n_po = int(po_ids.max()) + 1 if len(po_ids) else 0
+
+        # Distinct (cell, PO) pairs; cell = supplier x material
+        n_mat = max(len(materials), 1)
+        pairs = np.unique(
+            (sup_codes.astype(np.int64) * n_mat + mat_codes) * max(self.n_po, 1) + po_ids
+        )
+        cell_codes, cell_keys = pd.factorize(pairs // max(self.n_po, 1), sort=True)
+        self.supplier = (cell_keys // n_mat).astype(np.int32)  # supplier code per cell
+        self.material = (cell_keys % n_mat).astype(np.int32)   # material code per cell
+
+        # Exact: (cell, PO) pairs and PO count per cell
+        self.pair_cell = cell_codes.astype(np.int32)
+        self.pair_po = (pairs % max(self.n_po, 1)).astype(np.int32)
+        self.cell_size = np.bincount(cell_codes, minlength=len(cell_keys))
+        self.disjoint = len(self.pair_po) == self.n_po  # every PO in exactly one cell
+
+        # Approx: sparse HLL registers, the max rank per (cell, register).
+        # PO ids are hashed: sketches never outlive the dataset version.
+        self.precision = precision
+        hashes = pd.util.hash_array(self.pair_po.astype(np.uint64))
+        bucket = (hashes >> np.uint64(64 - precision)).astype(np.int64)
+        rank = _rank(hashes, precision)
+        key = self.pair_cell.astype(np.int64) << precision | bucket
+        order = np.lexsort((rank, key))
+        key, rank = key[order], rank[order]
+        last = np.append(key[1:] != key[:-1], True) if len(key) else np.zeros(0, dtype=bool)
+        self.hll_cell = (key[last] >> precision).astype(np.int32)
+        self.hll_bucket = (key[last] & ((1 << precision) - 1)).astype(np.uint16)
+        self.hll_rank = rank[last]
+
+    def __len__(self):
+        return len(self.supplier)
+
+    @property
+    def suppliers(self):
+        return self.supplier_names[self.supplier]
+
+    @property
+    def materials(self):
+        return self.material_names[self.material]
+
+    @property
+    def nbytes(self):
+        return sum(a.nbytes for a in (
+            self.supplier, self.material, self.pair_cell, self.pair_po, self.cell_size,
+            self.hll_cell, self.hll_bucket, self.hll_rank,
+        ))
+
+    @staticmethod
+    def _selected(names, values):
+        """Boolean per label code: label is in `values` (None = all)."""
+        if values is None:
+            return np.ones(len(names), dtype=bool)
+        return pd.Index(names).isin([str(v) for v in values])
+
+    def cells(self, supplier_filter=None, material_filter=None):
+        """Boolean mask over cells; filters are resolved on the label codes only."""
+        return (
+            self._selected(self.supplier_names, supplier_filter)[self.supplier]
+            & self._selected(self.material_names, material_filter)[self.material]
+        )
+
+    def _exact(self, cells, groups, n):
+        """Distinct POs per group; `groups` maps each cell to a group code."""
+        if self.disjoint:
+            return np.bincount(groups[cells], weights=self.cell_size[cells], minlength=n)
+        keep = cells[self.pair_cell]
+        pairs = np.unique(
+            groups[self.pair_cell[keep]].astype(np.int64) * self.n_po + self.pair_po[keep]
+        )
+        return np.bincount(pairs // self.n_po, minlength=n)
+
+    def _approx(self, cells, groups, n):
+        keep = cells[self.hll_cell]
+        m = 1 << self.precision
+        registers = np.zeros(n * m, dtype=np.uint8)
+        np.maximum.at(
+            registers,
+            groups[self.hll_cell[keep]].astype(np.intp) * m + self.hll_bucket[keep],
+            self.hll_rank[keep],
+        )
+        return np.array([
+            round(hll_estimate(r, self.precision)) if r.any() else 0
+            for r in registers.reshape(n, m)
+        ])
+
+    def _counts(self, cells, groups, n, mode):
+        fn = self._exact if mode == "exact" else self._approx
+        return fn(cells, groups, n).astype("int64")
+
+    def count(self, supplier_filter=None, material_filter=None, mode="exact"):
+        """Distinct PO numbers in the selection."""
+        cells = self.cells(supplier_filter, material_filter)
+        return int(self._counts(cells, np.zeros(len(self), dtype=np.intp), 1, mode)[0])
+
+    def count_by(self, key, supplier_filter=None, material_filter=None, mode="exact"):
+        """Distinct PO numbers per supplier_name or material_name within the selection."""
+        cells = self.cells(supplier_filter, material_filter)
+        if key == "supplier_name":
+            groups, names = self.supplier, self.supplier_names
+        else:
+            groups, names = self.material, self.material_names
+        counts = self._counts(cells, groups, len(names), mode)
+        present = np.bincount(groups[cells], minlength=len(names)) > 0
+        return pd.Series(counts[present], index=names[present], name="po_count", dtype="int64")
+
+
+def select_count_mode():
+    """Sidebar toggle shared by all pages (session state key po_count_mode)."""
+    import streamlit as st
+
+    return st.sidebar.radio(
+        "PO count",
+        options=list(COUNT_MODES),
+        format_func=COUNT_MODES.get,
+        key="po_count_mode",
+    )
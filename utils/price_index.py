@@ -0,0 +1,126 @@
+import numpy as np
+import pandas as pd
+
+from utils.metrics import safe_ratio
+
+# --------------------------------------------------
+# Purchase price variance (PPV) over unit_price history.
+# PO lines are sorted by (supplier, material, po_date) once per dataset
+# version. The trailing baseline of each line is the rolling median /
+# variance of the previous PRICE_WINDOW POs in the same cell, so PPV and
+# anomaly flags on a filter change are masks and bincounts only.
+# --------------------------------------------------
+PRICE_WINDOW = 6          # trailing POs per supplier x material
+PRICE_MIN_PERIODS = 3     # POs needed before a baseline exists
+ANOMALY_PCT = 0.25        # price above baseline median by more than this ...
+ANOMALY_Z = 2.0           # ... and by more than this many trailing std devs
+
+
+class PriceHistoryIndex:
+    """Per (supplier, material) price series with precomputed trailing baselines."""
+
+    def __init__(self, po, window=PRICE_WINDOW, min_periods=PRICE_MIN_PERIODS):
+        lines = po[po["po_date"].notna()]
+        cell_codes, cell_keys = pd.factorize(pd.MultiIndex.from_arrays([
+            lines["supplier_name"].astype(str), lines["material_name"].astype(str)
+        ]))
+        days = lines["po_date"].to_numpy().astype("datetime64[D]").astype(np.int64)
+        order = np.lexsort((days, cell_codes))
+
+        self.cell = cell_codes[order]
+        self.rows = lines[
+            ["po_number", "po_date", "supplier_name", "material_name", "ordered_qty", "unit_price"]
+        ].iloc[order].reset_index(drop=True)
+        self.suppliers = cell_keys.get_level_values(0).to_numpy()
+        self.materials = cell_keys.get_level_values(1).to_numpy()
+
+        # Trailing window excludes the line itself (shift by one within the cell)
+        price = self.rows["unit_price"].astype("float64")
+        prior = price.groupby(self.cell, sort=False).shift(1)
+        rolling = prior.groupby(self.cell, sort=False).rolling(window, min_periods=min_periods)
+        self.baseline = rolling.median().droplevel(0).sort_index().to_numpy()
+        self.variance = rolling.var().droplevel(0).sort_index().to_numpy()
+
+        self.price = price.to_numpy()
+        self.qty = self.rows["ordered_qty"].to_numpy(dtype="float64")
+        self.ppv = (self.price - self.baseline) * self.qty
+
+        # Group codes for the PPV breakdowns, factorized once
+        self.groups = {
+            key: pd.factorize(values, sort=True)
+            for key, values in [
+                ("supplier_name", self.rows["supplier_name"].astype(str)),
+                ("material_name", self.rows["material_name"].astype(str)),
+                ("month", self.rows["po_date"].dt.to_period("M").astype(str)),
+            ]
+        }
+
+    def __len__(self):
+        return len(self.price)
+
+    def select(self, supplier_filter=None, material_filter=None):
+        """Boolean mask over the sorted PO lines (None = no filter)."""
+        if supplier_filter is None and material_filter is None:
+            return None
+        cells = np.ones(len(self.suppliers), dtype=bool)
+        if supplier_filter is not None:
+            cells &= np.isin(self.suppliers, [str(s) for s in supplier_filter])
+        if material_filter is not None:
+            cells &= np.isin(self.materials, [str(m) for m in material_filter])
+        return cells[self.cell]
+
+    def _scope(self, mask):
+        """Lines in the selection that have a trailing baseline."""
+        has_baseline = ~np.isnan(self.baseline)
+        return has_baseline if mask is None else has_baseline & mask
+
+    def anomaly_flags(self, pct=ANOMALY_PCT, z=ANOMALY_Z):
+        """Lines priced well above their trailing baseline (vectorized, all lines)."""
+        excess = self.price - self.baseline
+        std = np.sqrt(np.nan_to_num(self.variance))
+        with np.errstate(invalid="ignore"):
+            return (excess > pct * self.baseline) & (excess > z * std)
+
+    def ppv_kpis(self, mask=None, pct=ANOMALY_PCT, z=ANOMALY_Z):
+        scope = self._scope(mask)
+        baseline_spend = float((self.baseline[scope] * self.qty[scope]).sum())
+        ppv = float(self.ppv[scope].sum())
+        return {
+            "ppv": ppv,
+            "ppv_rate": ppv / baseline_spend if baseline_spend else 0.0,
+            "price_anomalies": int((self.anomaly_flags(pct, z) & scope).sum()),
+        }
+
+    def ppv_by(self, key, mask=None, pct=ANOMALY_PCT, z=ANOMALY_Z):
+        """PPV, PPV rate and anomaly count per supplier_name / material_name / month."""
+        scope = self._scope(mask)
+        codes, uniques = self.groups[key]
+        codes = codes[scope]
+        n = len(uniques)
+
+        ppv = np.bincount(codes, weights=self.ppv[scope], minlength=n)
+        baseline_spend = np.bincount(
+            codes, weights=(self.baseline * self.qty)[scope], minlength=n
+        )
+        anomalies = np.bincount(codes, weights=self.anomaly_flags(pct, z)[scope], minlength=n)
+        out = pd.DataFrame({
+            key: uniques,
+            "ppv": ppv,
+            "ppv_rate": safe_ratio(ppv, baseline_spend),
+            "price_anomalies": anomalies.astype("int64"),
+        })[np.bincount(codes, minlength=n) > 0].reset_index(drop=True)
+        return out if key == "month" else out.sort_values("ppv", ascending=False, ignore_index=True)
+
+    def anomalies(self, mask=None, pct=ANOMALY_PCT, z=ANOMALY_Z):
+        """Flagged PO lines, largest price variance first."""
+        idx = np.flatnonzero(self.anomaly_flags(pct, z) & self._scope(mask))
+        return (
+            self.rows.iloc[idx]
+            .assign(
+                baseline_price=self.baseline[idx],
+                price_increase=self.price[idx] / self.baseline[idx] - 1,
+                ppv=self.ppv[idx],
+            )
+            .sort_values("ppv", ascending=False)
+            .reset_index(drop=True)
+        )
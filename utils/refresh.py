@@ -0,0 +1,107 @@
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+
+logger = logging.getLogger(__name__)
+
+REFRESH_INTERVAL = 30  # seconds between data source checks
+
+
+@dataclass(frozen=True)
+class Dataset:
+    """One immutable, fully built version of the data (raw + derived tables)."""
+    version: int
+    source_stamp: tuple
+    loaded_at: float
+    po: object
+    gr: object
+    inv: object
+    cons: object
+    derived: dict = field(default_factory=dict)
+
+    @property
+    def tables(self):
+        return self.po, self.gr, self.inv, self.cons
+
+
+def file_stamp(path):
+    info = os.stat(path)
+    return (info.st_mtime_ns, info.st_size)
+
+
+class DatasetStore:
+    """
+    Holds the current Dataset and rebuilds the next version in a background
+    thread whenever the source changes. The new version is published with a
+    single reference swap, so readers always get a complete snapshot.
+    """
+
+    def __init__(self, builder, path, interval=REFRESH_INTERVAL, stamp=file_stamp):
+        self._builder = builder
+        self._path = path
+        self._stamp = stamp
+        self._interval = interval
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._listeners = []
+        self._current = self._build(version=1)
+
+    def _build(self, version):
+        stamp = self._stamp(self._path)
+        po, gr, inv, cons, derived = self._builder(self._path)
+        return Dataset(
+            version=version,
+            source_stamp=stamp,
+            loaded_at=time.time(),
+            po=po, gr=gr, inv=inv, cons=cons,
+            derived=derived,
+        )
+
+    def current(self):
+        return self._current
+
+    def subscribe(self, callback):
+        """Call `callback(previous, current)` after each published version."""
+        self._listeners.append(callback)
+
+    def refresh(self, force=False):
+        """Build the next version off the request path; returns True if swapped."""
+        with self._lock:
+            current = self._current
+            try:
+                if not force and self._stamp(self._path) == current.source_stamp:
+                    return False
+                nxt = self._build(version=current.version + 1)
+            except Exception:
+                # Keep serving the last good version
+                logger.exception("Dataset refresh failed for %s", self._path)
+                return False
+
+            self._current = nxt
+            logger.info("Dataset version %s published", nxt.version)
+
+        for callback in self._listeners:
+            try:
+                callback(current, nxt)
+            except Exception:
+                logger.exception("Dataset listener failed")
+        return True
+
+    def _run(self):
+        while not self._stop.wait(self._interval):
+            self.refresh()
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(
+                target=self._run, name="dataset-refresher", daemon=True
+            )
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
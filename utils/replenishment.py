@@ -0,0 +1,107 @@
+from statistics import NormalDist
+
+import numpy as np
+import pandas as pd
+
+from utils.metrics import safe_ratio
+
+# --------------------------------------------------
+# Safety stock / reorder point / order quantity per material.
+#   SS  = z * sqrt(L * sd_d^2 + d^2 * sd_L^2)
+#   ROP = d * L + SS
+#   EOQ = sqrt(2 * D * S / H)
+# Demand stats come from Material_Consumption, lead time stats from the
+# PO + GR join. Inputs are aggregated once per dataset version; the
+# policy itself is pure NumPy over all materials.
+# --------------------------------------------------
+DEFAULT_SERVICE_LEVEL = 0.95
+ORDER_COST = 500_000      # Rp per purchase order
+HOLDING_RATE = 0.25       # yearly holding cost as share of unit price
+
+
+def replenishment_inputs(cons, po_gr, inv):
+    """Per-material demand and lead-time statistics."""
+    # Daily demand, including zero-consumption days over the history span
+    day = cons["production_date"].dt.normalize()
+    n_days = max((day.max() - day.min()).days + 1, 1) if len(day) else 1
+
+    daily = (
+        pd.DataFrame({
+            "material_id": cons["material_id"].astype(str),
+            "day": day,
+            "consumed_qty": cons["consumed_qty"],
+        })
+        .groupby(["material_id", "day"])["consumed_qty"]
+        .sum()
+        .astype("float64")
+    )
+    demand = (
+        pd.DataFrame({"q": daily, "q2": daily ** 2})
+        .groupby(level="material_id")
+        .sum()
+    )
+    mean_d = demand["q"] / n_days
+    var_d = (demand["q2"] - n_days * mean_d ** 2) / max(n_days - 1, 1)
+
+    # Lead time (PO -> last goods receipt)
+    lt = pd.DataFrame({
+        "material_id": po_gr["material_id"].astype(str),
+        "lead_time": (po_gr["gr_date"] - po_gr["po_date"]).dt.days,
+        "unit_price": po_gr["unit_price"].astype("float64"),
+    })
+    lead = lt.groupby("material_id").agg(
+        avg_lead_time=("lead_time", "mean"),
+        lead_time_std=("lead_time", "std"),
+        unit_price=("unit_price", "mean"),
+    )
+
+    # Latest inventory snapshot per material
+    latest = (
+        inv.sort_values("date")
+        .drop_duplicates("material_id", keep="last")
+        .astype({"material_id": str, "material_name": str})
+        .set_index("material_id")
+    )
+
+    out = pd.DataFrame({
+        "avg_daily_demand": mean_d,
+        "demand_std": np.sqrt(var_d.clip(lower=0)),
+    }).join(lead, how="outer").join(
+        latest[["material_name", "stock_on_hand", "stock_in_transit", "safety_stock"]],
+        how="left"
+    )
+    out.index.name = "material_id"
+    return out.fillna({"avg_daily_demand": 0, "demand_std": 0, "lead_time_std": 0}).reset_index()
+
+
+def reorder_policy(inputs, service_level=DEFAULT_SERVICE_LEVEL,
+                   order_cost=ORDER_COST, holding_rate=HOLDING_RATE):
+    z = NormalDist().inv_cdf(service_level)
+
+    d = inputs["avg_daily_demand"].to_numpy(dtype="float64")
+    sd_d = inputs["demand_std"].to_numpy(dtype="float64")
+    lead = inputs["avg_lead_time"].to_numpy(dtype="float64")
+    sd_l = inputs["lead_time_std"].to_numpy(dtype="float64")
+    price = inputs["unit_price"].to_numpy(dtype="float64")
+
+    safety_stock = z * np.sqrt(lead * sd_d ** 2 + d ** 2 * sd_l ** 2)
+    reorder_point = d * lead + safety_stock
+    order_qty = np.sqrt(safe_ratio(2 * d * 365 * order_cost, holding_rate * price))
+
+    position = (
+        inputs["stock_on_hand"].to_numpy(dtype="float64") +
+        inputs["stock_in_transit"].to_numpy(dtype="float64")
+    )
+
+    return pd.DataFrame({
+        "material_id": inputs["material_id"],
+        "material_name": inputs["material_name"],
+        "avg_daily_demand": d,
+        "avg_lead_time": lead,
+        "current_safety_stock": inputs["safety_stock"],
+        "recommended_safety_stock": np.ceil(safety_stock),
+        "reorder_point": np.ceil(reorder_point),
+        "order_qty": np.ceil(order_qty),
+        "inventory_position": position,
+        "reorder_now": position <= reorder_point,
+    })
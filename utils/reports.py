@@ -0,0 +1,256 @@
+import argparse
+import html
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import pandas as pd
+
+from utils.figures import (
+    aging_fig,
+    inventory_health_fig,
+    production_exposure_fig,
+    spend_trend_fig,
+    supplier_lead_time_fig,
+    supplier_segmentation_fig,
+)
+from utils.metrics import (
+    TARGET_LT,
+    classify_suppliers,
+    executive_kpis,
+    filter_by_material,
+    filter_po,
+    inventory_actions,
+    inventory_kpis,
+    inventory_ranking,
+    inventory_risk,
+    lead_time_by,
+    lead_time_kpis,
+    po_lead_time,
+    production_actions,
+    production_impact,
+    production_kpis,
+    production_ranking,
+    spend_trend,
+    supplier_actions,
+    supplier_kpis,
+    supplier_metrics,
+    supplier_ranking,
+)
+
+logger = logging.getLogger(__name__)
+
+REPORT_DIR = "reports"
+SEGMENTS = ["All", "Strategic", "Bottleneck", "Leverage", "Routine"]
+HTML_TABLE_ROWS = 20
+
+# --------------------------------------------------
+# DATASET (one per worker process and tenant)
+# --------------------------------------------------
+_datasets = {}
+
+
+def _dataset(tenant):
+    if tenant not in _datasets:
+        from utils.data_loader import build_dataset, build_tenant_dataset
+        from utils.partitions import catalog_path
+
+        if tenant is None:
+            _datasets[tenant] = build_dataset()
+        else:
+            _datasets[tenant] = build_tenant_dataset(catalog_path(), tenant)
+    return _datasets[tenant]
+
+
+def segment_filters(po_gr, segment):
+    """Supplier and material selection of one supplier segment (None = all)."""
+    if segment == "All":
+        return None, None
+    supplier_df = supplier_metrics(po_gr)
+    supplier_df["segment"] = classify_suppliers(supplier_df)
+    suppliers = list(supplier_df.loc[supplier_df["segment"] == segment, "supplier_name"])
+    materials = list(po_gr.loc[po_gr["supplier_name"].isin(suppliers), "material_name"].unique())
+    return suppliers, materials
+
+
+# --------------------------------------------------
+# PAGE SECTIONS: (title, kpis, tables, figures)
+# --------------------------------------------------
+def build_sections(tenant, segment, as_of):
+    po, gr, inv, cons, derived = _dataset(tenant)
+    suppliers, materials = segment_filters(derived["po_gr"], segment)
+
+    po_f = filter_po(po, suppliers, materials)
+    po_gr = filter_po(derived["po_gr"], suppliers, materials)
+    inv_f = inv if materials is None else filter_by_material(inv, materials)
+    cons_f = cons if materials is None else filter_by_material(cons, materials)
+
+    sections = []
+
+    sections.append((
+        "Executive Overview",
+        executive_kpis(po_f, po_gr, inv_f),
+        {},
+        {"spend_trend": spend_trend_fig(spend_trend(po_f))},
+    ))
+
+    supplier_df = supplier_metrics(po_gr)
+    supplier_df["segment"] = classify_suppliers(supplier_df)
+    sections.append((
+        "Supplier Performance",
+        supplier_kpis(supplier_df),
+        {
+            "supplier_ranking": supplier_ranking(supplier_df),
+            "supplier_actions": supplier_actions(supplier_df),
+        },
+        {"supplier_segmentation": supplier_segmentation_fig(supplier_df)},
+    ))
+
+    index = derived["open_po_index"]
+    mask = index.select(suppliers, materials)
+    lt = po_lead_time(po_gr)
+    supplier_lt = lead_time_by(lt, "supplier_name")
+    sections.append((
+        "PO Lead Time",
+        lead_time_kpis(lt, index, mask, as_of),
+        {
+            "material_bottleneck": lead_time_by(lt, "material_name")
+            .sort_values("late_rate", ascending=False),
+            "overdue_open_po": index.overdue(as_of, TARGET_LT, mask),
+        },
+        {
+            "open_po_aging": aging_fig(index.aging_buckets(as_of, mask)),
+            "supplier_lead_time": supplier_lead_time_fig(supplier_lt),
+        },
+    ))
+
+    inv_risk = inventory_risk(inv_f, cons_f, derived["demand_forecast"])
+    sections.append((
+        "Inventory Risk",
+        inventory_kpis(inv_risk),
+        {
+            "inventory_ranking": inventory_ranking(inv_risk),
+            "inventory_actions": inventory_actions(inv_risk),
+        },
+        {"inventory_health": inventory_health_fig(inv_risk)},
+    ))
+
+    impact_df = production_impact(
+        derived["exposure_graph"].exposure(materials), inv_f, derived["demand_forecast"]
+    )
+    sections.append((
+        "Production Impact",
+        production_kpis(impact_df),
+        {
+            "production_ranking": production_ranking(impact_df),
+            "production_actions": production_actions(impact_df),
+        },
+        {"production_exposure": production_exposure_fig(impact_df)},
+    ))
+
+    return sections
+
+
+# --------------------------------------------------
+# WRITERS
+# --------------------------------------------------
+def write_html(path, title, sections):
+    parts = [f"<html><head><meta charset='utf-8'><title>{html.escape(title)}</title></head><body>",
+             f"<h1>{html.escape(title)}</h1>"]
+    plotlyjs = "cdn"
+    for name, kpis, tables, figures in sections:
+        parts.append(f"<h2>{html.escape(name)}</h2>")
+        parts.append(pd.Series(kpis, name="value").to_frame().to_html())
+        for fig in figures.values():
+            parts.append(fig.to_html(full_html=False, include_plotlyjs=plotlyjs))
+            plotlyjs = False
+        for table_name, df in tables.items():
+            parts.append(f"<h3>{html.escape(table_name)}</h3>")
+            parts.append(df.head(HTML_TABLE_ROWS).to_html(index=False))
+    parts.append("</body></html>")
+
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("\n".join(parts))
+
+
+def write_xlsx(path, sections):
+    kpi_rows = [
+        {"page": name, "kpi": k, "value": v}
+        for name, kpis, _, _ in sections
+        for k, v in kpis.items()
+    ]
+    with pd.ExcelWriter(path, engine="openpyxl") as writer:
+        pd.DataFrame(kpi_rows).to_excel(writer, sheet_name="KPIs", index=False)
+        for _, _, tables, _ in sections:
+            for table_name, df in tables.items():
+                df.to_excel(writer, sheet_name=table_name[:31], index=False)
+
+
+def write_images(out_dir, sections):
+    # Needs kaleido; skipped quietly when the image engine is unavailable
+    for _, _, _, figures in sections:
+        for fig_name, fig in figures.items():
+            try:
+                fig.write_image(os.path.join(out_dir, f"{fig_name}.png"))
+            except Exception as exc:
+                logger.info("Image export skipped (%s)", exc)
+                return
+
+
+def render_variant(tenant, segment, out_root, as_of, images=False):
+    out_dir = os.path.join(out_root, tenant or "default", segment)
+    os.makedirs(out_dir, exist_ok=True)
+
+    sections = build_sections(tenant, segment, as_of)
+    title = f"Purchasing Report – {tenant or 'All Plants'} – {segment} suppliers"
+    write_html(os.path.join(out_dir, "report.html"), title, sections)
+    write_xlsx(os.path.join(out_dir, "report.xlsx"), sections)
+    if images:
+        write_images(out_dir, sections)
+
+    return out_dir
+
+
+# --------------------------------------------------
+# BATCH
+# --------------------------------------------------
+def generate_reports(tenants=(None,), segments=SEGMENTS, out_root=REPORT_DIR,
+                     as_of=None, images=False, workers=None):
+    as_of = pd.Timestamp(as_of or pd.Timestamp.today().normalize())
+    variants = [(t, s) for t in tenants for s in segments]
+
+    written = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [
+            pool.submit(render_variant, t, s, out_root, as_of, images)
+            for t, s in variants
+        ]
+        for future in as_completed(futures):
+            written.append(future.result())
+    return written
+
+
+def main():
+    from utils.partitions import list_tenants
+
+    parser = argparse.ArgumentParser(description="Export all dashboard pages to HTML/XLSX.")
+    parser.add_argument("--out", default=REPORT_DIR)
+    parser.add_argument("--as-of", default=None)
+    parser.add_argument("--segments", nargs="+", default=SEGMENTS)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--images", action="store_true")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+
+    tenants = [t["plant"] for t in list_tenants()] or [None]
+    start = time.time()
+    written = generate_reports(
+        tenants, args.segments, args.out, args.as_of, args.images, args.workers
+    )
+    print(f"{len(written)} reports written to {args.out} in {time.time() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
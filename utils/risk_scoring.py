@@ -0,0 +1,156 @@
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+
+import numpy as np
+
+from utils.metrics import (
+    HIGH_RISK_SCORE,
+    HIGH_RISK_SUPPLIER,
+    IMPACT_RISK_WEIGHTS,
+    INVENTORY_RISK_WEIGHTS,
+    LOW_RISK_SCORE,
+    STRATEGIC_DEPENDENCY,
+    SUPPLIER_RISK_WEIGHTS,
+    impact_risk_components,
+    inventory_risk_components,
+    safe_ratio,
+    supplier_risk_components,
+)
+
+# --------------------------------------------------
+# Unified composite risk scoring for pages 2, 4 and 5.
+# The metric-stage frame and its normalized component matrix are cached
+# per filter selection in the dataset version's derived tables, so a
+# weight change is one matrix-vector product plus a re-rank; the metric
+# stage does not run again. The cache is bounded by the total bytes of
+# the cached frames and matrices.
+# --------------------------------------------------
+COMPONENT_CACHE_BYTES = 64 * 2**20
+
+RISK_MODELS = {
+    "supplier": {
+        "score": "risk_score",
+        "components": ["Late Delivery Rate", "Rejection Rate", "Relative Lead Time"],
+        "weights": SUPPLIER_RISK_WEIGHTS,
+        "thresholds": {
+            "strategic_dependency": ("Strategic: dependency >", STRATEGIC_DEPENDENCY),
+            "low_risk": ("Low risk: score <", LOW_RISK_SCORE),
+            "high_risk": ("High risk: score >", HIGH_RISK_SUPPLIER),
+        },
+    },
+    "inventory": {
+        "score": "inventory_risk_score",
+        "components": ["Coverage Gap (DOI)", "Consumption Volatility"],
+        "weights": INVENTORY_RISK_WEIGHTS,
+        "thresholds": {"high_risk": ("High risk: score >", HIGH_RISK_SCORE)},
+    },
+    "impact": {
+        "score": "impact_risk_score",
+        "components": ["Stockout Urgency", "Production Loss"],
+        "weights": IMPACT_RISK_WEIGHTS,
+        "thresholds": {"high_risk": ("High risk: score >", HIGH_RISK_SCORE)},
+    },
+}
+
+
+def risk_components(frame, model):
+    """Normalized component matrix of a metric-stage result (any backend)."""
+    if model == "supplier":
+        return supplier_risk_components(
+            frame["late_delivery_rate"], frame["rejection_rate"], frame["avg_lead_time"]
+        )
+    if model == "inventory":
+        # Raw DOI (NaN without consumption), as in metrics.inventory_risk
+        doi = safe_ratio(frame["stock_on_hand"], frame["daily_consumption"])
+        return inventory_risk_components(doi, frame["consumption_volatility"])
+    if model == "impact":
+        return impact_risk_components(frame["days_to_stockout"], frame["production_loss_units"])
+    raise KeyError(model)
+
+
+class RiskComponentCache:
+    """Metric-stage results and their component matrices per filter selection, LRU-bounded by bytes."""
+
+    def __init__(self, max_bytes=COMPONENT_CACHE_BYTES):
+        self._entries = OrderedDict()
+        self._nbytes = 0
+        self._max_bytes = max_bytes
+        self._lock = threading.Lock()
+
+    @property
+    def nbytes(self):
+        return self._nbytes
+
+    def get(self, model, selection, compute):
+        """(frame, components) for `selection`; `compute()` runs only on a miss."""
+        key = (model, selection)
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return self._entries[key][0]
+
+        frame = compute()
+        entry = frame, risk_components(frame, model)
+        size = int(frame.memory_usage(index=True, deep=True).sum()) + entry[1].nbytes
+        with self._lock:
+            self._evict(key)
+            self._entries[key] = entry, size
+            self._nbytes += size
+            while self._nbytes > self._max_bytes and len(self._entries) > 1:
+                self._evict(next(iter(self._entries)))
+        return entry
+
+    def _evict(self, key):
+        _, size = self._entries.pop(key, (None, 0))
+        self._nbytes -= size
+
+
+def selection_key(*filters):
+    """Hashable key of the page filters (order-insensitive multiselects)."""
+    return tuple(
+        tuple(sorted(map(str, f))) if isinstance(f, (list, tuple)) else f
+        for f in filters
+    )
+
+
+@dataclass(frozen=True)
+class RiskSettings:
+    model: str
+    weights: tuple
+    thresholds: dict
+
+    @property
+    def is_default(self):
+        """Scores comparable with stored snapshots (default weights and cutoffs)."""
+        spec = RISK_MODELS[self.model]
+        return np.allclose(self.weights, spec["weights"]) and all(
+            np.isclose(self.thresholds[name], default)
+            for name, (_, default) in spec["thresholds"].items()
+        )
+
+
+def score(frame, components, settings):
+    """Frame with the composite score re-computed for `settings.weights`."""
+    spec = RISK_MODELS[settings.model]
+    values = components @ np.asarray(settings.weights, dtype="float64")
+    if settings.model == "inventory":
+        values = np.nan_to_num(values)
+    return frame.assign(**{spec["score"]: values.astype(frame[spec["score"]].dtype)})
+
+
+def risk_controls(model):
+    """Sidebar weights and segmentation thresholds (session keys risk_<model>_*)."""
+    import streamlit as st
+
+    spec = RISK_MODELS[model]
+    with st.sidebar.expander("Risk Scoring Weights"):
+        weights = tuple(
+            st.slider(label, 0.0, 1.0, float(default), step=0.05, key=f"risk_{model}_w{i}")
+            for i, (label, default) in enumerate(zip(spec["components"], spec["weights"]))
+        )
+        thresholds = {
+            name: st.slider(label, 0.0, 1.0, float(default), step=0.05, key=f"risk_{model}_{name}")
+            for name, (label, default) in spec["thresholds"].items()
+        }
+    return RiskSettings(model, weights, thresholds)
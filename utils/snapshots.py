@@ -0,0 +1,382 @@
+import argparse
+import functools
+import json
+import logging
+import os
+import shutil
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from utils.metrics import HIGH_RISK_SCORE, STOCKOUT_DAYS, late_flag, supplier_metrics
+
+logger = logging.getLogger(__name__)
+
+# --------------------------------------------------
+# Versioned dataset snapshots:
+#   <root>/<tenant>/catalog.json
+#   <root>/<tenant>/<snapshot_id>/tables/<table>.parquet
+#   <root>/<tenant>/<snapshot_id>/aggregates/<name>.parquet
+# Each snapshot stores small per-version aggregates at the grain of the
+# page filters (supplier x material, material x product). KPIs of any
+# stored version, and deltas between versions, are computed from those
+# aggregates only; raw rows are never rescanned for a comparison.
+# Aggregates have no time grain: a delta is the change between two
+# snapshots of the whole dataset, not a month-over-month change.
+# Only the newest SNAPSHOT_KEEP snapshots per tenant are kept.
+# --------------------------------------------------
+SNAPSHOT_ROOT_ENV = "SNAPSHOT_ROOT"
+SNAPSHOT_ROOT = os.environ.get(SNAPSHOT_ROOT_ENV, "data/snapshots")
+CATALOG_FILE = "catalog.json"
+SNAPSHOT_KEEP = 20
+
+# One writer thread: snapshot writes stay off the request path and
+# catalog updates never interleave
+_writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="snapshot-writer")
+
+TABLES = {
+    "Purchase_Order": "po",
+    "Goods_Receipt": "gr",
+    "Inventory": "inv",
+    "Material_Consumption": "cons",
+}
+
+
+# --------------------------------------------------
+# PER-VERSION AGGREGATES
+# --------------------------------------------------
+def content_hash(po, gr, inv, cons):
+    h = 0
+    for df in (po, gr, inv, cons):
+        h = (h * 31 + int(pd.util.hash_pandas_object(df, index=False).sum())) % 2 ** 64
+    return f"{h:016x}"
+
+
+def kpi_aggregates(po_gr, inv_risk, impact):
+    """
+    Additive KPI building blocks of one dataset version, from the
+    version's unfiltered `inventory_risk` and `production_impact` frames.
+    """
+    # PO side: supplier x material (po_gr has one row per PO)
+    lead_time = (po_gr["gr_date"] - po_gr["po_date"]).dt.days
+    delivered = po_gr["gr_date"].notna()
+    po_agg = (
+        pd.DataFrame({
+            "supplier_name": po_gr["supplier_name"].astype(str),
+            "material_name": po_gr["material_name"].astype(str),
+            "rows": 1,
+            "spend": po_gr["spend"],
+            "open_po": (po_gr["po_status"] == "Open").astype("int64"),
+            "on_time": (delivered & (po_gr["gr_date"] <= po_gr["expected_delivery_date"])).astype("int64"),
+            "late": late_flag(po_gr).astype("int64"),
+            "lead_time_sum": lead_time.fillna(0),
+            "lead_time_n": lead_time.notna().astype("int64"),
+            "rejected": po_gr["rejected_qty"].astype("float64").fillna(0),
+            "received": po_gr["received_qty"].astype("float64").fillna(0),
+        })
+        .groupby(["supplier_name", "material_name"])
+        .sum()
+        .reset_index()
+    )
+
+    # Inventory side: material
+    inv_agg = (
+        pd.DataFrame({
+            "material_name": inv_risk["material_name"].astype(str),
+            "rows": 1,
+            "doi_sum": inv_risk["days_of_inventory"].astype("float64"),
+            "below_ss": (inv_risk["stock_on_hand"] < inv_risk["safety_stock"]).astype("int64"),
+            "risk_sum": inv_risk["inventory_risk_score"].astype("float64"),
+            "high_risk": (inv_risk["inventory_risk_score"] > HIGH_RISK_SCORE).astype("int64"),
+        })
+        .groupby("material_name")
+        .sum()
+        .reset_index()
+    )
+
+    # Production side: material x product
+    dts = impact["days_to_stockout"]
+    impact_agg = (
+        pd.DataFrame({
+            "material_name": impact["material_name"].astype(str),
+            "product_name": impact["product_name"].astype(str),
+            "loss_units": impact["production_loss_units"],
+            "revenue_loss": impact["estimated_revenue_loss"],
+            "dts_sum": dts.fillna(0),
+            "dts_n": dts.notna().astype("int64"),
+            "at_risk": (dts < STOCKOUT_DAYS).astype("int64"),
+        })
+        .groupby(["material_name", "product_name"])
+        .sum()
+        .reset_index()
+    )
+
+    supplier_scores = supplier_metrics(po_gr)[["supplier_name", "risk_score"]].astype(
+        {"supplier_name": str}
+    )
+    material_scores = (
+        inv_agg.assign(risk_score=inv_agg["risk_sum"] / inv_agg["rows"])
+        [["material_name", "risk_score"]]
+    )
+
+    return {
+        "po": po_agg,
+        "inventory": inv_agg,
+        "impact": impact_agg,
+        "supplier_scores": supplier_scores,
+        "material_scores": material_scores,
+    }
+
+
+def _keep(df, col, values):
+    return df if values is None else df[df[col].isin([str(v) for v in values])]
+
+
+def _ratio(num, den):
+    return float(num / den) if den > 0 else 0.0
+
+
+def snapshot_kpis(aggs, suppliers=None, materials=None, products=None):
+    """All page KPIs of one version for the given filters (None = all)."""
+    po = _keep(_keep(aggs["po"], "supplier_name", suppliers), "material_name", materials)
+    inv = _keep(aggs["inventory"], "material_name", materials)
+    impact = _keep(_keep(aggs["impact"], "material_name", materials), "product_name", products)
+
+    # Page 2 averages per-supplier ratios over suppliers
+    by_supplier = po.groupby("supplier_name")[
+        ["rows", "late", "lead_time_sum", "lead_time_n", "rejected", "received"]
+    ].sum()
+    has_lt = by_supplier["lead_time_n"] > 0
+
+    return {
+        "total_spend": float(po["spend"].sum()),
+        "open_po": int(po["open_po"].sum()),
+        "otd_rate": _ratio(po["on_time"].sum(), po["rows"].sum()),
+        "materials_below_ss": int(inv["below_ss"].sum()),
+
+        "avg_lead_time": float(
+            (by_supplier["lead_time_sum"][has_lt] / by_supplier["lead_time_n"][has_lt]).mean()
+        ),
+        "avg_late_delivery_rate": float((by_supplier["late"] / by_supplier["rows"]).mean()),
+        "avg_rejection_rate": float(np.where(
+            by_supplier["received"] > 0,
+            by_supplier["rejected"] / by_supplier["received"].where(by_supplier["received"] > 0, 1),
+            0
+        ).mean()) if len(by_supplier) else float("nan"),
+
+        "po_avg_lead_time": _ratio(po["lead_time_sum"].sum(), po["lead_time_n"].sum()),
+        "late_po_count": int(po["late"].sum()),
+        "late_po_rate": _ratio(po["late"].sum(), po["rows"].sum()),
+
+        "avg_days_of_inventory": _ratio(inv["doi_sum"].sum(), inv["rows"].sum()),
+        "avg_inventory_risk_score": _ratio(inv["risk_sum"].sum(), inv["rows"].sum()),
+        "high_risk_materials": int(inv["high_risk"].sum()),
+
+        "materials_at_risk": int(impact.loc[impact["at_risk"] > 0, "material_name"].nunique()),
+        "production_loss_units": float(impact["loss_units"].sum()),
+        "estimated_revenue_loss": float(impact["revenue_loss"].sum()),
+        "avg_days_to_stockout": _ratio(impact["dts_sum"].sum(), impact["dts_n"].sum()),
+    }
+
+
+def kpi_deltas(current, baseline, suppliers=None, materials=None, products=None):
+    """KPI change current - baseline (snapshot to snapshot); empty when there is no baseline."""
+    if baseline is None:
+        return {}
+    cur = snapshot_kpis(current, suppliers, materials, products)
+    base = snapshot_kpis(baseline, suppliers, materials, products)
+    return {k: cur[k] - base[k] for k in cur}
+
+
+def delta(deltas, key, fmt="{:+,.1f}"):
+    """Formatted delta for st.metric (None hides it)."""
+    if key not in deltas or pd.isna(deltas[key]):
+        return None
+    return fmt.format(deltas[key])
+
+
+def unfiltered(selected, options):
+    """True when a page filter keeps every option.
+
+    Risk scores are normalized over the selected rows, while the stored
+    scores are normalized over the whole version: risk deltas and movers
+    are only comparable without a filter.
+    """
+    return {str(o) for o in options} <= {str(s) for s in selected}
+
+
+def movers(current, baseline, table, key, n=5):
+    """Largest risk score changes per supplier / material."""
+    if baseline is None:
+        return pd.DataFrame(columns=[key, "risk_score", "previous_risk_score", "change"])
+    out = current[table].merge(
+        baseline[table], on=key, how="left", suffixes=("", "_prev")
+    ).rename(columns={"risk_score_prev": "previous_risk_score"})
+    out["change"] = out["risk_score"] - out["previous_risk_score"]
+    return (
+        out.reindex(out["change"].abs().sort_values(ascending=False).index)
+        .dropna(subset=["change"])
+        .head(n)
+        .reset_index(drop=True)
+    )
+
+
+# --------------------------------------------------
+# STORAGE
+# --------------------------------------------------
+def tenant_root(tenant=None, root=SNAPSHOT_ROOT):
+    return os.path.join(root, tenant or "default")
+
+
+def list_snapshots(tenant=None, root=SNAPSHOT_ROOT):
+    """Catalog entries, newest first."""
+    path = os.path.join(tenant_root(tenant, root), CATALOG_FILE)
+    if not os.path.exists(path):
+        return []
+    with open(path, encoding="utf-8") as f:
+        entries = json.load(f)["snapshots"]
+    return sorted(entries, key=lambda e: e["created_at"], reverse=True)
+
+
+def _write_catalog(entries, tenant, root):
+    path = os.path.join(tenant_root(tenant, root), CATALOG_FILE)
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({"snapshots": entries}, f, indent=1)
+    # Atomic replace: readers never see a half-written catalog
+    os.replace(tmp, path)
+
+
+def _prune(entries, tenant, root, keep):
+    """Keep the newest `keep` entries; returns them. Dropped snapshot dirs are deleted."""
+    entries = sorted(entries, key=lambda e: e["created_at"], reverse=True)
+    kept, dropped = entries[:keep], entries[keep:]
+    # Catalog first: readers never see an entry whose directory is gone
+    _write_catalog(kept, tenant, root)
+    for entry in dropped:
+        shutil.rmtree(os.path.join(tenant_root(tenant, root), entry["snapshot_id"]), ignore_errors=True)
+        logger.info("Snapshot %s pruned", entry["snapshot_id"])
+    return kept
+
+
+def save_snapshot(dataset, tenant=None, root=SNAPSHOT_ROOT, keep=SNAPSHOT_KEEP):
+    """
+    Store a dataset version; returns its snapshot id (no-op if content is
+    unchanged). Snapshots beyond the newest `keep` are removed.
+    """
+    digest = dataset.derived["content_hash"]
+    entries = list_snapshots(tenant, root)
+    for entry in entries:
+        if entry["content_hash"] == digest:
+            return entry["snapshot_id"]
+
+    created = time.time()
+    snapshot_id = f"{time.strftime('%Y%m%dT%H%M%S', time.localtime(created))}_{digest[:8]}"
+    base = os.path.join(tenant_root(tenant, root), snapshot_id)
+    os.makedirs(os.path.join(base, "tables"), exist_ok=True)
+    os.makedirs(os.path.join(base, "aggregates"), exist_ok=True)
+
+    for table, df in zip(TABLES, dataset.tables):
+        df.to_parquet(os.path.join(base, "tables", f"{table}.parquet"), index=False)
+    for name, df in dataset.derived["kpi_aggregates"].items():
+        df.to_parquet(os.path.join(base, "aggregates", f"{name}.parquet"), index=False)
+
+    entries.append({
+        "snapshot_id": snapshot_id,
+        "created_at": created,
+        "dataset_version": dataset.version,
+        "content_hash": digest,
+        "rows": {table: len(df) for table, df in zip(TABLES, dataset.tables)},
+    })
+    _prune(entries, tenant, root, keep)
+    logger.info("Snapshot %s stored", snapshot_id)
+    return snapshot_id
+
+
+def record_snapshot(dataset, tenant=None, root=SNAPSHOT_ROOT):
+    # Snapshots are a history aid; a failed write must never break loading
+    try:
+        return save_snapshot(dataset, tenant, root)
+    except Exception:
+        logger.exception("Snapshot write failed")
+        return None
+
+
+def record_snapshot_async(dataset, tenant=None, root=SNAPSHOT_ROOT):
+    """Queue `record_snapshot` on the writer thread; returns its future."""
+    return _writer.submit(record_snapshot, dataset, tenant, root)
+
+
+@functools.lru_cache(maxsize=32)
+def load_aggregates(snapshot_id, tenant=None, root=SNAPSHOT_ROOT):
+    """Aggregates of a stored snapshot (immutable, so cached by id)."""
+    base = os.path.join(tenant_root(tenant, root), snapshot_id, "aggregates")
+    return {
+        name[:-len(".parquet")]: pd.read_parquet(os.path.join(base, name))
+        for name in os.listdir(base)
+        if name.endswith(".parquet")
+    }
+
+
+# --------------------------------------------------
+# BASELINE SELECTOR (sidebar)
+# --------------------------------------------------
+def select_baseline(snapshot, tenant=None):
+    """Sidebar choice of the snapshot to compare against; None if there is none."""
+    import streamlit as st
+
+    digest = snapshot.derived["content_hash"]
+    entries = [e for e in list_snapshots(tenant) if e["content_hash"] != digest]
+    if not entries:
+        return None
+
+    labels = {
+        e["snapshot_id"]: (
+            f"{time.strftime('%Y-%m-%d %H:%M', time.localtime(e['created_at']))} "
+            f"(v{e['dataset_version']})"
+        )
+        for e in entries
+    }
+    snapshot_id = st.sidebar.selectbox(
+        "Bandingkan dengan snapshot",
+        options=list(labels),
+        format_func=labels.get,
+        key="baseline_snapshot",
+    )
+    st.sidebar.caption(
+        "Delta KPI = perubahan dibanding snapshot terpilih (antar snapshot, bukan per bulan)."
+    )
+    return load_aggregates(snapshot_id, tenant)
+
+
+def main():
+    from utils.data_loader import build_dataset, build_tenant_dataset
+    from utils.partitions import catalog_path
+    from utils.refresh import Dataset
+
+    parser = argparse.ArgumentParser(description="Store / list versioned dataset snapshots.")
+    parser.add_argument("command", choices=["save", "list"])
+    parser.add_argument("--tenant", default=None)
+    parser.add_argument("--root", default=SNAPSHOT_ROOT)
+    parser.add_argument("--keep", type=int, default=SNAPSHOT_KEEP)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+
+    if args.command == "list":
+        for e in list_snapshots(args.tenant, args.root):
+            print(e["snapshot_id"], e["dataset_version"], e["rows"])
+        return
+
+    if args.tenant is None:
+        po, gr, inv, cons, derived = build_dataset()
+    else:
+        po, gr, inv, cons, derived = build_tenant_dataset(catalog_path(), args.tenant)
+    dataset = Dataset(0, (), time.time(), po, gr, inv, cons, derived)
+    print(save_snapshot(dataset, args.tenant, args.root, args.keep))
+
+
+if __name__ == "__main__":
+    main()
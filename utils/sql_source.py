@@ -0,0 +1,344 @@
+import argparse
+import functools
+import json
+import logging
+import os
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+from urllib.parse import urlsplit
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# --------------------------------------------------
+# ERP-replica database source.
+#   DATABASE_URL=sqlite:///data/erp.db  or  postgresql://user@host/db
+# Rows are fetched through pooled connections with a server-side cursor
+# (Postgres) in FETCH_ROWS batches, each turned into an Arrow record batch.
+# Only rows at or after each table's stored watermark are pulled; older
+# rows come from a local parquet cache, so a refresh costs the new rows.
+# Arrow column types come from the declared column types, so empty
+# results and NULL-only batches keep their type.
+#
+# Limitation: the watermark is the table's insert / business date column,
+# so changes to rows already behind it (e.g. a PO's po_status moving from
+# Open to Closed) are not picked up by an incremental pull. Run
+# `python -m utils.sql_source pull --full` periodically to resync them.
+# --------------------------------------------------
+DATABASE_URL_ENV = "DATABASE_URL"
+SQL_CACHE_DIR = "data/sql_cache"
+STATE_FILE = "watermarks.json"
+FETCH_ROWS = 50_000
+POOL_SIZE = 4
+
+# sheet / table name -> (watermark column, date columns)
+TABLES = {
+    "Purchase_Order": ("po_date", ["po_date", "expected_delivery_date"]),
+    "Goods_Receipt": ("gr_date", ["gr_date"]),
+    "Inventory": ("date", ["date"]),
+    "Material_Consumption": ("production_date", ["production_date"]),
+}
+
+
+# declared SQL type (SQLite affinity / Postgres data_type) -> Arrow type,
+# first matching rule wins
+ARROW_TYPES = [
+    ("interval", "string"),
+    ("timestamp", "timestamp[us]"),
+    ("date", "timestamp[us]"),
+    ("bool", "bool"),
+    ("int", "int64"),
+    ("real", "float64"),
+    ("floa", "float64"),
+    ("doub", "float64"),
+    ("numeric", "float64"),
+    ("decimal", "float64"),
+]
+
+
+def arrow_type(declared):
+    """Arrow type of a declared column type; text for anything unknown."""
+    import pyarrow as pa
+
+    declared = (declared or "").lower()
+    for token, name in ARROW_TYPES:
+        if token in declared:
+            return pa.type_for_alias(name)
+    return pa.string()
+
+
+def typed_array(values, type_=None):
+    """Arrow array of one fetched column, converted to `type_` when given."""
+    import pyarrow as pa
+
+    if type_ is None:
+        return pa.array(values)
+    try:
+        return pa.array(values, type=type_)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        # e.g. ISO date strings (SQLite) or Decimal values (Postgres NUMERIC)
+        return pa.array(values).cast(type_)
+
+
+# --------------------------------------------------
+# CONNECTIONS
+# --------------------------------------------------
+def connect(url):
+    parts = urlsplit(url)
+    if parts.scheme == "sqlite":
+        # sqlite:///relative/path.db  or  sqlite:////absolute/path.db
+        return sqlite3.connect(parts.path[1:], check_same_thread=False)
+    if parts.scheme in ("postgres", "postgresql"):
+        try:
+            import psycopg
+        except ImportError:
+            import psycopg2 as psycopg
+        return psycopg.connect(url)
+    raise ValueError(f"Unsupported database URL scheme: {parts.scheme!r}")
+
+
+class ConnectionPool:
+    """Reuses up to `size` open connections; broken connections are discarded."""
+
+    def __init__(self, url, size=POOL_SIZE):
+        self.url = url
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+
+    @contextmanager
+    def connection(self):
+        self._slots.acquire()
+        try:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                conn = connect(self.url)
+            try:
+                yield conn
+                conn.commit()
+            except Exception:
+                conn.close()
+                raise
+            self._idle.put(conn)
+        finally:
+            self._slots.release()
+
+    def close(self):
+        while not self._idle.empty():
+            self._idle.get_nowait().close()
+
+
+# --------------------------------------------------
+# SOURCE
+# --------------------------------------------------
+class SQLSource:
+    """Incremental, cached reader of the four purchasing tables."""
+
+    def __init__(self, url, cache_dir=SQL_CACHE_DIR, fetch_rows=FETCH_ROWS):
+        self.url = url
+        self.pool = ConnectionPool(url)
+        self.cache_dir = cache_dir
+        self.fetch_rows = fetch_rows
+        self._lock = threading.Lock()
+
+    @property
+    def _param(self):
+        return "?" if urlsplit(self.url).scheme == "sqlite" else "%s"
+
+    def _cursor(self, conn):
+        # Named cursors stay on the server and stream rows (psycopg)
+        if isinstance(conn, sqlite3.Connection):
+            return conn.cursor()
+        return conn.cursor(name="dashboard_pull")
+
+    def column_types(self, table):
+        """{column: Arrow type} from the table's declared column types."""
+        if urlsplit(self.url).scheme == "sqlite":
+            sql, params = f'PRAGMA table_info("{table}")', ()
+        else:
+            sql = (
+                "SELECT ordinal_position, column_name, data_type "
+                f"FROM information_schema.columns WHERE table_name = {self._param}"
+            )
+            params = (table,)
+        with self.pool.connection() as conn:
+            cur = conn.cursor()
+            try:
+                cur.execute(sql, params)
+                rows = cur.fetchall()
+            finally:
+                cur.close()
+        return {row[1]: arrow_type(row[2]) for row in rows}
+
+    def fetch_arrow(self, sql, params=(), types=None):
+        """Run a query and collect the result as Arrow record batches.
+
+        `types` ({column: Arrow type}) fixes the column types; other columns
+        keep the type inferred from their first non-null batch.
+        """
+        import pyarrow as pa
+
+        types = dict(types or {})
+        batches = []
+        with self.pool.connection() as conn:
+            cur = self._cursor(conn)
+            try:
+                cur.execute(sql, params)
+                names = None
+                while True:
+                    rows = cur.fetchmany(self.fetch_rows)
+                    if names is None:
+                        names = [d[0] for d in cur.description]
+                    if not rows:
+                        break
+                    columns = []
+                    for name, col in zip(names, zip(*rows)):
+                        array = typed_array(col, types.get(name))
+                        if name not in types and not pa.types.is_null(array.type):
+                            types[name] = array.type
+                        columns.append(array)
+                    batches.append(columns)
+            finally:
+                cur.close()
+
+        # Columns never seen non-null (and without a declared type) stay null
+        schema = pa.schema([(name, types.get(name, pa.null())) for name in names or []])
+        return pa.Table.from_batches(
+            [
+                pa.RecordBatch.from_arrays(
+                    [c.cast(f.type) for c, f in zip(columns, schema)], schema=schema
+                )
+                for columns in batches
+            ],
+            schema=schema,
+        )
+
+    # ---------- watermarks & cache ----------
+
+    def _state_path(self):
+        return os.path.join(self.cache_dir, STATE_FILE)
+
+    def _read_state(self):
+        path = self._state_path()
+        if not os.path.exists(path):
+            return {}
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+
+    def _write_state(self, state):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp = self._state_path() + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(state, f, indent=1)
+        os.replace(tmp, self._state_path())
+
+    def _cache_path(self, table):
+        return os.path.join(self.cache_dir, f"{table}.parquet")
+
+    # ---------- pulls ----------
+
+    def _query(self, table, watermark=None):
+        column = TABLES[table][0]
+        sql = f'SELECT * FROM "{table}"'
+        if watermark is None:
+            return sql, ()
+        # >= re-reads the watermark day, so rows landing later that day are kept
+        return f'{sql} WHERE "{column}" >= {self._param} OR "{column}" IS NULL', (watermark,)
+
+    def pull_table(self, table, state, full=False):
+        column, dates = TABLES[table]
+        cache = self._cache_path(table)
+        watermark = None if full or not os.path.exists(cache) else state.get(table)
+
+        new = self.fetch_arrow(
+            *self._query(table, watermark), types=self.column_types(table)
+        ).to_pandas()
+        for col in dates:
+            if col in new:
+                new[col] = pd.to_datetime(new[col])
+
+        if watermark is None:
+            df = new
+        else:
+            old = pd.read_parquet(cache)
+            keep = old[column] < pd.Timestamp(watermark)
+            df = pd.concat([old[keep], new], ignore_index=True)
+
+        logger.info("%s: %s new rows since %s", table, len(new), watermark or "start")
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        df.to_parquet(cache, index=False)
+        last = df[column].max()
+        state[table] = None if pd.isna(last) else pd.Timestamp(last).isoformat(sep=" ")
+        return df
+
+    def pull(self, full=False):
+        """(po, gr, inv, cons) with only rows since the stored watermarks fetched."""
+        with self._lock:
+            state = self._read_state()
+            tables = tuple(self.pull_table(t, state, full) for t in TABLES)
+            self._write_state(state)
+            return tables
+
+    def stamp(self):
+        """Cheap change marker: row count and newest watermark value per table."""
+        out = []
+        for table, (column, _) in TABLES.items():
+            result = self.fetch_arrow(f'SELECT COUNT(*), MAX("{column}") FROM "{table}"')
+            out.extend(str(v[0]) for v in result.to_pydict().values())
+        return tuple(out)
+
+
+@functools.lru_cache(maxsize=None)
+def source_for(url):
+    """One source (pool + cache) per database URL and process."""
+    return SQLSource(url)
+
+
+def sql_stamp(url):
+    return source_for(url).stamp()
+
+
+def seed_sqlite(workbook, url):
+    """Copy a workbook into a SQLite database (local testing)."""
+    from utils.data_loader import read_workbook
+
+    with source_for(url).pool.connection() as conn:
+        for table, df in zip(TABLES, read_workbook(workbook)):
+            df.to_sql(table, conn, if_exists="replace", index=False)
+            conn.execute(
+                f'CREATE INDEX IF NOT EXISTS "ix_{table}_wm" ON "{table}" ("{TABLES[table][0]}")'
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pull the purchasing tables from a SQL source.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    pull = sub.add_parser(
+        "pull", help="incremental pull; --full also picks up updates to older rows"
+    )
+    pull.add_argument("--url", default=os.environ.get(DATABASE_URL_ENV))
+    pull.add_argument("--full", action="store_true")
+    seed = sub.add_parser("seed", help="load a workbook into SQLite for local testing")
+    seed.add_argument("workbook")
+    seed.add_argument("url")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+
+    if args.command == "seed":
+        seed_sqlite(args.workbook, args.url)
+        print(f"{args.workbook} loaded into {args.url}")
+        return
+
+    if not args.url:
+        parser.error(f"--url or {DATABASE_URL_ENV} is required")
+    tables = source_for(args.url).pull(full=args.full)
+    print(", ".join(f"{t}: {len(df)} rows" for t, df in zip(TABLES, tables)))
+
+
+if __name__ == "__main__":
+    main()